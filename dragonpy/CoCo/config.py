@@ -68,7 +68,7 @@ class CoCo2bCfg(Dragon32Cfg):
 
         self.machine_api = CoCoAPI()
 
-        if self.verbosity <= logging.ERROR:
+        if self.verbosity <= logging.ERROR or self.mem_info_required:
             self.mem_info = get_coco_meminfo()
 
         self.periphery_class = None# Dragon32Periphery
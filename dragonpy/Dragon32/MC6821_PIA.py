@@ -57,6 +57,18 @@ class PIA_register(object):
     def get(self):
         return self.value
 
+    STATE_ATTRIBUTES = (
+        "value", "_pdr_selected", "control_register", "direction_register",
+        "output_register", "interrupt_received", "irq",
+    )
+
+    def get_state(self):
+        return dict((name, getattr(self, name)) for name in self.STATE_ATTRIBUTES)
+
+    def set_state(self, state):
+        for name in self.STATE_ATTRIBUTES:
+            setattr(self, name, state[name])
+
     def is_pdr_selected(self):
         return self._pdr_selected
 
@@ -103,6 +115,7 @@ class PIA(object):
 
         self.pia_1_A_register = PIA_register("PIA1 A")
         self.pia_1_B_register = PIA_register("PIA1 B")
+        self.pia_1_B_control = PIA_register("PIA1 B control register $ff23")
 
         self.internal_reset()
 
@@ -148,6 +161,7 @@ class PIA(object):
         self.pia_0_B_control.reset()
         self.pia_1_A_register.reset()
         self.pia_1_B_register.reset()
+        self.pia_1_B_control.reset()
 
     def internal_reset(self):
         """
@@ -159,6 +173,36 @@ class PIA(object):
         self.current_input_char = None
         self.input_repead = 0
 
+    def _get_registers(self):
+        return (
+            ("pia_0_A_register", self.pia_0_A_register),
+            ("pia_0_B_data", self.pia_0_B_data),
+            ("pia_0_B_control", self.pia_0_B_control),
+            ("pia_1_A_register", self.pia_1_A_register),
+            ("pia_1_B_register", self.pia_1_B_register),
+            ("pia_1_B_control", self.pia_1_B_control),
+        )
+
+    def get_state(self):
+        """
+        used for machine save-state
+        """
+        state = dict(
+            (name, register.get_state())
+            for name, register in self._get_registers()
+        )
+        state["empty_key_toggle"] = self.empty_key_toggle
+        state["current_input_char"] = self.current_input_char
+        state["input_repead"] = self.input_repead
+        return state
+
+    def set_state(self, state):
+        for name, register in self._get_registers():
+            register.set_state(state[name])
+        self.empty_key_toggle = state["empty_key_toggle"]
+        self.current_input_char = state["current_input_char"]
+        self.input_repead = state["input_repead"]
+
     def read_PIA1_A_data(self, cpu_cycles, op_address, address):
         """ read from 0xff20 -> PIA 1 A side Data reg. """
         log.error("TODO: read from 0xff20 -> PIA 1 A side Data reg.")
@@ -192,15 +236,33 @@ class PIA(object):
             "TODO: write $%02x to 0xff21 -> PIA 1 A side Control reg.", value)
 
     def write_PIA1_B_data(self, cpu_cycles, op_address, address, value):
-        """ write to 0xff22 -> PIA 1 B side Data reg. """
-        log.debug(
-            "TODO: write $%02x to 0xff22 -> PIA 1 B side Data reg.", value
-        )
+        """
+        write to 0xff22 -> PIA 1 B side Data reg. or Data Direction reg.
+        bit 3-7 are the VDG mode: CSS, GM0, GM1, GM2, A/G
+        They are only latched, if the data register is selected via $ff23 bit 2.
+        TODO: single bit sound, RAM size input
+        """
+        if self.pia_1_B_control.is_pdr_selected():
+            self.pia_1_B_register.set(value)
+        else:
+            self.pia_1_B_register.direction_register = value
+
+    def get_vdg_control(self):
+        """ The VDG mode bits from PIA 1 B side Data reg. """
+        return self.pia_1_B_register.get()
 
     def write_PIA1_B_control(self, cpu_cycles, op_address, address, value):
-        """ write to 0xff23 -> PIA 1 B side Control reg. """
-        log.error(
-            "TODO: write $%02x to 0xff23 -> PIA 1 B side Control reg.", value)
+        """
+        write to 0xff23 -> PIA 1 B side Control reg.
+
+        bit 2 | select: 0 = $ff22 is DDR / 1 = $ff22 is the data register
+        TODO: bit 0-1 cartridge FIRQ, bit 3-5 CB2 (sound enable)
+        """
+        if is_bit_set(value, bit=2):
+            self.pia_1_B_control.select_pdr()
+        else:
+            self.pia_1_B_control.deselect_pdr()
+        self.pia_1_B_control.set(value)
 
     #--------------------------------------------------------------------------
 
@@ -14,11 +14,17 @@ import six
 
 xrange = six.moves.xrange
 
+import base64
 import logging
 
 from dragonpy.Dragon32 import dragon_charmap
+from dragonpy.Dragon32.MC6847_graphics import (
+    HEIGHT as GRAPHICS_HEIGHT, WIDTH as GRAPHICS_WIDTH, get_graphics_renderer, get_ppm
+)
 from dragonpy.Dragon32.dragon_charmap import get_charmap_dict
-from dragonpy.Dragon32.dragon_font import CHARS_DICT, TkImageFont
+from dragonpy.Dragon32.dragon_font import (
+    BACKGROUND_CHAR, CHARS_DICT, FOREGROUND_CHAR, TkGlyphAtlas
+)
 
 log = logging.getLogger(__name__)
 
@@ -32,14 +38,104 @@ except ImportError:
     import tkFont as TkFont
 
 
-class MC6847_TextModeCanvas(object):
+VIDEO_RAM_START = 0x0400
+VIDEO_RAM_SIZE = 512 # 32 x 16 characters
+
+
+def get_glyph_rows(char, color, chars_dict=CHARS_DICT):
+    """
+    Returns the Tkinter.PhotoImage.put() colors of every pixel line of one character.
+
+    >>> rows = get_glyph_rows("A", dragon_charmap.NORMAL)
+    >>> len(rows)
+    13
+    >>> rows[4]
+    '#00ff00 #00ff00 #00ff00 #004100 #00ff00 #004100 #00ff00 #00ff00'
+    """
+    try:
+        char_data = chars_dict[char]
+    except KeyError:
+        log.log(99, "Error: character %s is not in CHARS_DICT !", repr(char))
+        char_data = chars_dict["?"]
+
+    foreground, background = dragon_charmap.get_hex_color(color)
+    pixels = {
+        BACKGROUND_CHAR: "#%s" % background,
+        FOREGROUND_CHAR: "#%s" % foreground,
+    }
+    return tuple(" ".join(pixels[bit] for bit in line) for line in char_data)
+
+
+def get_put_data(glyphs):
+    """
+    Returns the Tkinter.PhotoImage.put() data of consecutive characters.
+
+    >>> glyphs = [("#000001 #000002", "#000003 #000004"), ("#000005 #000006", "#000007 #000008")]
+    >>> get_put_data(glyphs)
+    '{#000001 #000002 #000005 #000006} {#000003 #000004 #000007 #000008}'
+    """
+    return " ".join(
+        "{%s}" % " ".join(lines)
+        for lines in zip(*glyphs)
+    )
+
+
+class MC6847_TextModeBase(object):
+    """
+    The "write into Display RAM" from the CPU are only recorded in a shadow
+    of the Display RAM. The display will be updated via self.update() once
+    per GUI tick: Only the characters with a changed value will be rendered.
+    So e.g. scrolling the screen is one update and not 512 Tk calls.
+    """
+    def init_buffers(self):
+        # The last written Display RAM values:
+        self.video_ram = bytearray(VIDEO_RAM_SIZE)
+        # The positions written since the last update():
+        self.dirty = set()
+        # The values on the display (None == still the init image):
+        self.displayed = [None] * VIDEO_RAM_SIZE
+
+    def write_byte(self, cpu_cycles, op_address, address, value):
+        # log.critical(
+        #             "%04x| *** Display write $%02x *** at $%04x",
+        #             op_address, value, address
+        #         )
+        position = address - VIDEO_RAM_START
+        if position < VIDEO_RAM_SIZE:
+            self.video_ram[position] = value
+            self.dirty.add(position)
+
+    def update(self):
+        """
+        Render all characters that are changed since the last call.
+        Returns the count of rendered characters.
+        """
+        if not self.dirty:
+            return 0
+        dirty = self.dirty
+        self.dirty = set()
+
+        video_ram = self.video_ram
+        displayed = self.displayed
+        changed = []
+        for position in dirty:
+            value = video_ram[position]
+            if displayed[position] != value:
+                displayed[position] = value
+                changed.append(position)
+        if changed:
+            self.render(changed)
+        return len(changed)
+
+    def render(self, positions):
+        raise NotImplementedError
+
+
+class MC6847_TextModeCanvas(MC6847_TextModeBase):
     """
     MC6847 Video Display Generator (VDG) in Alphanumeric Mode.
     This display mode consumes 512 bytes of memory and is a 32 character wide screen with 16 lines.
 
-    Here we only get the "write into Display RAM" information from the CPU-Thread
-    from display_queue.
-
     The Display Tkinter.Canvas() which will be filled with Tkinter.PhotoImage() instances.
     Every displayed character is a Tkinter.PhotoImage()
     """
@@ -49,10 +145,17 @@ class MC6847_TextModeCanvas(object):
         self.columns = 16
 
         scale_factor = 2  # scale the complete Display/Characters
-        self.tk_font = TkImageFont(CHARS_DICT, scale_factor)  # to generate PhotoImage()
 
-        self.total_width = self.tk_font.width_scaled * self.rows
-        self.total_height = self.tk_font.height_scaled * self.columns
+        # Contains the map from Display RAM value to char/color:
+        self.charmap = get_charmap_dict()
+
+        # The Tkinter.PhotoImage() of every charmap value,
+        # copied from the glyph atlas, that is cached on disk:
+        self.atlas = TkGlyphAtlas(self.charmap, CHARS_DICT, scale_factor)
+        self.image_cache = self.atlas.images
+
+        self.total_width = self.atlas.width_scaled * self.rows
+        self.total_height = self.atlas.height_scaled * self.columns
 
         foreground, background = dragon_charmap.get_hex_color(dragon_charmap.NORMAL)
         self.canvas = tkinter.Canvas(root,
@@ -64,48 +167,186 @@ class MC6847_TextModeCanvas(object):
             bg="#%s" % background,
         )
 
-        # Contains the map from Display RAM value to char/color:
-        self.charmap = get_charmap_dict()
-
-        # Cache for the generated Tkinter.PhotoImage() in evry char/color combination:
-        self.image_cache = {}
-
         # Tkinter.PhotoImage() IDs for image replace with canvas.itemconfigure():
-        self.images_map = {}
-
-        # Create all charachter images on the display and fill self.images_map:
-        self.init_img = self.tk_font.get_char(char="?", color=dragon_charmap.INVERTED)
-        for row in xrange(self.rows + 1):
-            for column in xrange(self.columns + 1):
-                x = self.tk_font.width_scaled * row
-                y = self.tk_font.height_scaled * column
+        self.image_ids = []
+
+        # Create all charachter images on the display and fill self.image_ids:
+        self.init_img = self.atlas.get_char_image("?", dragon_charmap.INVERTED)
+        for column in xrange(self.columns):
+            for row in xrange(self.rows):
+                x = self.atlas.width_scaled * row
+                y = self.atlas.height_scaled * column
                 image_id = self.canvas.create_image(x, y,
                     image=self.init_img,
                     state="normal",
                     anchor=tkinter.NW  # NW == NorthWest
                 )
                 # log.critical("Image ID: %s at %i x %i", image_id, x, y)
-                self.images_map[(x, y)] = image_id
+                self.image_ids.append(image_id)
 
-    def write_byte(self, cpu_cycles, op_address, address, value):
-        # log.critical(
-        #             "%04x| *** Display write $%02x ***%s*** %s at $%04x",
-        #             op_address, value, repr(char), color, address
-        #         )
+        self.init_buffers()
+
+    def render(self, positions):
+        video_ram = self.video_ram
+        for position in positions:
+            self.render_char(position, video_ram[position])
+
+    def render_char(self, position, value):
+        image = self.image_cache[value] # The atlas contains every charmap value
+        self.canvas.itemconfigure(self.image_ids[position], image=image)
+
+
+class MC6847_FrameBufferCanvas(MC6847_TextModeBase):
+    """
+    MC6847 Alphanumeric Mode with one framebuffer for the complete screen.
+
+    The changed characters are blitted into one unscaled Tkinter.PhotoImage()
+    with one put() per changed text line. The changed lines are scaled
+    in one Tk "image copy -zoom" call into the displayed PhotoImage.
+    So the canvas has only one image item, instead of one per character.
+    """
 
+    def __init__(self, root, scale_factor=2):
+        self.rows = 32
+        self.columns = 16
+        self.scale_factor = scale_factor
+
+        temp = CHARS_DICT["X"]
+        self.char_width = len(temp[0])
+        self.char_height = len(temp)
+        self.width = self.char_width * self.rows
+        self.height = self.char_height * self.columns
+
+        self.total_width = self.width * self.scale_factor
+        self.total_height = self.height * self.scale_factor
+
+        # Contains the map from Display RAM value to char/color:
+        self.charmap = get_charmap_dict()
+
+        # Cache for the put() data of every char/color combination:
+        self.glyph_cache = {}
+
+        self.frame = tkinter.PhotoImage(width=self.width, height=self.height)
+        self.image = tkinter.PhotoImage(width=self.total_width, height=self.total_height)
+        self.canvas = tkinter.Canvas(root,
+            width=self.total_width,
+            height=self.total_height,
+            bd=0, # no border
+            highlightthickness=0, # no highlight border
+        )
+        self.canvas.create_image(0, 0, image=self.image, anchor=tkinter.NW)
+
+        self.init_buffers()
+
+        # Fill the screen with "?" until the Display RAM is written:
+        self.init_glyph = get_glyph_rows("?", dragon_charmap.INVERTED)
+        for column in xrange(self.columns):
+            self.put_chars(column, 0, [self.init_glyph] * self.rows)
+        self.zoom(0, self.columns)
+
+    def get_glyph(self, value):
         try:
-            image = self.image_cache[value]
+            return self.glyph_cache[value]
         except KeyError:
-            # Generate a Tkinter.PhotoImage() for the requested char/color
             char, color = self.charmap[value]
-            image = self.tk_font.get_char(char, color)
-            self.image_cache[value] = image
+            glyph = get_glyph_rows(char, color)
+            self.glyph_cache[value] = glyph
+            return glyph
+
+    def render(self, positions):
+        # Collect the changed positions per text line:
+        lines = {}
+        for position in positions:
+            column, row = divmod(position, self.rows)
+            lines.setdefault(column, []).append(row)
+
+        video_ram = self.video_ram
+        displayed = self.displayed
+        for column, rows in lines.items():
+            # Blit the range from the first to the last changed character:
+            start = column * self.rows
+            glyphs = []
+            for position in xrange(start + min(rows), start + max(rows) + 1):
+                if displayed[position] is None:
+                    glyphs.append(self.init_glyph)
+                else:
+                    glyphs.append(self.get_glyph(video_ram[position]))
+            self.put_chars(column, min(rows), glyphs)
+
+        self.zoom(min(lines), max(lines) + 1)
+
+    def put_chars(self, column, row, glyphs):
+        """
+        Blit consecutive characters into the unscaled frame.
+        """
+        self.frame.put(get_put_data(glyphs), to=(row * self.char_width, column * self.char_height))
+
+    def zoom(self, start_column, end_column):
+        """
+        Scale the text lines from the frame into the displayed image.
+        """
+        scale_factor = self.scale_factor
+        y0 = start_column * self.char_height
+        y1 = end_column * self.char_height
+        self.image.tk.call(self.image.name, "copy", self.frame.name,
+            "-from", 0, y0, self.width, y1,
+            "-to", 0, y0 * scale_factor,
+            "-zoom", scale_factor, scale_factor,
+        )
+
+
+class MC6847_GraphicsCanvas(object):
+    """
+    MC6847 resolution graphics and semigraphics modes.
+
+    The complete frame is rendered from the video RAM slice in one go and
+    put as one PPM image into the unscaled Tkinter.PhotoImage(), that
+    is zoomed into the displayed PhotoImage.
+    """
+
+    def __init__(self, root, scale_factor=2):
+        self.scale_factor = scale_factor
+        self.total_width = GRAPHICS_WIDTH * scale_factor
+        self.total_height = GRAPHICS_HEIGHT * scale_factor
+
+        self.renderer = get_graphics_renderer()
+
+        self.frame = tkinter.PhotoImage(width=GRAPHICS_WIDTH, height=GRAPHICS_HEIGHT)
+        self.image = tkinter.PhotoImage(width=self.total_width, height=self.total_height)
+        self.canvas = tkinter.Canvas(root,
+            width=self.total_width,
+            height=self.total_height,
+            bd=0, # no border
+            highlightthickness=0, # no highlight border
+            bg="#000000",
+        )
+        self.canvas.create_image(0, 0, image=self.image, anchor=tkinter.NW)
+
+        self.last_frame = None
+
+    def update(self, data, mode, css):
+        """
+        Render the video RAM data, if something changed since the last call.
+        """
+        data = bytes(bytearray(data))
+        frame = (mode, css, data)
+        if frame == self.last_frame:
+            return False
+        self.last_frame = frame
+
+        self.put_frame(self.renderer.render(data, mode, css))
+        return True
+
+    def put_frame(self, rgb):
+        data = base64.b64encode(get_ppm(rgb)).decode("ascii")
+        self.frame.tk.call(self.frame.name, "put", data, "-format", "ppm")
+        self.image.tk.call(self.image.name, "copy", self.frame.name,
+            "-zoom", self.scale_factor, self.scale_factor,
+        )
 
-        position = address - 0x400
-        column, row = divmod(position, self.rows)
-        x = self.tk_font.width_scaled * row
-        y = self.tk_font.height_scaled * column
 
-        #         log.critical("replace image %s at %i x %i", image, x, y)
-        image_id = self.images_map[(x, y)]
-        self.canvas.itemconfigure(image_id, image=image)
+# The Tkinter display backends of the text mode:
+DISPLAY_BACKENDS = {
+    "canvas": MC6847_TextModeCanvas, # one PhotoImage per character
+    "framebuffer": MC6847_FrameBufferCanvas, # one PhotoImage for the screen
+}
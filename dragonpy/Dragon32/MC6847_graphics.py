@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    MC6847 Video Display Generator (VDG) graphics modes:
+
+    * the resolution graphics modes CG1 - RG6 (A/G bit set)
+    * the semigraphics modes SG4 and SG6 with alphanumeric characters
+
+    The complete 256x192 frame is rendered from the video RAM slice in one
+    go (once per display update, not per written byte) via lookup tables.
+    NumPy is used if installed, otherwise a pure python implementation.
+
+    The VDG mode is set via PIA 1 B side data register ($ff22) bits 3-7,
+    the video RAM address via the SAM display offset bits F0-F6.
+
+    http://www.6809.org.uk/dragon/hardware.shtml#vdg
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+
+import six
+xrange = six.moves.xrange
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dragonpy.Dragon32.dragon_charmap import (
+    COLOR_INFO, COLORS, get_charmap_dict, get_rgb_color
+)
+from dragonpy.Dragon32.dragon_font import CHARS_DICT, FOREGROUND_CHAR
+
+
+log = logging.getLogger(__name__)
+
+
+WIDTH = 256
+HEIGHT = 192
+
+TEXT_COLUMNS = 32
+TEXT_ROWS = 16
+CELL_WIDTH = WIDTH // TEXT_COLUMNS # 8
+CELL_HEIGHT = HEIGHT // TEXT_ROWS # 12
+
+# PIA 1 B side data register bits:
+VDG_AG = 0x80 # Alphanumeric (0) / Graphics (1)
+VDG_GM_SHIFT = 4 # GM0-GM2: graphics mode, GM0 is also INT/EXT
+VDG_GM0 = 0x10
+VDG_CSS = 0x08 # Color Set Select
+
+SG4 = "SG4"
+SG6 = "SG6"
+
+# GM0-GM2 -> name, bytes per line, lines, bits per pixel
+GRAPHICS_MODES = (
+    ("CG1", 16, 64, 2), # 64x64 4 colors
+    ("RG1", 16, 64, 1), # 128x64 2 colors
+    ("CG2", 32, 64, 2), # 128x64 4 colors
+    ("RG2", 16, 96, 1), # 128x96 2 colors
+    ("CG3", 32, 96, 2), # 128x96 4 colors
+    ("RG3", 16, 192, 1), # 128x192 2 colors
+    ("CG6", 32, 192, 2), # 128x192 4 colors
+    ("RG6", 32, 192, 1), # 256x192 2 colors
+)
+GRAPHICS_MODE_DICT = dict((mode[0], mode) for mode in GRAPHICS_MODES)
+
+# The palette: the 8 VDG colors, black and the alphanumeric colors
+PALETTE = [COLOR_INFO[color] for color in COLORS]
+BLACK = len(PALETTE)
+PALETTE.append((0, 0, 0))
+
+
+def get_vdg_mode(vdg_control):
+    """
+    Returns the mode name and the color set from the PIA 1 B data register value.
+
+    >>> get_vdg_mode(0x00)
+    ('SG4', 0)
+    >>> get_vdg_mode(0xf8) # PMODE 4,1 : SCREEN 1,1
+    ('RG6', 1)
+    >>> get_vdg_mode(0x80)
+    ('CG1', 0)
+    >>> get_vdg_mode(0x10)
+    ('SG6', 0)
+    """
+    css = 1 if vdg_control & VDG_CSS else 0
+    if vdg_control & VDG_AG:
+        mode = GRAPHICS_MODES[(vdg_control >> VDG_GM_SHIFT) & 7][0]
+    elif vdg_control & VDG_GM0:
+        mode = SG6
+    else:
+        mode = SG4
+    return mode, css
+
+
+def get_video_ram_size(mode):
+    """
+    >>> get_video_ram_size("RG6")
+    6144
+    >>> get_video_ram_size("SG4")
+    512
+    """
+    try:
+        name, bytes_per_line, lines, bits_per_pixel = GRAPHICS_MODE_DICT[mode]
+    except KeyError:
+        return TEXT_COLUMNS * TEXT_ROWS
+    return bytes_per_line * lines
+
+
+def get_ppm(rgb):
+    """
+    Returns the RGB frame as a binary PPM (P6) image.
+    """
+    header = "P6\n%i %i\n255\n" % (WIDTH, HEIGHT)
+    return header.encode("ascii") + rgb
+
+
+class BaseGraphicsRenderer(object):
+    """
+    Creates the lookup tables with palette indexes. Both implementations
+    render the same RGB frame from the same tables.
+    """
+    def __init__(self):
+        self.charmap = get_charmap_dict()
+        self.palette = list(PALETTE)
+        self._palette_index = dict((rgb, index) for index, rgb in enumerate(self.palette))
+        self._tables = {}
+
+    def _get_color_index(self, rgb):
+        try:
+            return self._palette_index[rgb]
+        except KeyError:
+            index = self._palette_index[rgb] = len(self.palette)
+            self.palette.append(rgb)
+            return index
+
+    def get_pixel_table(self, bits_per_pixel, css):
+        """
+        Palette indexes of the pixels of every byte value in graphics modes.
+        """
+        if bits_per_pixel == 1:
+            colors = (BLACK, 4 if css else 0) # black and green or buff
+        else:
+            colors = tuple(xrange(css * 4, css * 4 + 4))
+
+        pixel_count = 8 // bits_per_pixel
+        mask = (1 << bits_per_pixel) - 1
+        table = []
+        for value in xrange(0x100):
+            table.append(tuple(
+                colors[(value >> (bits_per_pixel * (pixel_count - 1 - pixel))) & mask]
+                for pixel in xrange(pixel_count)
+            ))
+        return table
+
+    def _get_block_cell(self, lit_color, blocks, bits):
+        """
+        Palette indexes of a semigraphics cell with 2 columns x (bits / 2) rows.
+        """
+        block_rows = bits // 2
+        block_height = CELL_HEIGHT // block_rows
+        half_width = CELL_WIDTH // 2
+        cell = []
+        for line in xrange(CELL_HEIGHT):
+            block_row = line // block_height
+            left = blocks & (1 << (bits - 1 - block_row * 2))
+            right = blocks & (1 << (bits - 2 - block_row * 2))
+            cell.append(
+                (lit_color if left else BLACK,) * half_width +
+                (lit_color if right else BLACK,) * half_width
+            )
+        return tuple(cell)
+
+    def _get_char_cell(self, value):
+        char, color = self.charmap[value]
+        try:
+            char_data = CHARS_DICT[char]
+        except KeyError:
+            char_data = CHARS_DICT["?"]
+        foreground, background = get_rgb_color(color)
+        foreground = self._get_color_index(foreground)
+        background = self._get_color_index(background)
+        return tuple(
+            tuple(foreground if bit == FOREGROUND_CHAR else background for bit in line)
+            for line in char_data[:CELL_HEIGHT]
+        )
+
+    def get_cell_table(self, mode, css):
+        """
+        Palette indexes of the 12 lines x 8 pixels of every byte value in
+        semigraphics modes.
+        """
+        table = []
+        for value in xrange(0x100):
+            if not value & 0x80:
+                table.append(self._get_char_cell(value))
+            elif mode == SG4:
+                table.append(self._get_block_cell((value >> 4) & 7, value & 0x0f, 4))
+            else:
+                table.append(self._get_block_cell(css * 4 + ((value >> 6) & 3), value & 0x3f, 6))
+        return table
+
+    def get_tables(self, mode, css):
+        try:
+            return self._tables[(mode, css)]
+        except KeyError:
+            log.debug("Create lookup tables for %s css:%i", mode, css)
+            if mode in GRAPHICS_MODE_DICT:
+                bits_per_pixel = GRAPHICS_MODE_DICT[mode][3]
+                table = self.get_pixel_table(bits_per_pixel, css)
+            else:
+                table = self.get_cell_table(mode, css)
+            tables = self._tables[(mode, css)] = self.create_tables(mode, table)
+            return tables
+
+    def create_tables(self, mode, table):
+        raise NotImplementedError
+
+    def render(self, data, mode, css):
+        """
+        Returns the RGB bytes of the 256x192 frame from the video RAM data.
+        """
+        size = get_video_ram_size(mode)
+        data = bytearray(data[:size])
+        if len(data) < size:
+            # The video RAM wraps not around
+            data += bytearray(size - len(data))
+
+        tables = self.get_tables(mode, css)
+        if mode in GRAPHICS_MODE_DICT:
+            return self.render_graphics(data, mode, tables)
+        return self.render_semigraphics(data, tables)
+
+
+class PythonGraphicsRenderer(BaseGraphicsRenderer):
+    """
+    Pure python: The tables contains the already scaled RGB bytes.
+    """
+    def create_tables(self, mode, table):
+        rgb_colors = [bytes(bytearray(rgb)) for rgb in self.palette]
+
+        if mode in GRAPHICS_MODE_DICT:
+            name, bytes_per_line, lines, bits_per_pixel = GRAPHICS_MODE_DICT[mode]
+            x_scale = WIDTH // (bytes_per_line * 8 // bits_per_pixel)
+            return [
+                b"".join(rgb_colors[index] * x_scale for index in pixels)
+                for pixels in table
+            ]
+
+        return [
+            [b"".join(rgb_colors[index] for index in line) for line in cell]
+            for cell in table
+        ]
+
+    def render_graphics(self, data, mode, tables):
+        name, bytes_per_line, lines, bits_per_pixel = GRAPHICS_MODE_DICT[mode]
+        y_scale = HEIGHT // lines
+        frame = []
+        for start in xrange(0, len(data), bytes_per_line):
+            line = b"".join([tables[value] for value in data[start:start + bytes_per_line]])
+            frame.append(line * y_scale)
+        return b"".join(frame)
+
+    def render_semigraphics(self, data, tables):
+        frame = []
+        for start in xrange(0, len(data), TEXT_COLUMNS):
+            cells = [tables[value] for value in data[start:start + TEXT_COLUMNS]]
+            for line in xrange(CELL_HEIGHT):
+                frame.append(b"".join([cell[line] for cell in cells]))
+        return b"".join(frame)
+
+
+class NumpyGraphicsRenderer(BaseGraphicsRenderer):
+    """
+    Expand the complete video RAM with NumPy array operations:
+    The tables contains the already scaled RGB pixels of every byte value.
+    """
+    def create_tables(self, mode, table):
+        palette = numpy.array(self.palette, dtype=numpy.uint8)
+        table = palette[numpy.array(table, dtype=numpy.uint8)]
+
+        if mode in GRAPHICS_MODE_DICT:
+            name, bytes_per_line, lines, bits_per_pixel = GRAPHICS_MODE_DICT[mode]
+            x_scale = WIDTH // (bytes_per_line * 8 // bits_per_pixel)
+            table = numpy.repeat(table, x_scale, axis=1)
+        return table
+
+    def render_graphics(self, data, mode, tables):
+        name, bytes_per_line, lines, bits_per_pixel = GRAPHICS_MODE_DICT[mode]
+        data = numpy.frombuffer(bytes(data), dtype=numpy.uint8).reshape(lines, bytes_per_line)
+        rgb = tables[data].reshape(lines, WIDTH * 3)
+        y_scale = HEIGHT // lines
+        if y_scale > 1:
+            rgb = numpy.repeat(rgb, y_scale, axis=0)
+        return rgb.tobytes()
+
+    def render_semigraphics(self, data, tables):
+        data = numpy.frombuffer(bytes(data), dtype=numpy.uint8).reshape(TEXT_ROWS, TEXT_COLUMNS)
+        # (rows, columns, cell lines, cell pixels, rgb) -> (rows, cell lines, columns, cell pixels, rgb)
+        return tables[data].transpose(0, 2, 1, 3, 4).tobytes()
+
+
+def get_graphics_renderer():
+    if numpy is None:
+        log.info("NumPy not installed: use pure python VDG graphics renderer")
+        return PythonGraphicsRenderer()
+    return NumpyGraphicsRenderer()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    MC6847 display without a GUI, e.g.: for unittests and batch runs.
+
+    No memory write middleware is registered: The video RAM is read on
+    demand via one bulk slice and translated with a 256 entries table
+    into the text lines. The current frame can be saved as PNG file
+    with only the standard library.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import struct
+import zlib
+
+import six
+xrange = six.moves.xrange
+
+from dragonpy.Dragon32.MC6847_graphics import (
+    HEIGHT, SG4, TEXT_COLUMNS, TEXT_ROWS, WIDTH,
+    get_graphics_renderer, get_vdg_mode, get_video_ram_size
+)
+from dragonpy.Dragon32.dragon_charmap import get_charmap_dict
+
+
+log = logging.getLogger(__name__)
+
+
+VIDEO_RAM_START = 0x0400
+VIDEO_RAM_SIZE = TEXT_COLUMNS * TEXT_ROWS # 512
+
+
+def get_charmap_table():
+    """
+    Returns the str.translate() table: Display RAM value -> char
+
+    >>> table = get_charmap_table()
+    >>> len(table)
+    256
+    >>> table[0x41] == "A" and table[0x60] == " "
+    True
+    """
+    charmap = get_charmap_dict()
+    return dict((value, charmap[value][0]) for value in xrange(0x100))
+
+
+def _png_chunk(chunk_type, data):
+    chunk = chunk_type + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xffffffff)
+
+
+def get_png(width, height, rgb, scale_factor=1):
+    """
+    Returns the RGB pixels as PNG file content.
+
+    >>> png = get_png(1, 1, b"\\xff\\x00\\x00")
+    >>> png[:8] == b"\\x89PNG\\r\\n\\x1a\\n"
+    True
+    """
+    line_size = width * 3
+    lines = []
+    for start in xrange(0, line_size * height, line_size):
+        line = rgb[start:start + line_size]
+        if scale_factor > 1:
+            line = b"".join(line[x:x + 3] * scale_factor for x in xrange(0, line_size, 3))
+        # filter type 0 (None) in front of every line:
+        lines.extend([b"\x00" + line] * scale_factor)
+
+    header = struct.pack(">IIBBBBB",
+        width * scale_factor, height * scale_factor,
+        8, # bit depth
+        2, # color type: RGB
+        0, 0, 0 # compression, filter and interlace method
+    )
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(b"".join(lines))),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+class MC6847_HeadlessDisplay(object):
+    """
+    Scrape the text screen from the video RAM.
+    The SAM and PIA are only needed for the frame of the graphics modes.
+    """
+    def __init__(self, memory, sam=None, pia=None):
+        self.memory = memory
+        self.sam = sam
+        self.pia = pia
+        self.charmap_table = get_charmap_table()
+        self.renderer = None # created on the first get_frame()
+
+    def get_text(self):
+        """
+        The complete text screen as one string with 512 characters.
+        """
+        data = self.memory.read_block(VIDEO_RAM_START, VIDEO_RAM_START + VIDEO_RAM_SIZE)
+        return data.tobytes().decode("latin-1").translate(self.charmap_table)
+
+    def get_lines(self):
+        """
+        The 16 text lines with 32 characters.
+        """
+        text = self.get_text()
+        return [text[start:start + TEXT_COLUMNS] for start in xrange(0, VIDEO_RAM_SIZE, TEXT_COLUMNS)]
+
+    def striped_output(self):
+        """
+        The text lines without leading/trailing spaces and empty lines at the end.
+        """
+        lines = [line.strip() for line in self.get_lines()]
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+
+    def get_mode(self):
+        if self.pia is None:
+            return SG4, 0
+        return get_vdg_mode(self.pia.get_vdg_control())
+
+    def get_frame(self):
+        """
+        Returns the RGB bytes of the current 256x192 frame.
+        """
+        if self.renderer is None:
+            self.renderer = get_graphics_renderer()
+
+        mode, css = self.get_mode()
+        if self.sam is None:
+            start = VIDEO_RAM_START
+        else:
+            start = self.sam.get_display_address()
+        data = self.memory.read_block(start, start + get_video_ram_size(mode))
+        return self.renderer.render(data, mode, css)
+
+    def save_png(self, path, scale_factor=1):
+        png = get_png(WIDTH, HEIGHT, self.get_frame(), scale_factor)
+        with open(path, "wb") as f:
+            f.write(png)
+        log.info("Display saved into %r", path)
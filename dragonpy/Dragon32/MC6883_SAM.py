@@ -49,6 +49,8 @@
 
 import logging
 
+from dragonpy.core.scheduler import get_scheduler
+
 log=logging.getLogger(__name__)
 
 
@@ -66,23 +68,25 @@ class SAM(object):
         self.memory = memory
 
 
-        self.cpu.add_sync_callback(callback_cycles=self.IRQ_CYCLES, callback=self.irq_trigger)
+        self.scheduler = get_scheduler(cpu)
+        self.irq_event = self.scheduler.add_periodic_event(self.IRQ_CYCLES, self.irq_trigger)
 
         #
         # TODO: Collect this information via a decorator similar to op codes in CPU!
         #
         self.memory.add_read_byte_callback(self.read_VDG_mode_register_v1, 0xffc2)
 
-        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v0, 0xffc0)
-        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v1, 0xffc2)
-        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v2, 0xffc4)
-        self.memory.add_write_byte_callback(self.write_display_offset_F0, 0xffc6)
-        self.memory.add_write_byte_callback(self.write_display_offset_F1, 0xffc8)
-        self.memory.add_write_byte_callback(self.write_display_offset_F2, 0xffca)
-        self.memory.add_write_byte_callback(self.write_display_offset_F3, 0xffcc)
-        self.memory.add_write_byte_callback(self.write_display_offset_F4, 0xffce)
-        self.memory.add_write_byte_callback(self.write_display_offset_F5, 0xffd0)
-        self.memory.add_write_byte_callback(self.write_display_offset_F6, 0xffd2)
+        # even address clears, odd address sets the register bit:
+        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v0, 0xffc0, 0xffc1)
+        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v1, 0xffc2, 0xffc3)
+        self.memory.add_write_byte_callback(self.write_VDG_mode_register_v2, 0xffc4, 0xffc5)
+        self.memory.add_write_byte_callback(self.write_display_offset_F0, 0xffc6, 0xffc7)
+        self.memory.add_write_byte_callback(self.write_display_offset_F1, 0xffc8, 0xffc9)
+        self.memory.add_write_byte_callback(self.write_display_offset_F2, 0xffca, 0xffcb)
+        self.memory.add_write_byte_callback(self.write_display_offset_F3, 0xffcc, 0xffcd)
+        self.memory.add_write_byte_callback(self.write_display_offset_F4, 0xffce, 0xffcf)
+        self.memory.add_write_byte_callback(self.write_display_offset_F5, 0xffd0, 0xffd1)
+        self.memory.add_write_byte_callback(self.write_display_offset_F6, 0xffd2, 0xffd3)
         self.memory.add_write_byte_callback(self.write_page_bit, 0xffd4)
         self.memory.add_write_byte_callback(self.write_MPU_rate_bit0, 0xffd6)
         self.memory.add_write_byte_callback(self.write_MPU_rate_bit1, 0xffd8)
@@ -91,17 +95,37 @@ class SAM(object):
         self.memory.add_write_byte_callback(self.write_map_type, 0xffde)
         self.memory.add_write_byte_callback(self.write_map0, 0xffdd)
 
-        #  Dragon 64 only:
-        self.memory.add_write_byte_callback(self.write_D64_dynamic_memory, 0xffc9)
-
         self.memory.add_read_byte_callback(self.interrupt_vectors, 0xfff0, 0xffff)
 
-    def reset(self):
-        log.critical("TODO: VDG reset")
+        self.reset()
 
-    def irq_trigger(self, call_cycles):
+    def reset(self):
+        self.vdg_mode = 0 # V0-V2
+        self.display_offset = 0x02 # F0-F6 in 512 Bytes pages: $0400 -> text screen
+
+    def get_state(self):
+        """
+        used for machine save-state
+        TODO: Only the VDG mode and display offset registers are emulated, yet.
+        """
+        return {
+            "vdg_mode": self.vdg_mode,
+            "display_offset": self.display_offset,
+        }
+
+    def set_state(self, state):
+        self.vdg_mode = state.get("vdg_mode", 0)
+        self.display_offset = state.get("display_offset", 0x02)
+
+    def get_display_address(self):
+        """
+        Start address of the video RAM.
+        """
+        return self.display_offset * 0x200
+
+    def irq_trigger(self, cycles):
 #        log.critical("%04x| SAM irq trigger called %i cycles to late",
-#            self.cpu.last_op_address, call_cycles - self.IRQ_CYCLES
+#            self.cpu.last_op_address, self.cpu.cycles - cycles
 #        )
         self.cpu.irq()
 
@@ -123,35 +147,49 @@ class SAM(object):
 
     #--------------------------------------------------------------------------
 
+    def _set_vdg_mode_bit(self, bit, address):
+        if address & 1:
+            self.vdg_mode |= 1 << bit
+        else:
+            self.vdg_mode &= ~(1 << bit)
+        log.debug("SAM VDG mode: %i", self.vdg_mode)
+
     def write_VDG_mode_register_v0(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write VDG mode register V0 $%02x to $%04x", value, address)
+        self._set_vdg_mode_bit(0, address)
 
     def write_VDG_mode_register_v1(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write VDG mode register V1 $%02x to $%04x", value, address)
+        self._set_vdg_mode_bit(1, address)
 
     def write_VDG_mode_register_v2(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write VDG mode register V2 $%02x to $%04x", value, address)
+        self._set_vdg_mode_bit(2, address)
+
+    def _set_display_offset_bit(self, bit, address):
+        if address & 1:
+            self.display_offset |= 1 << bit
+        else:
+            self.display_offset &= ~(1 << bit)
+        log.debug("SAM display offset: $%04x", self.get_display_address())
 
     def write_display_offset_F0(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F0 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(0, address)
 
     def write_display_offset_F1(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F1 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(1, address)
 
     def write_display_offset_F2(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F2 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(2, address)
 
     def write_display_offset_F3(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F3 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(3, address)
 
     def write_display_offset_F4(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F4 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(4, address)
 
     def write_display_offset_F5(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F5 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(5, address)
 
     def write_display_offset_F6(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write display_offset_F6 $%02x to $%04x", value, address)
+        self._set_display_offset_bit(6, address)
 
     def write_page_bit(self, cpu_cycles, op_address, address, value):
         log.debug("TODO: write page_bit $%02x to $%04x", value, address)
@@ -174,9 +212,6 @@ class SAM(object):
     def write_map0(self, cpu_cycles, op_address, address, value):
         log.debug("TODO: write map0 $%02x to $%04x", value, address)
 
-    def write_D64_dynamic_memory(self, cpu_cycles, op_address, address, value):
-        log.debug("TODO: write D64_dynamic_memory $%02x to $%04x", value, address)
-
 
 #------------------------------------------------------------------------------
 
@@ -72,12 +72,21 @@ class Dragon32Cfg(BaseConfig):
     # for unittests init:
     STARTUP_END_ADDR = 0xbbe5 # scan keyboard
 
+    # ROM wait loops, see: dragonpy/core/idle.py
+    IDLE_LOOP_ADDRESSES = (
+        0xbbe5, # %INCH% Scans keyboard
+    )
+
+    # BASIC interpreter: current line number (0xffff in direct mode)
+    # Same address on the CoCo, see: dragonpy/core/profiler.py
+    CURLIN_ADDR = 0x0068
+
     def __init__(self, cmd_args):
         super(Dragon32Cfg, self).__init__(cmd_args)
 
         self.machine_api = Dragon32API()
 
-        if self.verbosity and self.verbosity <= logging.ERROR:
+        if (self.verbosity and self.verbosity <= logging.ERROR) or self.mem_info_required:
             self.mem_info = get_dragon_meminfo()
 
         self.periphery_class = None# Dragon32Periphery
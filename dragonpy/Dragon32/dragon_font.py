@@ -24,7 +24,9 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import hashlib
 import math
+import os
 try:
     import tkinter # python 3
 except ImportError:
@@ -34,7 +36,8 @@ import logging
 
 log=logging.getLogger(__name__)
 
-from dragonpy.Dragon32.dragon_charmap import NORMAL, get_hex_color, COLORS, INVERTED
+from dragonpy.utils.cache_dir import get_cache_dir
+from dragonpy.Dragon32.dragon_charmap import NORMAL, get_hex_color, get_rgb_color, COLORS, INVERTED
 
 
 BACKGROUND_CHAR = "."
@@ -1255,7 +1258,7 @@ class TkImageFont(object):
         )
 
     def get_char(self, char, color):
-        log.critical("Generate char %s %s", repr(char), color)
+        log.debug("Generate char %s %s", repr(char), color)
         try:
             char_data = self.chars_dict[char]
         except KeyError:
@@ -1264,31 +1267,133 @@ class TkImageFont(object):
             return self.get_char(char="?", color=color)
 
         foreground, background = get_hex_color(color)
-        foreground = "#%s" % foreground
-        background = "#%s" % background
+        pixels = {
+            BACKGROUND_CHAR: " ".join(["#%s" % background] * self.scale_factor),
+            FOREGROUND_CHAR: " ".join(["#%s" % foreground] * self.scale_factor),
+        }
+
+        # Put all scaled pixel lines with one call:
+        lines = []
+        for line in char_data:
+            line = "{%s}" % " ".join(pixels[bit] for bit in line)
+            lines += [line] * self.scale_factor
 
         img = tkinter.PhotoImage(
             width=self.width_scaled,
             height=self.height_scaled
         )
+        img.put(" ".join(lines))
+        return img
+
+
+ATLAS_VERSION = 1 # Increase if the atlas file format changed
+ATLAS_COLUMNS = 16 # characters per atlas line
+
+
+def get_atlas_key(charmap, chars_dict, scale_factor):
+    """
+    Returns a hash of everything that changed the atlas content.
+    """
+    entries = []
+    for value in sorted(charmap):
+        char, color = charmap[value]
+        entries.append(repr((value, chars_dict.get(char), get_rgb_color(color))))
+    key = "|".join(["%i" % ATLAS_VERSION, "%i" % scale_factor] + entries)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def render_atlas_ppm(charmap, chars_dict, scale_factor):
+    """
+    Render the characters of all charmap values into one PPM (P6) image:
+    value 0-15 in the first character line, 16-31 in the second etc.
+    """
+    temp = chars_dict["X"]
+    width = len(temp[0]) * scale_factor
+    height = len(temp) * scale_factor
+
+    # The scaled pixel lines of every value:
+    glyph_lines = []
+    for value in range(len(charmap)):
+        char, color = charmap[value]
+        try:
+            char_data = chars_dict[char]
+        except KeyError:
+            char_data = chars_dict["?"]
+        foreground, background = get_rgb_color(color)
+        pixels = {
+            BACKGROUND_CHAR: bytes(bytearray(background) * scale_factor),
+            FOREGROUND_CHAR: bytes(bytearray(foreground) * scale_factor),
+        }
+        glyph_lines.append([b"".join(pixels[bit] for bit in line) for line in char_data])
 
-        # Fill the character pixels without padding
-        for y, line in enumerate(char_data):
-            for x, bit in enumerate(line):
-                if bit == BACKGROUND_CHAR:
-                    color = background
-                else:
-                    assert bit == FOREGROUND_CHAR
-                    color = foreground
+    lines = []
+    for start in range(0, len(glyph_lines), ATLAS_COLUMNS):
+        glyphs = glyph_lines[start:start + ATLAS_COLUMNS]
+        glyphs += [glyphs[0]] * (ATLAS_COLUMNS - len(glyphs)) # fill the last line
+        for glyph_line in zip(*glyphs):
+            lines += [b"".join(glyph_line)] * scale_factor
 
-                img.put(color, (x, y))
+    header = "P6\n%i %i\n255\n" % (width * ATLAS_COLUMNS, len(lines))
+    return header.encode("ascii") + b"".join(lines)
 
-        # resize the character
-        if self.scale_factor > 1:
-            img = img.zoom(self.scale_factor, self.scale_factor)
 
+def get_atlas_path(charmap, chars_dict, scale_factor, cache_dir=None):
+    """
+    Returns the path to the cached atlas PPM file, render it if not exists.
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    key = get_atlas_key(charmap, chars_dict, scale_factor)
+    path = os.path.join(cache_dir, "glyph_atlas_%ix_%s.ppm" % (scale_factor, key[:16]))
+    if os.path.isfile(path):
+        return path
+
+    log.critical("Render glyph atlas into %r", path)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    # Write to a temp file first, so a other process never reads a half written file:
+    temp_path = "%s.%i.tmp" % (path, os.getpid())
+    with open(temp_path, "wb") as f:
+        f.write(render_atlas_ppm(charmap, chars_dict, scale_factor))
+    os.rename(temp_path, path)
+    return path
+
+
+class TkGlyphAtlas(object):
+    """
+    Tkinter.PhotoImage() for every charmap value, copied from the atlas
+    file. So no character must be generated pixel by pixel.
+    """
+    def __init__(self, charmap, chars_dict, scale_factor, cache_dir=None):
+        temp = chars_dict["X"]
+        self.width_scaled = len(temp[0]) * scale_factor
+        self.height_scaled = len(temp) * scale_factor
+
+        path = get_atlas_path(charmap, chars_dict, scale_factor, cache_dir)
+        self.atlas = tkinter.PhotoImage(file=path)
+
+        self.images = {}
+        self.values = {} # (char, color) -> lowest charmap value
+        for value in sorted(charmap, reverse=True):
+            self.images[value] = self._copy(value)
+            self.values[charmap[value]] = value
+
+    def _copy(self, value):
+        row, column = divmod(value, ATLAS_COLUMNS)
+        x = column * self.width_scaled
+        y = row * self.height_scaled
+        img = tkinter.PhotoImage(width=self.width_scaled, height=self.height_scaled)
+        img.tk.call(img.name, "copy", self.atlas.name,
+            "-from", x, y, x + self.width_scaled, y + self.height_scaled,
+        )
         return img
 
+    def get_image(self, value):
+        return self.images[value]
+
+    def get_char_image(self, char, color):
+        return self.images[self.values[(char, color)]]
+
 
 class TestTkImageFont(object):
     CACHE = {}
@@ -54,6 +54,8 @@ class RuntimeCfg(object):
     max_delay = CPUSpeedLimitMixin.max_delay # maximum time.sleep() value per burst run
     inner_burst_op_count = CPU.inner_burst_op_count # How many ops calls, before next sync call
 
+    auto_tune = True # adjust the values above at runtime? see: dragonpy/core/autotune.py
+
     def __init(self):
         is_pypy = hasattr(sys, 'pypy_version_info')
         if is_pypy:
@@ -67,6 +69,15 @@ class RuntimeCfg(object):
         setattr(CPU, attr, value) # TODO: refactor!
         return object.__setattr__(self, attr, value)
 
+    def set_tuned_value(self, attr, value):
+        """
+        Used by the auto-tuner for every tuning step: Same as setting
+        the attribute, but without the critical log entry.
+        """
+        log.debug("Auto-tune RuntimeCfg %r to: %r", attr, value)
+        setattr(CPU, attr, value) # TODO: refactor!
+        return object.__setattr__(self, attr, value)
+
     def load(self):
         raise NotImplementedError("TODO!")
 
@@ -109,6 +120,20 @@ class BaseTkinterGUIConfig(object):
         )
         self.checkbutton_speedlimit.grid(row=row, column=0)
 
+        #
+        # Auto tune check button
+        #
+        self.check_value_auto_tune = tkinter.IntVar(
+            value=self.runtime_cfg.auto_tune
+        )
+        self.checkbutton_auto_tune = tkinter.Checkbutton(self.root,
+            text="auto tune", variable=self.check_value_auto_tune,
+            command=self.command_checkbutton_auto_tune
+        )
+        if self.gui.exact_replay:
+            self.checkbutton_auto_tune.config(state=tkinter.DISABLED)
+        self.checkbutton_auto_tune.grid(row=row + 1, column=0)
+
         #
         # Cycles/sec entry
         #
@@ -206,6 +231,10 @@ class BaseTkinterGUIConfig(object):
     def command_checkbutton_speedlimit(self, event=None):
         self.runtime_cfg.speedlimit = self.check_value_speedlimit.get()
 
+    def command_checkbutton_auto_tune(self, event=None):
+        self.runtime_cfg.auto_tune = self.check_value_auto_tune.get()
+        self.gui.auto_tuner.reset()
+
     def command_cycles_per_sec(self, event=None):
         """
         TODO: refactor: move code to CPU!
@@ -22,6 +22,7 @@ from dragonpy.Dragon32.keyboard_map import add_to_input_queue
 
 log=logging.getLogger(__name__)
 from dragonpy.Dragon32.MC6821_PIA import PIA
+from dragonpy.Dragon32.MC6847_headless import MC6847_HeadlessDisplay
 from dragonpy.Dragon32.MC6883_SAM import SAM
 from dragonpy.Dragon32.dragon_charmap import get_charmap_dict
 
@@ -38,7 +39,7 @@ class Dragon32PeripheryBase(object):
 
         self.kbd = 0xBF
         self.display = None
-        self.speaker = None  # Speaker()
+        self.speaker = None  # Speaker(self.cpu.scheduler)
         self.cassette = None  # Cassette()
 
         self.sam = SAM(cfg, cpu, memory)
@@ -54,27 +55,67 @@ class Dragon32PeripheryBase(object):
         self.pia.reset()
         self.pia.internal_reset()
 
+    def get_state(self):
+        """
+        used for machine save-state
+        """
+        return {
+            "kbd": self.kbd,
+            "sam": self.sam.get_state(),
+            "pia": self.pia.get_state(),
+        }
+
+    def set_state(self, state):
+        self.kbd = state["kbd"]
+        self.sam.set_state(state["sam"])
+        self.pia.set_state(state["pia"])
+
     def no_dos_rom(self, cpu_cycles, op_address, address):
         log.error("%04x| TODO: DOS ROM requested. Send 0x00 back", op_address)
         return 0x00
 
-#     def update(self, cpu_cycles):
-#         #        log.critical("update pygame")
-#         if not self.running:
-#             return
-#         if self.speaker:
-#             self.speaker.update(cpu_cycles)
-
 
 class Dragon32Periphery(Dragon32PeripheryBase):
     def __init__(self, cfg, cpu, memory, display_callback, user_input_queue):
         super(Dragon32Periphery, self).__init__(cfg, cpu, memory, user_input_queue)
 
         # redirect writes to display RAM area 0x0400-0x0600 into display_queue:
+        self.display_callback = display_callback
         self.memory.add_write_byte_middleware(
             display_callback, 0x0400, 0x0600
         )
 
+    def set_state(self, state):
+        super(Dragon32Periphery, self).set_state(state)
+
+        # Redraw the display from the restored display RAM:
+        for address, value in self.memory.iter_bytes(0x0400, 0x0600):
+            self.display_callback(self.cpu.cycles, address, address, value)
+
+
+class Dragon32PeripheryHeadless(Dragon32PeripheryBase):
+    """
+    Without GUI and without a display write middleware: The screen is
+    read from the video RAM on demand via self.display
+    """
+    def __init__(self, cfg, cpu, memory, display_callback, user_input_queue):
+        super(Dragon32PeripheryHeadless, self).__init__(cfg, cpu, memory, user_input_queue)
+        self.display = MC6847_HeadlessDisplay(memory, self.sam, self.pia)
+
+    def setUp(self):
+        self.pia.internal_reset()
+        self.user_input_queue.queue.clear()
+
+    def add_to_input_queue(self, txt):
+        assert "\n" not in txt, "remove all \\n in unittests! Use only \\r as Enter!"
+        add_to_input_queue(self.user_input_queue, txt)
+
+    def get_screen_lines(self):
+        return self.display.get_lines()
+
+    def striped_output(self):
+        return self.display.striped_output()
+
 
 class Dragon32PeripheryUnittest(Dragon32PeripheryBase):
     def __init__(self, cfg, cpu, memory, display_callback, user_input_queue):
@@ -28,21 +28,28 @@ except ImportError:
 class Speaker:
 
     CPU_CYCLES_PER_SAMPLE = 60
-    CHECK_INTERVAL = 1000
+    CHECK_INTERVAL = 1000 # play the buffer if the speaker was not toggled in this CPU cycles
 
-    def __init__(self):
+    def __init__(self, scheduler):
         pygame.mixer.pre_init(11025, -16, 1)
         pygame.init()
+        self.scheduler = scheduler
+        self.play_event = None
         self.reset()
 
     def toggle(self, cycle):
         if self.last_toggle is not None:
-            l = (cycle - self.last_toggle) / Speaker.CPU_CYCLES_PER_SAMPLE
+            l = (cycle - self.last_toggle) // Speaker.CPU_CYCLES_PER_SAMPLE
             self.buffer.extend([0, 26000] if self.polarity else [0, -2600])
             self.buffer.extend((l - 2) * [16384] if self.polarity else [-16384])
             self.polarity = not self.polarity
         self.last_toggle = cycle
 
+        if self.play_event is None:
+            self.play_event = self.scheduler.add_event(
+                cycle + self.CHECK_INTERVAL, self.play_event_callback
+            )
+
     def reset(self):
         self.last_toggle = None
         self.buffer = []
@@ -54,6 +61,15 @@ class Speaker:
         sound.play()
         self.reset()
 
-    def update(self, cycle):
-        if self.buffer and (cycle - self.last_toggle) > self.CHECK_INTERVAL:
-            self.play()
+    def play_event_callback(self, cycles):
+        """
+        Called from the scheduler CHECK_INTERVAL cycles after the first toggle:
+        Play the buffer, if the speaker was not toggled in the meantime.
+        """
+        next_check = self.last_toggle + self.CHECK_INTERVAL
+        if next_check > cycles:
+            self.scheduler.reschedule_event(self.play_event, next_check)
+        else:
+            self.play_event = None
+            if self.buffer:
+                self.play()
@@ -57,7 +57,7 @@ class Dragon64Cfg(Dragon32Cfg):
     def __init__(self, cmd_args):
         super(Dragon64Cfg, self).__init__(cmd_args)
 
-        if self.verbosity <= logging.ERROR:
+        if self.verbosity <= logging.ERROR or self.mem_info_required:
             self.mem_info = get_dragon_meminfo()
 
         self.periphery_class = None# Dragon32Periphery
@@ -35,9 +35,120 @@ from dragonlib.utils.logging_utils import log_hexlist
 log = logging.getLogger(__name__)
 
 
+# The 64KB address space is split into 256 pages of 256 Bytes.
+# Every page has a entry in the page tables, that marks how a access
+# to this page must be handled:
+PAGE_SHIFT = 8
+PAGE_COUNT = 0x100
+RAM_PAGE = 0 # plain RAM: read/write directly from/into the backing array
+ROM_PAGE = 1 # plain ROM: read directly, writes are ignored
+IO_PAGE = 2 # callbacks/middlewares on this page: use the slow path
+
+
+def chain_middlewares(middlewares):
+    """
+    Returns one middleware that calls all given middlewares in turn.
+    """
+    def middleware_chain(cpu_cycles, op_address, address, value):
+        for middleware in middlewares:
+            value = middleware(cpu_cycles, op_address, address, value)
+        return value
+    return middleware_chain
+
+
+class AddressRangeMap(dict):
+    """
+    Registry of callbacks/middlewares for address ranges.
+
+    Only the ranges are stored, indexed by their 256 Bytes pages. The function
+    for a address is resolved on the first access and cached in the dict
+    itself, so a lookup is a plain dict access. Addresses without a function
+    resolve to None.
+
+    A callback map resolves to the last added callback. A middleware map
+    (chain=True) resolves to a chain of all middlewares, in the order in
+    which they were added.
+    """
+    def __init__(self, chain=False):
+        super(AddressRangeMap, self).__init__()
+        self.chain = chain
+        self.ranges = [] # (start_addr, end_addr, func) in order of registration
+        self._page_ranges = {}
+
+    @property
+    def pages(self):
+        """ all pages with at least one range """
+        return list(self._page_ranges.keys())
+
+    def _update(self):
+        self.clear() # clear the cached lookups
+        self._page_ranges = {}
+        for address_range in self.ranges:
+            start_addr, end_addr, func = address_range
+            for page in xrange(start_addr >> PAGE_SHIFT, (end_addr >> PAGE_SHIFT) + 1):
+                self._page_ranges.setdefault(page, []).append(address_range)
+
+    def add(self, func, start_addr, end_addr):
+        self.ranges.append((start_addr, end_addr, func))
+        self._update()
+
+    def remove(self, func, start_addr=None, end_addr=None):
+        """
+        Remove the function from the given address range, or from
+        all ranges, if no address is given.
+        """
+        if start_addr is not None and end_addr is None:
+            end_addr = start_addr
+
+        ranges = []
+        removed = False
+        for address_range in self.ranges:
+            start, end, f = address_range
+            if f != func or (start_addr is not None and (end < start_addr or start > end_addr)):
+                ranges.append(address_range)
+                continue
+
+            removed = True
+            if start_addr is not None:
+                # Keep the parts outside of the removed range:
+                if start < start_addr:
+                    ranges.append((start, start_addr - 1, f))
+                if end > end_addr:
+                    ranges.append((end_addr + 1, end, f))
+
+        if not removed:
+            raise KeyError("%r is not registered for the given address range" % func)
+
+        self.ranges = ranges
+        self._update()
+
+    def __missing__(self, address):
+        funcs = [
+            func
+            for start_addr, end_addr, func in self._page_ranges.get(address >> PAGE_SHIFT, ())
+            if start_addr <= address <= end_addr
+        ]
+        if not funcs:
+            func = None
+        elif not self.chain:
+            func = funcs[-1]
+        elif len(funcs) == 1:
+            func = funcs[0]
+        else:
+            func = chain_middlewares(funcs)
+
+        self[address] = func
+        return func
+
+
 class Memory(object):
+    # Mark the pages that are changed by RAM writes?
+    # see: self.get_dirty_pages() and self.get_region_generation()
+    track_dirty_pages = True
+
     def __init__(self, cfg, read_bus_request_queue=None, read_bus_response_queue=None, write_bus_queue=None):
         self.cfg = cfg
+        self._cpu = None # set via self.cpu property
         self.read_bus_request_queue = read_bus_request_queue
         self.read_bus_response_queue = read_bus_response_queue
         self.write_bus_queue = write_bus_queue
@@ -68,22 +179,50 @@ class Memory(object):
 
         # array consumes also less RAM than lists and it's a little bit faster:
         self._mem = array.array("B", [0x00] * self.INTERNAL_SIZE) # unsigned char
+        # Used for bulk transfers, see: self.read_block() / self.write_block()
+        self._mem_view = memoryview(self._mem)
+
+        # Dirty page tracking: A write into RAM only sets the flag of the
+        # page. The flags are collected lazily into the generation numbers
+        # of the pages, so every consumer can track the changes independently.
+        self._dirty_pages = bytearray(PAGE_COUNT + 1)
+        self._clean_pages = bytes(bytearray(PAGE_COUNT + 1))
+        self._generation = 0
+        self._page_generations = array.array("L", [0] * PAGE_COUNT)
+        self._dirty_pages_generation = 0 # last reset of get_dirty_pages()
 
         if cfg and cfg.rom_cfg:
             for romfile in cfg.rom_cfg:
                 self.load_file(romfile)
 
-        self._read_byte_callbacks = {}
-        self._read_word_callbacks = {}
-        self._write_byte_callbacks = {}
-        self._write_word_callbacks = {}
+        self._read_byte_callbacks = AddressRangeMap()
+        self._read_word_callbacks = AddressRangeMap()
+        self._write_byte_callbacks = AddressRangeMap()
+        self._write_word_callbacks = AddressRangeMap()
 
         # Memory middlewares are function that called on memory read or write
         # the function can change the value that is read/write
-        #
+        # Many middlewares can be used for the same address (e.g.: display
+        # and a debugger watchpoint)
+        self._read_byte_middleware = AddressRangeMap(chain=True)
+        self._write_byte_middleware = AddressRangeMap(chain=True)
+        self._read_word_middleware = AddressRangeMap(chain=True)
+        self._write_word_middleware = AddressRangeMap(chain=True)
+
+        # The page tables contains one entry per 256 Bytes page. The last
+        # entry is for addresses outside the 64KB (e.g.: word access at $ffff)
+        # and is always handled by the slow path.
+        self._read_byte_pages = bytearray(PAGE_COUNT + 1)
+        self._read_word_pages = bytearray(PAGE_COUNT + 1)
+        self._write_byte_pages = bytearray(PAGE_COUNT + 1)
+        self._write_word_pages = bytearray(PAGE_COUNT + 1)
+        self._rebuild_page_tables()
+
+        # Use specialized read/write functions without debug checks?
+        # They will be created if the CPU is set, see: self._build_accessors()
+        self.debug = getattr(cfg, "memory_debug", True)
+
         # init read/write byte middlewares:
-        self._read_byte_middleware = {}
-        self._write_byte_middleware = {}
         for addr_range, functions in list(cfg.memory_byte_middlewares.items()):
             start_addr, end_addr = addr_range
             read_func, write_func = functions
@@ -95,8 +234,6 @@ class Memory(object):
                 self.add_write_byte_middleware(write_func, start_addr, end_addr)
 
         # init read/write word middlewares:
-        self._read_word_middleware = {}
-        self._write_word_middleware = {}
         for addr_range, functions in list(cfg.memory_word_middlewares.items()):
             start_addr, end_addr = addr_range
             read_func, write_func = functions
@@ -127,40 +264,237 @@ class Memory(object):
 
     #---------------------------------------------------------------------------
 
-    def _map_address_range(self, callbacks_dict, callback_func, start_addr, end_addr=None):
-        if end_addr is None:
-            callbacks_dict[start_addr] = callback_func
+    @property
+    def cpu(self):
+        return self._cpu
+
+    @cpu.setter
+    def cpu(self, cpu):
+        self._cpu = cpu
+        self._build_accessors()
+
+    def _build_accessors(self):
+        """
+        Create read/write functions that are specialized for the current
+        memory map and bind them to this instance. They replace the generic
+        methods below.
+
+        The closures hold everything they need in local variables and leave
+        out the debug checks and all branches for not used features,
+        e.g.: no write middleware -> no middleware lookup.
+        The 'slow' cases (e.g.: callbacks/middlewares, outside of the 64KB)
+        are redirected to the generic methods.
+
+        Must be called again, if callbacks/middlewares are added.
+        """
+        for name in ("read_byte", "read_word", "write_byte", "write_word"):
+            # Remove old closures -> the generic methods are used
+            self.__dict__.pop(name, None)
+
+        cpu = self._cpu
+        if cpu is None or self.debug:
+            # Use the generic methods with all debug checks
+            return
+
+        mem = self._mem
+        read_byte_pages = self._read_byte_pages
+        read_word_pages = self._read_word_pages
+        write_byte_pages = self._write_byte_pages
+        write_word_pages = self._write_word_pages
+
+        get_read_byte_callback = self._read_byte_callbacks.__getitem__
+        get_read_word_callback = self._read_word_callbacks.__getitem__
+        get_write_byte_callback = self._write_byte_callbacks.__getitem__
+
+        read_byte_io = self._read_byte_io
+        write_byte_io = self._write_byte_io
+        write_word_io = self._write_word_io
+        write_into_rom = self._write_into_rom
+
+        page_shift = PAGE_SHIFT
+        rom_page = ROM_PAGE
+        if self.track_dirty_pages:
+            dirty_pages = self._dirty_pages
+        else:
+            dirty_pages = bytearray(PAGE_COUNT + 1) # not collected
+
+        if self._read_byte_middleware.ranges:
+            def read_byte(address):
+                cpu.cycles += 1
+                if read_byte_pages[address >> page_shift]:
+                    return read_byte_io(address)
+                return mem[address]
         else:
-            for addr in xrange(start_addr, end_addr + 1):
-                callbacks_dict[addr] = callback_func
+            def read_byte(address):
+                cpu.cycles += 1
+                if read_byte_pages[address >> page_shift]:
+                    callback = get_read_byte_callback(address)
+                    if callback is None:
+                        return read_byte_io(address)
+                    return callback(cpu.cycles, cpu.last_op_address, address)
+                return mem[address]
+
+        def read_word(address):
+            if read_word_pages[address >> page_shift]:
+                callback = get_read_word_callback(address)
+                if callback is not None:
+                    return callback(cpu.cycles, cpu.last_op_address, address)
+            if read_byte_pages[address >> page_shift] or read_byte_pages[(address + 1) >> page_shift]:
+                # 6809 is Big-Endian
+                return (read_byte(address) << 8) + read_byte(address + 1)
+            cpu.cycles += 2
+            return (mem[address] << 8) + mem[address + 1]
+
+        if self._write_byte_middleware.ranges:
+            def write_byte(address, value):
+                cpu.cycles += 1
+                page = address >> page_shift
+                page_type = write_byte_pages[page]
+                if not page_type:
+                    mem[address] = value
+                    dirty_pages[page] = 1
+                elif page_type == rom_page:
+                    write_into_rom(address)
+                else:
+                    return write_byte_io(address, value)
+        else:
+            def write_byte(address, value):
+                cpu.cycles += 1
+                page = address >> page_shift
+                page_type = write_byte_pages[page]
+                if not page_type:
+                    mem[address] = value
+                    dirty_pages[page] = 1
+                elif page_type == rom_page:
+                    write_into_rom(address)
+                else:
+                    callback = get_write_byte_callback(address)
+                    if callback is None:
+                        return write_byte_io(address, value)
+                    return callback(cpu.cycles, cpu.last_op_address, address, value)
+
+        def write_word(address, word):
+            if write_word_pages[address >> page_shift]:
+                return write_word_io(address, word)
+            # 6809 is Big-Endian
+            write_byte(address, word >> 8)
+            write_byte(address + 1, word & 0xff)
+
+        self.read_byte = read_byte
+        self.read_word = read_word
+        self.write_byte = write_byte
+        self.write_word = write_word
+
+    #---------------------------------------------------------------------------
+
+    def _rebuild_page_tables(self):
+        """
+        (Re-)Create all page tables from the ROM area and the
+        registered callbacks/middlewares.
+        """
+        for page_table in (self._read_byte_pages, self._read_word_pages, self._write_byte_pages, self._write_word_pages):
+            for page in xrange(PAGE_COUNT):
+                page_table[page] = RAM_PAGE
+            page_table[PAGE_COUNT] = IO_PAGE # outside the 64KB
+
+        # Mark pages that are completely in ROM. A page that is only
+        # partially ROM will be handled by the slow path.
+        for page in xrange(PAGE_COUNT):
+            page_start = page << PAGE_SHIFT
+            page_end = page_start + (1 << PAGE_SHIFT) - 1
+            if self.cfg.ROM_START <= page_start and page_end <= self.cfg.ROM_END:
+                self._write_byte_pages[page] = ROM_PAGE
+            elif self.cfg.ROM_START <= page_end and page_start <= self.cfg.ROM_END:
+                self._write_byte_pages[page] = IO_PAGE
+
+        for callbacks_dict, page_table in (
+                    (self._read_byte_callbacks, self._read_byte_pages),
+                    (self._read_byte_middleware, self._read_byte_pages),
+                    (self._read_word_callbacks, self._read_word_pages),
+                    (self._read_word_middleware, self._read_word_pages),
+                    (self._write_byte_callbacks, self._write_byte_pages),
+                    (self._write_byte_middleware, self._write_byte_pages),
+                    (self._write_word_callbacks, self._write_word_pages),
+                    (self._write_word_middleware, self._write_word_pages),
+                ):
+            for page in callbacks_dict.pages:
+                page_table[page] = IO_PAGE
+
+    def _map_address_range(self, callbacks_dict, page_table, callback_func, start_addr, end_addr=None):
+        if end_addr is None:
+            end_addr = start_addr
+
+        callbacks_dict.add(callback_func, start_addr, end_addr)
+
+        # Accesses to these pages must be go through the slow path:
+        for page in xrange(start_addr >> PAGE_SHIFT, (end_addr >> PAGE_SHIFT) + 1):
+            page_table[page] = IO_PAGE
+
+        # Maybe a new kind of callback/middleware is used:
+        self._build_accessors()
+
+    def _unmap_address_range(self, callbacks_dict, callback_func, start_addr=None, end_addr=None):
+        callbacks_dict.remove(callback_func, start_addr, end_addr)
+
+        # Maybe some pages are plain RAM/ROM pages again:
+        self._rebuild_page_tables()
+        self._build_accessors()
 
     #---------------------------------------------------------------------------
 
     def add_read_byte_callback(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._read_byte_callbacks, callback_func, start_addr, end_addr)
+        self._map_address_range(self._read_byte_callbacks, self._read_byte_pages, callback_func, start_addr, end_addr)
 
     def add_read_word_callback(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._read_word_callbacks, callback_func, start_addr, end_addr)
+        self._map_address_range(self._read_word_callbacks, self._read_word_pages, callback_func, start_addr, end_addr)
 
     def add_write_byte_callback(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._write_byte_callbacks, callback_func, start_addr, end_addr)
+        self._map_address_range(self._write_byte_callbacks, self._write_byte_pages, callback_func, start_addr, end_addr)
 
     def add_write_word_callback(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._write_word_callbacks, callback_func, start_addr, end_addr)
+        self._map_address_range(self._write_word_callbacks, self._write_word_pages, callback_func, start_addr, end_addr)
 
     #---------------------------------------------------------------------------
 
     def add_read_byte_middleware(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._read_byte_middleware, callback_func, start_addr, end_addr)
+        self._map_address_range(self._read_byte_middleware, self._read_byte_pages, callback_func, start_addr, end_addr)
 
     def add_write_byte_middleware(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._write_byte_middleware, callback_func, start_addr, end_addr)
+        self._map_address_range(self._write_byte_middleware, self._write_byte_pages, callback_func, start_addr, end_addr)
 
     def add_read_word_middleware(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._read_word_middleware, callback_func, start_addr, end_addr)
+        self._map_address_range(self._read_word_middleware, self._read_word_pages, callback_func, start_addr, end_addr)
 
     def add_write_word_middleware(self, callback_func, start_addr, end_addr=None):
-        self._map_address_range(self._write_word_middleware, callback_func, start_addr, end_addr)
+        self._map_address_range(self._write_word_middleware, self._write_word_pages, callback_func, start_addr, end_addr)
+
+    #---------------------------------------------------------------------------
+    # Remove callbacks/middlewares at runtime.
+    # Without a address the function will be removed from all address ranges.
+
+    def remove_read_byte_callback(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._read_byte_callbacks, callback_func, start_addr, end_addr)
+
+    def remove_read_word_callback(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._read_word_callbacks, callback_func, start_addr, end_addr)
+
+    def remove_write_byte_callback(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._write_byte_callbacks, callback_func, start_addr, end_addr)
+
+    def remove_write_word_callback(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._write_word_callbacks, callback_func, start_addr, end_addr)
+
+    def remove_read_byte_middleware(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._read_byte_middleware, callback_func, start_addr, end_addr)
+
+    def remove_write_byte_middleware(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._write_byte_middleware, callback_func, start_addr, end_addr)
+
+    def remove_read_word_middleware(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._read_word_middleware, callback_func, start_addr, end_addr)
+
+    def remove_write_word_middleware(self, callback_func, start_addr=None, end_addr=None):
+        self._unmap_address_range(self._write_word_middleware, callback_func, start_addr, end_addr)
 
     #---------------------------------------------------------------------------
 
@@ -172,14 +506,16 @@ class Memory(object):
         log.debug("ROM load at $%04x: %s", address,
             ", ".join(["$%02x" % i for i in data])
         )
-        for ea, datum in enumerate(data, address):
-            try:
-                self._mem[ea] = datum
-            except OverflowError as err:
-                msg="%s - datum=$%x ea=$%04x (load address was: $%04x - data length: %iBytes)" % (
-                    err, datum, ea, address, len(data)
-                )
-                raise OverflowError(msg)
+        try:
+            self.write_block(address, data)
+        except ValueError as err:
+            for ea, datum in enumerate(data, address):
+                if not 0x00 <= datum <= 0xff:
+                    msg="%s - datum=$%x ea=$%04x (load address was: $%04x - data length: %iBytes)" % (
+                        err, datum, ea, address, len(data)
+                    )
+                    raise OverflowError(msg)
+            raise
 
     def load_file(self, romfile):
         data = romfile.get_data()
@@ -191,18 +527,29 @@ class Memory(object):
     def read_byte(self, address):
         self.cpu.cycles += 1
 
-        if address in self._read_byte_callbacks:
-            byte = self._read_byte_callbacks[address](
+        if self._read_byte_pages[address >> PAGE_SHIFT]:
+            return self._read_byte_io(address)
+
+        # plain RAM/ROM page
+        return self._mem[address]
+
+    def _read_byte_io(self, address):
+        """
+        slow path for pages with read callbacks/middlewares
+        """
+        callback = self._read_byte_callbacks[address]
+        if callback is not None:
+            byte = callback(
                 self.cpu.cycles, self.cpu.last_op_address, address
             )
             assert byte is not None, "Error: read byte callback for $%04x func %r has return None!" % (
-                address, self._read_byte_callbacks[address].__name__
+                address, callback.__name__
             )
             return byte
 
         try:
             byte = self._mem[address]
-        except KeyError:
+        except (IndexError, KeyError):
             msg = "reading outside memory area (PC:$%x)" % self.cpu.program_counter.value
             self.cfg.mem_info(address, msg)
             msg2 = "%s: $%x" % (msg, address)
@@ -210,12 +557,13 @@ class Memory(object):
             # raise RuntimeError(msg2)
             byte = 0x0
 
-        if address in self._read_byte_middleware:
-            byte = self._read_byte_middleware[address](
+        middleware = self._read_byte_middleware[address]
+        if middleware is not None:
+            byte = middleware(
                 self.cpu.cycles, self.cpu.last_op_address, address, byte
             )
             assert byte is not None, "Error: read byte middleware for $%04x func %r has return None!" % (
-                address, self._read_byte_middleware[address].__name__
+                address, middleware.__name__
             )
 
 #        log.log(5, "%04x| (%i) read byte $%x from $%x",
@@ -225,14 +573,16 @@ class Memory(object):
         return byte
 
     def read_word(self, address):
-        if address in self._read_word_callbacks:
-            word = self._read_word_callbacks[address](
-                self.cpu.cycles, self.cpu.last_op_address, address
-            )
-            assert word is not None, "Error: read word callback for $%04x func %r has return None!" % (
-                address, self._read_word_callbacks[address].__name__
-            )
-            return word
+        if self._read_word_pages[address >> PAGE_SHIFT]:
+            callback = self._read_word_callbacks[address]
+            if callback is not None:
+                word = callback(
+                    self.cpu.cycles, self.cpu.last_op_address, address
+                )
+                assert word is not None, "Error: read word callback for $%04x func %r has return None!" % (
+                    address, callback.__name__
+                )
+                return word
 
         # 6809 is Big-Endian
         return (self.read_byte(address) << 8) + self.read_byte(address + 1)
@@ -249,26 +599,39 @@ class Memory(object):
 #             value = value & 0xff
 #             log.error(" ^^^^ wrap around to $%x", value)
 
-        if address in self._write_byte_middleware:
-            value = self._write_byte_middleware[address](
+        page = address >> PAGE_SHIFT
+        page_type = self._write_byte_pages[page]
+        if page_type == RAM_PAGE:
+            self._mem[address] = value
+            if self.track_dirty_pages:
+                self._dirty_pages[page] = 1
+        elif page_type == ROM_PAGE:
+            self._write_into_rom(address)
+        else:
+            return self._write_byte_io(address, value)
+
+    def _write_byte_io(self, address, value):
+        """
+        slow path for pages with write callbacks/middlewares
+        or pages that are only partially ROM.
+        """
+        middleware = self._write_byte_middleware[address]
+        if middleware is not None:
+            value = middleware(
                 self.cpu.cycles, self.cpu.last_op_address, address, value
             )
             assert value is not None, "Error: write byte middleware for $%04x func %r has return None!" % (
-                address, self._write_byte_middleware[address].__name__
+                address, middleware.__name__
             )
 
-        if address in self._write_byte_callbacks:
-            return self._write_byte_callbacks[address](
+        callback = self._write_byte_callbacks[address]
+        if callback is not None:
+            return callback(
                 self.cpu.cycles, self.cpu.last_op_address, address, value
             )
 
         if self.cfg.ROM_START <= address <= self.cfg.ROM_END:
-            msg = "%04x| writing into ROM at $%04x ignored." % (
-                self.cpu.program_counter.value, address
-            )
-            self.cfg.mem_info(address, msg)
-            msg2 = "%s: $%x" % (msg, address)
-            log.critical(msg2)
+            self._write_into_rom(address)
             return
 
         try:
@@ -281,21 +644,45 @@ class Memory(object):
             msg2 = "%s: $%x" % (msg, address)
             log.warning(msg2)
 #             raise RuntimeError(msg2)
+        else:
+            if self.track_dirty_pages:
+                self._dirty_pages[address >> PAGE_SHIFT] = 1
+
+    def _write_into_rom(self, address):
+        msg = "%04x| writing into ROM at $%04x ignored." % (
+            self.cpu.program_counter.value, address
+        )
+        self.cfg.mem_info(address, msg)
+        msg2 = "%s: $%x" % (msg, address)
+        log.critical(msg2)
 
     def write_word(self, address, word):
         assert word >= 0, "Write negative word hex:%04x dez:%i to $%04x" % (word, word, address)
         assert word <= 0xffff, "Write out of range word hex:%04x dez:%i to $%04x" % (word, word, address)
 
-        if address in self._write_word_middleware:
-            word = self._write_word_middleware[address](
+        if self._write_word_pages[address >> PAGE_SHIFT]:
+            return self._write_word_io(address, word)
+
+        # 6809 is Big-Endian
+        self.write_byte(address, word >> 8)
+        self.write_byte(address + 1, word & 0xff)
+
+    def _write_word_io(self, address, word):
+        """
+        slow path for pages with write word callbacks/middlewares
+        """
+        middleware = self._write_word_middleware[address]
+        if middleware is not None:
+            word = middleware(
                 self.cpu.cycles, self.cpu.last_op_address, address, word
             )
             assert word is not None, "Error: write word middleware for $%04x func %r has return None!" % (
-                address, self._write_word_middleware[address].__name__
+                address, middleware.__name__
             )
 
-        if address in self._write_word_callbacks:
-            return self._write_word_callbacks[address](
+        callback = self._write_word_callbacks[address]
+        if callback is not None:
+            return callback(
                 self.cpu.cycles, self.cpu.last_op_address, address, word
             )
 
@@ -305,15 +692,121 @@ class Memory(object):
 
     #---------------------------------------------------------------------------
 
+    def read_block(self, start, end):
+        """
+        Returns the memory $start-$end (end is excluded) as a memoryview
+        of the backing store.
+        No CPU cycles are counted and no callbacks/middlewares are called.
+        """
+        return self._mem_view[start:end]
+
+    def write_block(self, start, data):
+        """
+        Write the bytes of data into the memory starting at $start.
+        No CPU cycles are counted and no callbacks/middlewares are called.
+        ROM areas are not protected!
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytearray(data) # raise ValueError if a value is not a byte
+        end = start + len(data)
+        if end > self.INTERNAL_SIZE:
+            raise ValueError("Block $%04x-$%04x is outside memory area!" % (start, end - 1))
+        self._mem_view[start:end] = data
+        if self.track_dirty_pages and end > start:
+            for page in xrange(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+                self._dirty_pages[page] = 1
+
+    def find(self, pattern, start=0x0000, end=None):
+        """
+        Returns the address of the first match of the byte pattern
+        in $start-$end or -1 if not found.
+        """
+        if end is None:
+            end = self.INTERNAL_SIZE
+        if not isinstance(pattern, (bytes, bytearray)):
+            pattern = bytearray(pattern)
+        pos = self.read_block(start, end).tobytes().find(pattern)
+        if pos == -1:
+            return -1
+        return start + pos
+
+    def fill(self, start, end, value):
+        """
+        Fill $start-$end (end is excluded) with the given byte value.
+        """
+        self.write_block(start, bytearray([value]) * (end - start))
+
+    def _collect_dirty_pages(self):
+        """
+        Transfer the dirty flags into the page generations.
+        Returns the current generation number.
+        """
+        dirty_pages = self._dirty_pages
+        page = dirty_pages.find(b"\x01", 0, PAGE_COUNT)
+        if page != -1:
+            self._generation += 1
+            generation = self._generation
+            page_generations = self._page_generations
+            while page != -1:
+                page_generations[page] = generation
+                page = dirty_pages.find(b"\x01", page + 1, PAGE_COUNT)
+            dirty_pages[:] = self._clean_pages # clear in place: used in the closures!
+        return self._generation
+
+    @property
+    def generation(self):
+        """
+        The current generation number. It's increased if memory was changed
+        since the last call.
+        """
+        return self._collect_dirty_pages()
+
+    def get_changed_pages(self, generation):
+        """
+        Returns the numbers of all 256 Bytes pages that are changed after
+        the given generation (see: self.generation)
+        """
+        if self._collect_dirty_pages() <= generation:
+            return []
+        return [
+            page
+            for page, page_generation in enumerate(self._page_generations)
+            if page_generation > generation
+        ]
+
+    def get_dirty_pages(self, reset=True):
+        """
+        Returns the numbers of all 256 Bytes pages that are changed since
+        the last reset. Pages written by CPU RAM writes and by bulk transfers
+        are tracked. Writes that are handled by write callbacks are not
+        tracked (the callback owns the data).
+        """
+        pages = self.get_changed_pages(self._dirty_pages_generation)
+        if reset:
+            self._dirty_pages_generation = self._generation
+        return pages
+
+    def get_region_generation(self, start, end):
+        """
+        Returns the generation of the last change in $start-$end (end is excluded).
+        Compare it with a previous value to see if the region is changed.
+        A empty region (end <= start) is never changed: generation 0
+        """
+        if end <= start:
+            return 0
+        self._collect_dirty_pages()
+        return max(self._page_generations[start >> PAGE_SHIFT:((end - 1) >> PAGE_SHIFT) + 1])
+
+    #---------------------------------------------------------------------------
+
     def get(self, start, end):
         """
         used in unittests
         """
-        return [self.read_byte(addr) for addr in xrange(start, end)]
+        return list(self.read_block(start, end))
 
     def iter_bytes(self, start, end):
-        for addr in xrange(start, end):
-            yield addr, self.read_byte(addr)
+        return enumerate(self.read_block(start, end), start)
 
     def get_dump(self, start, end):
         dump_lines = []
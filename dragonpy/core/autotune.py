@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Closed-loop auto-tuner for the CPU burst settings of the Tkinter GUI.
+
+    The Tk event loop is blocked while the CPU runs a burst. The tuner
+    measures every BaseTkinterGUI.cpu_interval() call and adjusts the
+    RuntimeCfg values every TUNE_INTERVAL seconds:
+
+    * max_run_time: scaled, so that the longest CPU run in the last
+      interval takes RUN_SHARE of the target latency.
+    * max_delay: the speed limit sleep blocks the event loop, too:
+      It gets the rest of the target latency.
+    * inner_burst_op_count: hill climbing on the executed cycles per
+      busy second. A step that makes it slower is reverted. Without a
+      clear difference the value is held and probed again later.
+    * min_burst_count / max_burst_count: bounds for the outer burst
+      count, so that even one run with max_burst_count stays in the
+      target latency.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+
+TARGET_LATENCY = 0.016 # max. time between two Tk event loop turns (~60 fps)
+TUNE_INTERVAL = 0.5 # seconds between two tuning decisions
+
+
+def clamp(value, min_value, max_value):
+    """
+    >>> clamp(5, 1, 10), clamp(0, 1, 10), clamp(11, 1, 10)
+    (5, 1, 10)
+    """
+    return max(min_value, min(value, max_value))
+
+
+def quantize(value, step=0.0005):
+    """
+    Round the times, to avoid setting a new value on every decision.
+
+    >>> quantize(0.01234)
+    0.0125
+    """
+    return round(round(value / step) * step, 6)
+
+
+class BurstAutoTuner(object):
+    RUN_SHARE = 0.75 # Part of the target latency for the CPU run, the rest for the speed limit sleep
+    MIN_RUN_TIME = 0.002
+    MIN_INNER_BURST_OP_COUNT = 25
+    MAX_INNER_BURST_OP_COUNT = 1600
+    INNER_STEP = 1.25 # factor for one hill climbing step
+    NOISE = 0.02 # cycles/sec changes below 2% are measuring noise
+    HOLD_DECISIONS = 10 # decisions without a inner burst count probe
+    OUTER_RESOLUTION = 10 # min. outer bursts per CPU run
+
+    def __init__(self, runtime_cfg, target_latency=TARGET_LATENCY, interval=TUNE_INTERVAL):
+        self.runtime_cfg = runtime_cfg
+        self.target_latency = target_latency
+        self.interval = interval
+
+        self.direction = 1 # hill climbing direction of inner_burst_op_count
+        self.last_cycles_per_sec = None
+        self.hold = 0
+        self.decisions = 0
+        self.status = "auto-tune: measuring..."
+        self.reset()
+
+    def reset(self):
+        """
+        Start a new measure interval, e.g.: after pause or turbo mode.
+        """
+        self.window_start = None
+        self.run_count = 0
+        self.busy_time = 0
+        self.cycles = 0
+        self.bursts = 0
+        self.max_busy = 0
+        self.max_latency = 0
+
+    def add_run(self, duration, delay, cycles, bursts, now=None):
+        """
+        Add one CPU run:
+            duration - seconds the Tk event loop was blocked
+            delay - seconds of this duration slept by the speed limit
+            cycles - executed (not skipped) CPU cycles
+            bursts - outer burst count of this run
+        """
+        if now is None:
+            now = time.time()
+        if self.window_start is None:
+            self.window_start = now - duration
+
+        busy = max(duration - delay, 0)
+        self.run_count += 1
+        self.busy_time += busy
+        self.cycles += cycles
+        self.bursts += bursts
+        self.max_busy = max(self.max_busy, busy)
+        self.max_latency = max(self.max_latency, duration)
+
+        if now - self.window_start >= self.interval:
+            self.tune()
+            self.reset()
+
+    def tune(self):
+        if self.busy_time <= 0 or self.bursts <= 0 or self.max_busy <= 0:
+            return
+        cfg = self.runtime_cfg
+        target = self.target_latency
+
+        # The run time: Hit RUN_SHARE of the target latency with the longest run
+        target_run_time = target * self.RUN_SHARE
+        max_run_time = cfg.max_run_time * target_run_time / self.max_busy
+        max_run_time = (cfg.max_run_time + max_run_time) / 2 # smooth the changes
+        max_run_time = quantize(clamp(max_run_time, self.MIN_RUN_TIME, target_run_time))
+
+        # The inner burst count: Go on in the same direction, if it's faster
+        cycles_per_sec = self.cycles / self.busy_time
+        step = True
+        if self.last_cycles_per_sec is not None:
+            change = cycles_per_sec / self.last_cycles_per_sec - 1
+            if change < -self.NOISE:
+                self.direction = -self.direction # revert the last step
+            elif change <= self.NOISE:
+                self.hold += 1
+                step = self.hold >= self.HOLD_DECISIONS
+        if step:
+            self.hold = 0
+            self.last_cycles_per_sec = cycles_per_sec
+
+        inner_burst_op_count = cfg.inner_burst_op_count
+        burst_duration = self.busy_time / self.bursts / inner_burst_op_count # per inner op count
+        max_inner = int(max_run_time / self.OUTER_RESOLUTION / burst_duration)
+        if step:
+            inner_burst_op_count = int(inner_burst_op_count * self.INNER_STEP ** self.direction)
+        inner_burst_op_count = clamp(inner_burst_op_count,
+            self.MIN_INNER_BURST_OP_COUNT,
+            clamp(max_inner, self.MIN_INNER_BURST_OP_COUNT, self.MAX_INNER_BURST_OP_COUNT)
+        )
+
+        # The outer burst count bounds: Limit the worst case
+        outer_burst_duration = burst_duration * inner_burst_op_count
+        max_burst_count = max(1, int(target_run_time / outer_burst_duration))
+        min_burst_count = max(1, min(max_burst_count // self.OUTER_RESOLUTION, 10))
+
+        # The speed limit sleep gets the rest of the target latency:
+        max_delay = quantize(max(target - max_run_time, 0))
+
+        self._set(max_run_time=max_run_time,
+            inner_burst_op_count=inner_burst_op_count,
+            min_burst_count=min_burst_count,
+            max_burst_count=max_burst_count,
+            max_delay=max_delay,
+        )
+        self.decisions += 1
+        self.status = (
+            "auto-tune: run %.1fms, inner %i, outer %i-%i, delay %.1fms"
+            " (max. latency %.1fms)"
+        ) % (
+            max_run_time * 1000, inner_burst_op_count,
+            min_burst_count, max_burst_count, max_delay * 1000,
+            self.max_latency * 1000,
+        )
+        log.info(self.status)
+
+    def _set(self, **values):
+        cfg = self.runtime_cfg
+        for attr, value in sorted(values.items()):
+            if getattr(cfg, attr) != value:
+                cfg.set_tuned_value(attr, value)
@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Whole-machine benchmarks: Run standard workloads (ROM boot, BASIC
+    programs, monitor commands) headless on one machine configuration and
+    measure the wall time, cycles/sec and ops/sec, e.g.:
+
+        dragonpy --machine=Dragon32 bench --output new.json --baseline old.json
+
+    Every repetition starts from the same machine state, so the emulated
+    cycles and ops of a workload are the same in every run.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import timeit
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+import dragonpy
+from dragonpy.Dragon32.periphery_dragon import Dragon32PeripheryHeadless
+from dragonpy.Simple6809.periphery_simple6809 import Simple6809PeripheryUnittest
+from dragonpy.core import configs
+from dragonpy.core.boot_cache import boot_machine
+from dragonpy.core.machine import Machine
+from dragonpy.core.machine_state import write_state, read_state
+from dragonpy.sbc09.periphery import SBC09PeripheryUnittest
+
+
+log = logging.getLogger(__name__)
+
+
+BENCH_CFG_DICT = {
+    "verbosity":None,
+    "display_cycle":False,
+    "trace":None,
+    "bus_socket_host":None,
+    "bus_socket_port":None,
+    "ram":None,
+    "rom":None,
+    "max_ops":None,
+    "use_bus":False,
+    "memory_debug":False,
+}
+
+# The GUI independent periphery of the supported machines:
+BENCH_PERIPHERY = {
+    configs.DRAGON32: Dragon32PeripheryHeadless,
+    configs.DRAGON64: Dragon32PeripheryHeadless,
+    configs.COCO2B: Dragon32PeripheryHeadless,
+    configs.SIMPLE6809: Simple6809PeripheryUnittest,
+    configs.SBC09: SBC09PeripheryUnittest,
+}
+
+# CPU burst size between two is_done() checks:
+INNER_BURST_OP_COUNT = 100
+OUTER_BURST_OP_COUNT = 10
+
+MAX_OPS = 50000000 # abort a workload that never ends
+
+BASIC_EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(dragonpy.__file__)), "BASIC examples")
+# The examples that end without user input:
+BASIC_EXAMPLES = ("print_all_chars.bas", "print_timer.bas", "ListVariables.bas")
+
+FOR_LOOP_LISTING = "10 FOR I=1 TO 1000\n20 NEXT I\n"
+STRINGS_LISTING = (
+    '10 FOR I=1 TO 50\n'
+    '20 A$=""\n'
+    '30 FOR J=1 TO 26:A$=A$+CHR$(64+J):NEXT J\n'
+    '40 B$=MID$(A$,5,10)+LEFT$(A$,3)+RIGHT$(A$,3)\n'
+    '50 NEXT I\n'
+)
+
+
+class Workload(object):
+    """
+    setup() prepares the machine outside of the time measurement.
+    run() executes the workload and returns the executed ops.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def setup(self, machine):
+        pass
+
+    def is_done(self, machine):
+        raise NotImplementedError
+
+    def run(self, machine):
+        cpu = machine.cpu
+        ops_per_burst = cpu.outer_burst_op_count * cpu.inner_burst_op_count
+        ops = 0
+        while not self.is_done(machine):
+            if ops >= MAX_OPS:
+                raise RuntimeError("Workload %r not done after %i ops" % (self.name, ops))
+            cpu.burst_run()
+            ops += ops_per_burst
+        return ops
+
+
+class BootWorkload(Workload):
+    """
+    Run the ROM from the CPU reset until the machine waits for user input.
+    """
+    def __init__(self):
+        super(BootWorkload, self).__init__("boot")
+
+    def run(self, machine):
+        # The same loop as cpu.test_run(), but counts the ops:
+        end = machine.cfg.STARTUP_END_ADDR
+        get_and_call_next_op = machine.cpu.get_and_call_next_op
+        program_counter = machine.cpu.program_counter
+        for ops in range(MAX_OPS):
+            if program_counter.value == end:
+                return ops
+            get_and_call_next_op()
+        raise RuntimeError("Workload %r not done after %i ops" % (self.name, MAX_OPS))
+
+
+class BasicWorkload(Workload):
+    """
+    Inject a BASIC program and RUN it, until the interpreter is back
+    in the direct mode (the current line number is $ffff).
+    """
+    def __init__(self, name, listing):
+        super(BasicWorkload, self).__init__(name)
+        self.listing = listing
+
+    def setup(self, machine):
+        machine.inject_basic_program(self.listing)
+        machine.periphery.add_to_input_queue("RUN\r")
+        self.started = False
+
+    def is_done(self, machine):
+        curlin_addr = machine.cfg.CURLIN_ADDR
+        hi, lo = machine.cpu.memory.read_block(curlin_addr, curlin_addr + 2)
+        if (hi << 8) + lo != 0xffff:
+            self.started = True
+            return False
+        return self.started
+
+
+class SerialWorkload(Workload):
+    """
+    Send the input to a machine with a serial terminal and wait
+    for the given count of terminator in the output.
+    """
+    def __init__(self, name, text, terminator, count):
+        super(SerialWorkload, self).__init__(name)
+        self.text = text
+        self.terminator = terminator
+        self.count = count
+
+    def setup(self, machine):
+        machine.periphery.add_to_input_queue(self.text)
+
+    def is_done(self, machine):
+        return machine.periphery.output.count(self.terminator) >= self.count
+
+
+def get_workloads(machine_name, cfg):
+    workloads = [BootWorkload()]
+    if machine_name in (configs.DRAGON32, configs.DRAGON64, configs.COCO2B):
+        workloads += [
+            BasicWorkload("basic for loop", FOR_LOOP_LISTING),
+            BasicWorkload("basic strings", STRINGS_LISTING),
+        ]
+        for filename in BASIC_EXAMPLES:
+            path = os.path.join(BASIC_EXAMPLES_DIR, filename)
+            if not os.path.isfile(path):
+                log.critical("Skip missing BASIC example %r", path)
+                continue
+            with open(path, "r") as f:
+                listing = f.read()
+            workloads.append(BasicWorkload("example %s" % filename, listing))
+    elif machine_name == configs.SIMPLE6809:
+        workloads += [
+            SerialWorkload("basic for loop", "FOR I=1 TO 1000:NEXT I\r\n", "OK\r\n", 1),
+            SerialWorkload("basic strings",
+                'FOR I=1 TO 50:A$="":FOR J=1 TO 26:A$=A$+CHR$(64+J):NEXT J:NEXT I\r\n',
+                "OK\r\n", 1
+            ),
+        ]
+    elif machine_name == configs.SBC09:
+        workloads += [
+            SerialWorkload("monitor hex calc",
+                "".join("H100+%X\r\n" % i for i in range(20)), "\n", 20 * 2
+            ),
+            SerialWorkload("monitor disassemble", "UE400,16\r\n" * 10, "\n", 10 * 11),
+        ]
+    return workloads
+
+
+def get_state(machine):
+    f = io.BytesIO()
+    write_state(machine, f, compress=False)
+    return f.getvalue()
+
+
+def set_state(machine, state):
+    read_state(machine, io.BytesIO(state))
+
+
+class MachineBenchmark(object):
+    def __init__(self, machine_name, cfg_class, cfg_dict=None):
+        try:
+            periphery_class = BENCH_PERIPHERY[machine_name]
+        except KeyError:
+            raise RuntimeError("Machine %r can't be benchmarked, supported are: %s" % (
+                machine_name, ", ".join(sorted(BENCH_PERIPHERY))
+            ))
+        self.machine_name = machine_name
+
+        bench_cfg_dict = BENCH_CFG_DICT.copy()
+        if cfg_dict is not None:
+            bench_cfg_dict.update(cfg_dict)
+        bench_cfg_dict["idle_skip"] = False # measure the emulation, not the skipping
+        cfg = cfg_class(bench_cfg_dict)
+
+        self.machine = Machine(
+            cfg,
+            periphery_class=periphery_class,
+            display_callback=None,
+            user_input_queue=queue.Queue(),
+        )
+        cpu = self.machine.cpu
+        cpu.inner_burst_op_count = INNER_BURST_OP_COUNT
+        cpu.outer_burst_op_count = OUTER_BURST_OP_COUNT
+
+        self.machine.periphery.setUp()
+        self.reset_state = get_state(self.machine)
+        boot_machine(self.machine)
+        self.boot_state = get_state(self.machine)
+
+        self.workloads = get_workloads(machine_name, cfg)
+
+    def get_workloads(self, names=None):
+        if not names:
+            return self.workloads
+        workloads = dict((workload.name, workload) for workload in self.workloads)
+        try:
+            return [workloads[name] for name in names]
+        except KeyError as err:
+            raise RuntimeError("Unknown workload %s, existing are: %s" % (
+                err, ", ".join(repr(workload.name) for workload in self.workloads)
+            ))
+
+    def run_once(self, workload):
+        """
+        Returns the wall time, cycles and ops of one workload run.
+        """
+        machine = self.machine
+        if isinstance(workload, BootWorkload):
+            set_state(machine, self.reset_state)
+        else:
+            set_state(machine, self.boot_state)
+        machine.periphery.setUp()
+        workload.setup(machine)
+
+        start_cycles = machine.cpu.cycles
+        start_time = timeit.default_timer()
+        ops = workload.run(machine)
+        duration = timeit.default_timer() - start_time
+        return duration, machine.cpu.cycles - start_cycles, ops
+
+    def run_workload(self, workload, warmup=1, repetitions=5):
+        for __ in range(warmup):
+            self.run_once(workload)
+
+        times = []
+        for __ in range(repetitions):
+            duration, cycles, ops = self.run_once(workload)
+            times.append(duration)
+
+        times.sort()
+        best_time = times[0]
+        return {
+            "cycles": cycles,
+            "ops": ops,
+            "times": times,
+            "best_time": best_time,
+            "median_time": times[len(times) // 2],
+            "cycles_per_sec": cycles / best_time,
+            "ops_per_sec": ops / best_time,
+        }
+
+    def run(self, names=None, warmup=1, repetitions=5, verbose=True):
+        if repetitions < 1:
+            raise RuntimeError("Needs at least one repetition, not %i" % repetitions)
+        results = {}
+        for workload in self.get_workloads(names):
+            result = self.run_workload(workload, warmup, repetitions)
+            results[workload.name] = result
+            if verbose:
+                print(format_result(workload.name, result))
+                sys.stdout.flush()
+
+        return {
+            "machine": self.machine_name,
+            "dragonpy_version": dragonpy.__version__,
+            "python": "%s %s" % (platform.python_implementation(), platform.python_version()),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(),
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "workloads": results,
+        }
+
+
+def format_result(name, result):
+    return "%-30s %8.3f sec. %12i cycles %12.0f cycles/sec. %10.0f ops/sec." % (
+        name, result["best_time"], result["cycles"], result["cycles_per_sec"], result["ops_per_sec"]
+    )
+
+
+def save_results(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+    log.critical("Benchmark results saved into %r", path)
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare_results(results, baseline, threshold=5.0):
+    """
+    Compare the cycles/sec of all workloads that exists in both results.
+    Returns a list of (name, baseline cycles/sec, cycles/sec, change in percent, is regression)
+    """
+    if results["machine"] != baseline["machine"]:
+        raise RuntimeError("Baseline is for machine %r and not %r" % (
+            baseline["machine"], results["machine"]
+        ))
+    comparison = []
+    for name, result in sorted(results["workloads"].items()):
+        try:
+            base_result = baseline["workloads"][name]
+        except KeyError:
+            log.critical("Workload %r not in baseline, skipped.", name)
+            continue
+        base_cycles_per_sec = base_result["cycles_per_sec"]
+        cycles_per_sec = result["cycles_per_sec"]
+        change = (cycles_per_sec - base_cycles_per_sec) / base_cycles_per_sec * 100
+        comparison.append((name, base_cycles_per_sec, cycles_per_sec, change, change < -threshold))
+    return comparison
+
+
+def format_comparison(comparison, threshold):
+    lines = ["%-30s %18s %18s %9s" % ("", "baseline", "current", "change")]
+    for name, base_cycles_per_sec, cycles_per_sec, change, is_regression in comparison:
+        lines.append("%-30s %11.0f cyc/s %11.0f cyc/s %+8.1f%%%s" % (
+            name, base_cycles_per_sec, cycles_per_sec, change,
+            " REGRESSION" if is_regression else ""
+        ))
+    regressions = sum(1 for item in comparison if item[-1])
+    lines.append("%i of %i workloads slower than %.1f%%" % (regressions, len(comparison), threshold))
+    return "\n".join(lines)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Micro benchmarks for the emulator components: The hot paths are
+    called directly and the best time is reported in nano seconds per call.
+
+    Run all via:
+        python -m dragonpy.core.benchmark
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import functools
+import logging
+import timeit
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from MC6809.components.cpu6809 import CPU
+
+from dragonpy.components.memory import Memory
+from dragonpy.Dragon32.MC6821_PIA import PIA
+from dragonpy.Dragon32.MC6847 import (
+    MC6847_FrameBufferCanvas, MC6847_TextModeCanvas, get_glyph_rows, get_put_data
+)
+from dragonpy.Dragon32.MC6847_graphics import (
+    NumpyGraphicsRenderer, PythonGraphicsRenderer, numpy
+)
+from dragonpy.Dragon32.MC6847_headless import MC6847_HeadlessDisplay
+from dragonpy.Dragon32.MC6883_SAM import SAM
+from dragonpy.Dragon32.config import Dragon32Cfg
+from dragonpy.Dragon32 import dragon_charmap
+from dragonpy.Dragon32.dragon_charmap import get_charmap_dict
+from dragonpy.tests.test_config import TestCfg
+from dragonpy.vectrex.MOS6522 import MOS6522VIA
+
+
+log = logging.getLogger(__name__)
+
+
+BENCHMARK_CFG_DICT = {
+    "verbosity":None,
+    "display_cycle":False,
+    "trace":None,
+    "bus_socket_host":None,
+    "bus_socket_port":None,
+    "ram":None,
+    "rom":None,
+    "max_ops":None,
+    "use_bus":False,
+    "memory_debug":False,
+}
+
+
+def measure(func, args=(), number=100000, repeat=5):
+    """
+    Returns the best time of func(*args) in nano seconds per call.
+    """
+    timer = timeit.Timer(functools.partial(func, *args))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def compare(calls1, calls2, number=100000, repeat=9):
+    """
+    Measure two lists of (func, args) in turns, so that the load of the
+    machine hits both in the same way.
+    Returns two lists with the best nano seconds per call.
+    """
+    results1 = [None] * len(calls1)
+    results2 = [None] * len(calls2)
+    for __ in range(repeat):
+        for results, calls in ((results1, calls1), (results2, calls2)):
+            for index, (func, args) in enumerate(calls):
+                ns = measure(func, args, number=number, repeat=1)
+                if results[index] is None or ns < results[index]:
+                    results[index] = ns
+    return results1, results2
+
+
+class MemoryWithoutDirtyPages(Memory):
+    """
+    The page table memory bus without the dirty page tracking.
+    """
+    track_dirty_pages = False
+
+
+def get_memory(memory_class=Memory, cfg_class=TestCfg):
+    cfg = cfg_class(BENCHMARK_CFG_DICT.copy())
+    memory = memory_class(cfg)
+    CPU(memory, cfg) # set memory.cpu -> create the specialized read/write functions
+    return memory
+
+
+def memory_benchmarks(memory):
+    """
+    Returns a list of (name, func, args) for the memory accesses.
+    TestCfg has RAM in $0000-$7fff and ROM in $8000-$ffff
+    """
+    return [
+        ("read byte RAM", memory.read_byte, (0x1234,)),
+        ("write byte RAM", memory.write_byte, (0x1234, 0x12)),
+        ("write word RAM", memory.write_word, (0x1234, 0x1234)),
+        ("get_dirty_pages()", memory.get_dirty_pages, ()),
+    ]
+
+
+def run_dirty_pages_benchmark():
+    """
+    Compare the page table memory bus with and without dirty page tracking.
+    """
+    base_benchmarks = memory_benchmarks(get_memory(MemoryWithoutDirtyPages))
+    dirty_benchmarks = memory_benchmarks(get_memory(Memory))
+
+    base_results, dirty_results = compare(
+        [(func, args) for name, func, args in base_benchmarks],
+        [(func, args) for name, func, args in dirty_benchmarks],
+    )
+
+    print("%-20s %15s %15s %10s" % ("", "page tables", "dirty pages", "overhead"))
+    for (name, func, args), base_ns, dirty_ns in zip(base_benchmarks, base_results, dirty_results):
+        print("%-20s %12.1f ns %12.1f ns %9.1f%%" % (
+            name, base_ns, dirty_ns, (dirty_ns - base_ns) / base_ns * 100
+        ))
+
+
+class BenchmarkDragon32Cfg(Dragon32Cfg):
+    """
+    The Dragon 32 memory map without the ROM files.
+    """
+    DEFAULT_ROMS = None
+
+
+class KeyQueue(queue.Queue):
+    """
+    A user input queue that has always a key pressed.
+    """
+    def get_nowait(self):
+        return "A"
+
+
+class HeadlessCanvas(object):
+    def itemconfigure(self, image_id, **kwargs):
+        pass
+
+
+class HeadlessTextModeCanvas(MC6847_TextModeCanvas):
+    """
+    MC6847_TextModeCanvas without Tkinter: The glyph atlas images and
+    the canvas are replaced by stand-ins, so only the logic is measured.
+    """
+    def __init__(self):
+        self.rows = 32
+        self.columns = 16
+        self.canvas = HeadlessCanvas()
+        self.charmap = get_charmap_dict()
+        # Like TkGlyphAtlas.images: a image for every charmap value
+        self.image_cache = dict(self.charmap)
+        self.image_ids = list(range(self.rows * self.columns))
+        self.init_buffers()
+
+
+class HeadlessFrameBufferCanvas(MC6847_FrameBufferCanvas):
+    """
+    MC6847_FrameBufferCanvas without Tkinter: The put() data is build,
+    but not send to a PhotoImage.
+    """
+    def __init__(self):
+        self.rows = 32
+        self.columns = 16
+        self.char_width = 8
+        self.char_height = 13
+        self.charmap = get_charmap_dict()
+        self.glyph_cache = {}
+        self.init_glyph = get_glyph_rows("?", dragon_charmap.INVERTED)
+        self.init_buffers()
+
+    def put_chars(self, column, row, glyphs):
+        get_put_data(glyphs)
+
+    def zoom(self, start_column, end_column):
+        pass
+
+
+def scroll_screen(canvas, values=(bytearray(range(32, 96)) * 8, bytearray(range(96, 160)) * 8)):
+    """
+    Write the complete screen with alternating content and render it.
+    """
+    scroll_screen.count += 1
+    write_byte = canvas.write_byte
+    for address, value in enumerate(values[scroll_screen.count & 1], 0x0400):
+        write_byte(0, 0, address, value)
+    canvas.update()
+scroll_screen.count = 0
+
+
+def device_benchmarks():
+    """
+    Returns a list of (name, func, args) for the device callbacks.
+    Dragon32Cfg has RAM in $0000-$7fff, ROM in $8000-$bfff and I/O in $ff00-$ffff
+    """
+    memory = get_memory(Memory, BenchmarkDragon32Cfg)
+    cfg = memory.cfg
+    cpu = memory.cpu
+
+    pia = PIA(cfg, cpu, memory, queue.Queue())
+    pia.pia_0_B_data.value = cfg.PIA0B_KEYBOARD_START # scan the keyboard
+
+    key_pia = PIA(cfg, cpu, get_memory(Memory, BenchmarkDragon32Cfg), KeyQueue())
+    key_pia.pia_0_B_data.value = cfg.PIA0B_KEYBOARD_START
+
+    sam = SAM(cfg, cpu, memory)
+    canvas = HeadlessTextModeCanvas()
+    via = MOS6522VIA(TestCfg(BENCHMARK_CFG_DICT.copy()), get_memory())
+
+    sg4_data = bytearray(range(256)) * 2
+    rg6_data = bytearray(range(256)) * 24
+    numpy_benchmarks = []
+    if numpy is not None:
+        numpy_benchmarks = [
+            ("MC6847 SG4 frame (NumPy)", NumpyGraphicsRenderer().render, (sg4_data, "SG4", 0)),
+            ("MC6847 RG6 frame (NumPy)", NumpyGraphicsRenderer().render, (rg6_data, "RG6", 0)),
+            ("MC6847 CG6 frame (NumPy)", NumpyGraphicsRenderer().render, (rg6_data, "CG6", 1)),
+        ]
+
+    return [
+        ("read byte RAM", memory.read_byte, (0x1234,)),
+        ("write byte RAM", memory.write_byte, (0x1234, 0x12)),
+        ("read byte ROM", memory.read_byte, (0x8000,)),
+        ("read byte I/O (PIA0 B data)", memory.read_byte, (0xff02,)),
+        ("write byte I/O (PIA0 B data)", memory.write_byte, (0xff02, cfg.PIA0B_KEYBOARD_START)),
+        ("PIA.read_PIA0_A_data no key", pia.read_PIA0_A_data, (0, 0, 0xff00)),
+        ("PIA.read_PIA0_A_data key", key_pia.read_PIA0_A_data, (0, 0, 0xff00)),
+        ("SAM.interrupt_vectors", sam.interrupt_vectors, (0, 0, 0xfffe)),
+        ("MC6847 write_byte", canvas.write_byte, (0, 0, 0x0400, 0x41)),
+        ("MC6847 512 writes + update()", scroll_screen, (canvas,)),
+        ("MC6847 framebuffer 512 writes", scroll_screen, (HeadlessFrameBufferCanvas(),)),
+        ("MC6847 headless get_lines()", MC6847_HeadlessDisplay(memory).get_lines, ()),
+        ("MC6847 SG4 frame (python)", PythonGraphicsRenderer().render, (sg4_data, "SG4", 0)),
+        ("MC6847 RG6 frame (python)", PythonGraphicsRenderer().render, (rg6_data, "RG6", 0)),
+        ("MC6847 CG6 frame (python)", PythonGraphicsRenderer().render, (rg6_data, "CG6", 1)),
+    ] + numpy_benchmarks + [
+        ("MOS6522VIA.read8 ORB", via.read8, (0xd000,)),
+        ("MOS6522VIA.read8 IFR", via.read8, (0xd00d,)),
+        ("MOS6522VIA.write8 ORB", via.write8, (0xd000, 0x00)),
+        ("MOS6522VIA.write8 DDRA", via.write8, (0xd003, 0xff)),
+    ]
+
+
+def get_number(func, args, target_time=0.2):
+    """
+    Returns the call count, so that one measurement takes about target_time seconds.
+    """
+    ns = measure(func, args, number=10, repeat=1)
+    return max(10, int(target_time * 1e9 / ns))
+
+
+def run_device_benchmark(repeat=5):
+    for name, func, args in device_benchmarks():
+        number = get_number(func, args)
+        print("%-30s %12.1f ns" % (name, measure(func, args, number=number, repeat=repeat)))
+
+
+if __name__ == '__main__':
+    run_dirty_pages_benchmark()
+    print()
+    run_device_benchmark()
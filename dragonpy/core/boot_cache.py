@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Cache the machine state after the ROM boot, so the next start
+    is ready for user input without emulating the boot again.
+
+    The cache file name contains a hash of the machine name, the SHA1 of the
+    ROM files, the save-state format version and the DragonPy version.
+    So a cache file will be not used anymore if one of these changed.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import glob
+import hashlib
+import logging
+import os
+import re
+import struct
+import time
+import zlib
+
+import dragonpy
+from dragonpy.core.machine_state import STATE_VERSION
+from dragonpy.utils.cache_dir import get_cache_dir
+
+
+log = logging.getLogger(__name__)
+
+
+CACHE_FILE_EXT = ".dpystate"
+
+
+def get_cache_prefix(cfg):
+    """ e.g.: "Dragon_32_" """
+    return re.sub(r"[^\w]+", "_", cfg.MACHINE_NAME) + "_"
+
+
+def get_boot_cache_key(cfg):
+    rom_sha1s = [rom.SHA1 for rom in (cfg.rom_cfg or ())]
+    key = "|".join([
+        cfg.MACHINE_NAME,
+        ",".join(rom_sha1s),
+        "$%04x" % cfg.STARTUP_END_ADDR,
+        "%i" % STATE_VERSION,
+        dragonpy.__version__,
+    ])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def get_boot_cache_path(cfg, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    filename = get_cache_prefix(cfg) + get_boot_cache_key(cfg)[:16] + CACHE_FILE_EXT
+    return os.path.join(cache_dir, filename)
+
+
+def _save_boot_cache(machine, path):
+    cache_dir = os.path.dirname(path)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    # Remove outdated cache files of this machine:
+    pattern = os.path.join(cache_dir, get_cache_prefix(machine.cfg) + "*" + CACHE_FILE_EXT)
+    for filename in glob.glob(pattern):
+        log.critical("Remove old boot cache file %r", filename)
+        os.remove(filename)
+
+    # Write to a temp file first, so a other process never reads a half written file:
+    temp_path = "%s.%i.tmp" % (path, os.getpid())
+    machine.save_state(temp_path)
+    os.rename(temp_path, path)
+
+
+def boot_machine(machine, use_cache=True, cache_dir=None, max_ops=1000000):
+    """
+    Bring the machine into the state after the ROM boot:
+    Load the state from the boot cache or run the ROM until
+    cfg.STARTUP_END_ADDR and save the state into the cache.
+
+    Returns True if the state was loaded from cache.
+    """
+    cfg = machine.cfg
+    path = get_boot_cache_path(cfg, cache_dir)
+
+    if use_cache and os.path.isfile(path):
+        try:
+            machine.load_state(path)
+        except (IOError, RuntimeError, ValueError, KeyError, struct.error, zlib.error) as err:
+            log.critical("Error loading boot cache %r: %s - remove it and boot again", path, err)
+            try:
+                os.remove(path)
+            except OSError as err:
+                log.critical("Can't remove boot cache %r: %s", path, err)
+            # The state may be loaded only partly:
+            machine.cpu.set_state(machine.cpu_init_state)
+            machine.cpu.reset()
+        else:
+            log.critical("Boot state loaded from cache %r", path)
+            return True
+
+    log.critical("Boot %s until $%04x...", cfg.MACHINE_NAME, cfg.STARTUP_END_ADDR)
+    cpu = machine.cpu
+    start_time = time.time()
+    cpu.test_run(
+        start=cpu.program_counter.value,
+        end=cfg.STARTUP_END_ADDR,
+        max_ops=max_ops,
+    )
+    log.critical("Boot done in %.2fsec. (%i cycles)", time.time() - start_time, cpu.cycles)
+
+    if use_cache:
+        try:
+            _save_boot_cache(machine, path)
+        except (IOError, OSError) as err:
+            log.critical("Error saving boot cache %r: %s", path, err)
+        else:
+            log.critical("Boot state saved into cache %r", path)
+    return False
@@ -40,6 +40,7 @@ import dragonpy
 from dragonpy.core.gui_starter import StarterGUI
 from dragonpy.CoCo.config import CoCo2bCfg
 from dragonpy.CoCo.machine import run_CoCo2b
+from dragonpy.Dragon32.MC6847 import DISPLAY_BACKENDS
 from dragonpy.Dragon32.config import Dragon32Cfg
 from dragonpy.Dragon32.machine import run_Dragon32
 from dragonpy.Dragon64.config import Dragon64Cfg
@@ -49,7 +50,11 @@ from dragonpy.Multicomp6809.machine import run_Multicomp6809
 from dragonpy.Simple6809.config import Simple6809Cfg
 from dragonpy.Simple6809.machine import run_Simple6809
 from dragonpy.core import configs
+from dragonpy.core.bench import (
+    MachineBenchmark, compare_results, format_comparison, load_results, save_results
+)
 from dragonpy.core.configs import machine_dict
+from dragonpy.core.coverage import get_report, merge_files, read_bitmap
 from dragonpy.sbc09.config import SBC09Cfg
 from dragonpy.sbc09.machine import run_sbc09
 from dragonpy.vectrex.config import VectrexCfg
@@ -174,6 +179,42 @@ def editor(cli_config):
 @click.option("--rom", default=None, help="ROM file to use (default set by machine configuration)")
 @click.option("--max_ops", default=None, type=int,
     help="If given: Stop CPU after given cycles else: run forever")
+@click.option("--load-state", default=None, type=click.Path(exists=True, dir_okay=False),
+    help="Machine state file to load on startup (create it via: File/save state)")
+@click.option("--boot-cache/--no-boot-cache", default=True,
+    help="Start from the cached state after the ROM boot (default: on)")
+@click.option("--record-input", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Record the user input with the CPU cycles into the given file")
+@click.option("--replay-input", default=None, type=click.Path(exists=True, dir_okay=False),
+    help="Replay the user input recorded via --record-input")
+@click.option("--rewind-budget", default=configs.DEFAULT_REWIND_BUDGET, type=int,
+    help="Memory budget in MB for the rewind snapshots (0 == disable rewind, default: %i)" % (
+        configs.DEFAULT_REWIND_BUDGET
+    ))
+@click.option("--idle-skip/--no-idle-skip", default=configs.DEFAULT_IDLE_SKIP,
+    help="Fast-forward the ROM idle loops while no key is pressed (default: %s)" % (
+        "on" if configs.DEFAULT_IDLE_SKIP else "off"
+    ))
+@click.option("--turbo", is_flag=True,
+    help="Start in turbo mode: Run the CPU uncapped until a key is pressed (toggle via F12)")
+@click.option("--display-backend", default="canvas", type=click.Choice(sorted(DISPLAY_BACKENDS)),
+    help="Text display: one image per character or one framebuffer for the screen (default: canvas)")
+@click.option("--profile", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Count the executed instructions and memory callbacks and write a report into this file at exit")
+@click.option("--sample-profile", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Sample the PC and write collapsed stacks (e.g. for flamegraph.pl) into this file at exit")
+@click.option("--sample-interval", default=1000, type=int,
+    help="CPU cycles between two samples of --sample-profile and --basic-profile (default: 1000)")
+@click.option("--basic-profile", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Sample the current BASIC line and write the CPU cycles per line into this file at exit")
+@click.option("--coverage", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Write the bitmap of all executed instruction addresses into this file at exit")
+@click.option("--metrics", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Append performance metrics as JSON lines into this file")
+@click.option("--metrics-interval", default=1.0, type=float,
+    help="Seconds between two metrics updates (default: 1)")
+@click.option("--metrics-port", default=0, type=int,
+    help="Serve the metrics in Prometheus text format on http://127.0.0.1:PORT/metrics (default: 0 == off)")
 @cli_config
 def run(cli_config, **kwargs):
     log.critical("Use machine func: %s", cli_config.machine_run_func.__name__)
@@ -182,6 +223,67 @@ def run(cli_config, **kwargs):
     cli_config.machine_run_func(cli_config.cfg_dict)
 
 
+@cli.group(name="coverage", help="Merge coverage files or report them")
+def coverage_group():
+    pass
+
+
+@coverage_group.command(help="Merge coverage files (bytewise OR) into OUT_FILE")
+@click.argument("out_file", type=click.Path(dir_okay=False, writable=True))
+@click.argument("coverage_files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+def merge(out_file, coverage_files):
+    merge_files(out_file, coverage_files)
+
+
+@coverage_group.command(help="Print the executed addresses per mem info range of the machine")
+@click.argument("coverage_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--all", "all_addresses", is_flag=True,
+    help="Report the complete address space and not only the ROM")
+@cli_config
+def report(cli_config, coverage_file, all_addresses):
+    cfg_dict = dict(cli_config.cfg_dict, mem_info=True)
+    cfg = cli_config.machine_cfg(cfg_dict)
+    if all_addresses:
+        start, end = 0x0000, 0xffff
+    else:
+        start, end = cfg.ROM_START, cfg.ROM_END
+    click.echo(get_report(read_bitmap(coverage_file), cfg.mem_info, start, end))
+
+
+@cli.command(help="Benchmark whole-machine workloads (ROM boot, BASIC programs...)")
+@click.option("--workload", multiple=True,
+    help="Run only the given workload (default: all), e.g.: --workload boot")
+@click.option("--list", "list_workloads", is_flag=True, help="List the workloads and exit")
+@click.option("--warmup", default=1, type=int, help="Runs before the measurement (default: 1)")
+@click.option("--repetitions", default=5, type=int,
+    help="Measured runs, the best time counts (default: 5)")
+@click.option("--output", default=None, type=click.Path(dir_okay=False, writable=True),
+    help="Save the results as JSON into this file")
+@click.option("--baseline", default=None, type=click.Path(exists=True, dir_okay=False),
+    help="Compare the cycles/sec with the results saved via --output")
+@click.option("--threshold", default=5.0, type=float,
+    help="Max. slowdown in percent against the baseline (default: 5)")
+@cli_config
+def bench(cli_config, workload, list_workloads, warmup, repetitions, output, baseline, threshold):
+    benchmark = MachineBenchmark(cli_config.machine, cli_config.machine_cfg, cli_config.cfg_dict)
+    if list_workloads:
+        for item in benchmark.workloads:
+            click.echo(item.name)
+        return
+
+    click.secho("Benchmark %s (warmup: %i, repetitions: %i)" % (
+        cli_config.machine, warmup, repetitions
+    ), bold=True)
+    results = benchmark.run(workload, warmup=warmup, repetitions=repetitions)
+    if output:
+        save_results(output, results)
+    if baseline:
+        comparison = compare_results(results, load_results(baseline), threshold)
+        click.echo(format_comparison(comparison, threshold))
+        if any(is_regression for __, __, __, __, is_regression in comparison):
+            sys.exit(1)
+
+
 @cli.command(help="List all exiting loggers and exit.")
 def log_list():
     print("A list of all loggers:")
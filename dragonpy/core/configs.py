@@ -27,6 +27,10 @@ SIMPLE6809 = "Simple6809"
 MULTICOMP6809 = "Multicomp6809"
 VECTREX = "Vectrex"
 
+# Defaults of the cfg_dict values, also used by the CLI:
+DEFAULT_REWIND_BUDGET = 8 # rewind snapshots memory budget in MB, 0 == disabled
+DEFAULT_IDLE_SKIP = True # fast-forward the ROM idle loops?
+
 
 class MachineDict(dict):
     DEFAULT = None
@@ -72,6 +76,8 @@ class BaseConfig(object):
     # How many ops should be execute before make a control server update cycle?
     BURST_COUNT = 10000
 
+    CYCLES_PER_SEC = 888625 # CPU cycles per second of the real machine
+
     DEFAULT_ROMS = {}
 
     def __init__(self, cfg_dict):
@@ -103,6 +109,48 @@ class BaseConfig(object):
 
         self.verbosity = cfg_dict["verbosity"]
 
+        # Use the generic memory methods with all assert checks?
+        # Otherwise specialized read/write functions are used, see: Memory._build_accessors()
+        self.memory_debug = cfg_dict.get("memory_debug", False)
+
+        # Rewind snapshot ring buffer, see: dragonpy/core/rewind.py
+        self.rewind_budget = cfg_dict.get("rewind_budget", DEFAULT_REWIND_BUDGET) # in MB, 0 == disabled
+        self.rewind_interval = cfg_dict.get("rewind_interval", 17784) # CPU cycles between two snapshots
+        self.rewind_keyframes = cfg_dict.get("rewind_keyframes", 50) # complete memory every n snapshots
+
+        # Fast-forward ROM idle loops, see: dragonpy/core/idle.py
+        self.idle_skip = cfg_dict.get("idle_skip", DEFAULT_IDLE_SKIP)
+
+        # Start the Tkinter GUI in turbo mode? see: BaseTkinterGUI.set_turbo()
+        self.turbo = cfg_dict.get("turbo", False)
+
+        # Text display of the Tkinter GUI, see: dragonpy/Dragon32/MC6847.py
+        self.display_backend = cfg_dict.get("display_backend", "canvas")
+
+        # Write execution histograms into this file, see: dragonpy/core/profiler.py
+        self.profile = cfg_dict.get("profile")
+
+        # Write sampled PC stacks into this file, see: dragonpy/core/profiler.py
+        self.sample_profile = cfg_dict.get("sample_profile")
+        self.sample_interval = cfg_dict.get("sample_interval", 1000) # CPU cycles between two samples
+
+        # Write the sampled CPU cycles per BASIC line into this file:
+        self.basic_profile = cfg_dict.get("basic_profile")
+
+        # Write the executed addresses bitmap into this file, see: dragonpy/core/coverage.py
+        self.coverage = cfg_dict.get("coverage")
+
+        # Export performance metrics, see: dragonpy/core/metrics.py
+        self.metrics = cfg_dict.get("metrics") # JSON lines file
+        self.metrics_interval = cfg_dict.get("metrics_interval", 1) # seconds
+        self.metrics_port = cfg_dict.get("metrics_port", 0) # HTTP port for Prometheus, 0 == off
+
+        # The profilers and the coverage report annotate the addresses,
+        # so the mem info is needed regardless of the log verbosity:
+        self.mem_info_required = bool(
+            cfg_dict.get("mem_info") or self.profile or self.sample_profile or self.coverage
+        )
+
         self.mem_info = DummyMemInfo()
         self.memory_byte_middlewares = {}
         self.memory_word_middlewares = {}
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Code coverage: Record which addresses are executed as instruction
+    starts. Stored as a 64K bit bitmap file (8KB, bit 0 of the first byte
+    is address $0000), so coverage files of many runs can be merged by a
+    bytewise OR, e.g.:
+
+        dragonpy --machine=Dragon32 run --coverage run1.cov
+        dragonpy --machine=Dragon32 run --coverage run2.cov
+        dragonpy coverage merge all.cov run1.cov run2.cov
+        dragonpy --machine=Dragon32 coverage report all.cov
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+
+from dragonpy.core.configs import DummyMemInfo
+from dragonpy.core.machine_state import MEMORY_SIZE
+
+
+log = logging.getLogger(__name__)
+
+
+BITMAP_SIZE = MEMORY_SIZE // 8 # 8KB
+
+
+def pack_bits(flags):
+    """
+    Convert one flag byte per address into the bitmap.
+
+    >>> flags = bytearray(16)
+    >>> flags[0] = flags[9] = flags[15] = 1
+    >>> pack_bits(flags) == b"\\x01\\x82"
+    True
+    """
+    bitmap = bytearray(len(flags) // 8)
+    address = flags.find(b"\x01")
+    while address != -1:
+        bitmap[address >> 3] |= 1 << (address & 7)
+        address = flags.find(b"\x01", address + 1)
+    return bytes(bitmap)
+
+
+def unpack_bits(bitmap):
+    """
+    >>> list(unpack_bits(b"\\x01\\x82"))
+    [1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+    """
+    flags = bytearray(len(bitmap) * 8)
+    for index, byte in enumerate(bytearray(bitmap)):
+        if byte:
+            for bit in range(8):
+                if byte & (1 << bit):
+                    flags[(index << 3) + bit] = 1
+    return flags
+
+
+def read_bitmap(path):
+    with open(path, "rb") as f:
+        bitmap = f.read()
+    if len(bitmap) != BITMAP_SIZE:
+        raise RuntimeError("%r is no coverage file: %i Bytes and not %i" % (
+            path, len(bitmap), BITMAP_SIZE
+        ))
+    return bitmap
+
+
+def write_bitmap(path, bitmap):
+    with open(path, "wb") as f:
+        f.write(bitmap)
+
+
+def merge_bitmaps(bitmaps, size=BITMAP_SIZE):
+    """
+    >>> merge_bitmaps([b"\\x00\\xf0\\x0f", b"\\x01\\x0f\\x0f"], size=3) == b"\\x01\\xff\\x0f"
+    True
+    """
+    merged = bytearray(size)
+    for bitmap in bitmaps:
+        for index, byte in enumerate(bytearray(bitmap)):
+            merged[index] |= byte
+    return bytes(merged)
+
+
+def merge_files(out_path, paths):
+    bitmap = merge_bitmaps(read_bitmap(path) for path in paths)
+    write_bitmap(out_path, bitmap)
+    log.critical("%i coverage files merged into %r", len(paths), out_path)
+    return bitmap
+
+
+def get_report(bitmap, mem_info, start=0x0000, end=0xffff):
+    """
+    Returns the executed instruction starts per mem info address range.
+    The ranges without any executed address are listed first.
+    """
+    flags = unpack_bits(bitmap)
+    executed = sum(flags[start:end + 1])
+    lines = [
+        "%i executed instruction addresses in $%04x-$%04x" % (executed, start, end),
+    ]
+    if isinstance(mem_info, DummyMemInfo):
+        return "\n".join(lines) + "\n"
+
+    not_executed = []
+    executed_ranges = []
+    for range_start, range_end, txt in sorted(mem_info.MEM_INFO):
+        if range_start < start or range_end > end:
+            continue
+        count = sum(flags[range_start:range_end + 1])
+        if range_start == range_end:
+            line = "$%04x       %6i  %s" % (range_start, count, txt)
+        else:
+            line = "$%04x-$%04x %6i  %s" % (range_start, range_end, count, txt)
+        if count:
+            executed_ranges.append(line)
+        else:
+            not_executed.append(line)
+
+    lines += ["", "Never executed (%i):" % len(not_executed)]
+    lines += not_executed
+    lines += ["", "Executed (%i):" % len(executed_ranges)]
+    lines += executed_ranges
+    return "\n".join(lines) + "\n"
+
+
+class Coverage(object):
+    """
+    One byte per address is set while running: That's cheaper than
+    setting a bit. It's packed into the bitmap on demand.
+    """
+    def __init__(self, machine):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.executed = bytearray(MEMORY_SIZE)
+
+    def install(self):
+        cpu = self.cpu
+        get_and_call_next_op = cpu.get_and_call_next_op
+        program_counter = cpu.program_counter
+        executed = self.executed
+
+        def coverage_next_op():
+            executed[program_counter.value] = 1
+            get_and_call_next_op()
+
+        cpu.get_and_call_next_op = coverage_next_op
+
+    def reset(self):
+        self.executed[:] = bytearray(MEMORY_SIZE)
+
+    def get_bitmap(self):
+        return pack_bits(self.executed)
+
+    def write(self, path):
+        write_bitmap(path, self.get_bitmap())
+        log.critical("Coverage of %i addresses written to %r", sum(self.executed), path)
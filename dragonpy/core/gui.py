@@ -43,8 +43,12 @@ from dragonpy.Dragon32.keyboard_map import inkey_from_tk_event, add_to_input_que
 from dragonlib.utils.auto_shift import invert_shift
 import dragonpy
 from dragonpy.Dragon32.keyboard_map import inkey_from_tk_event, add_to_input_queue
+from dragonpy.core.autotune import BurstAutoTuner
 from dragonpy.core.gui_starter import MultiStatusBar
-from dragonpy.Dragon32.MC6847 import MC6847_TextModeCanvas
+from dragonpy.Dragon32.MC6847 import (
+    DISPLAY_BACKENDS, VIDEO_RAM_START, MC6847_GraphicsCanvas
+)
+from dragonpy.Dragon32.MC6847_graphics import SG4, get_vdg_mode, get_video_ram_size
 from dragonpy.Dragon32.gui_config import RuntimeCfg, BaseTkinterGUIConfig
 from dragonpy.utils.humanize import locale_format_number, get_python_info
 
@@ -55,10 +59,18 @@ class BaseTkinterGUI(object):
     """
     The complete Tkinter GUI window
     """
+    TURBO_KEYSYM = "F12" # Toggle the turbo mode
+    TURBO_MAX_RUN_TIME = 0.1 # CPU run time between two Tk event loop turns in turbo mode
+    TURBO_DISPLAY_INTERVAL = 0.25 # Coalesce the display output in turbo mode to 4 fps
 
     def __init__(self, cfg, user_input_queue):
         self.cfg = cfg
         self.runtime_cfg = RuntimeCfg()
+        self.auto_tuner = BurstAutoTuner(self.runtime_cfg)
+        self.exact_replay = bool(cfg.cfg_dict.get("record_input") or cfg.cfg_dict.get("replay_input"))
+        if self.exact_replay:
+            # The auto-tuner changes the burst op counts: The replay would be not exact
+            self.runtime_cfg.auto_tune = False
 
         # Queue to send keyboard inputs to CPU Thread:
         self.user_input_queue = user_input_queue
@@ -70,6 +82,10 @@ class BaseTkinterGUI(object):
 
         self.init_statistics() # Called also after reset
 
+        # Turbo mode: Run the CPU as fast as possible, see: set_turbo()
+        self.turbo = False
+        self.next_display_flush = 0
+
         self.root = tk.Tk(className="DragonPy")
         # self.root.config(font="Helvetica 16 bold italic")
 
@@ -79,6 +95,7 @@ class BaseTkinterGUI(object):
 
         self.root.bind("<Key>", self.event_key_pressed)
         self.root.bind("<<Paste>>", self.paste_clipboard)
+        self.root.bind("<%s>" % self.TURBO_KEYSYM, self.event_turbo_key_pressed)
 
         menu_tk_font = TkFont.Font(
             family='Helvetica',
@@ -102,6 +119,9 @@ class BaseTkinterGUI(object):
         self.menubar = tk.Menu(self.root)
 
         filemenu = tk.Menu(self.menubar, tearoff=0)
+        filemenu.add_command(label="save state...", command=self.command_save_state)
+        filemenu.add_command(label="load state...", command=self.command_load_state)
+        filemenu.add_separator()
         filemenu.add_command(label="Exit", command=self.exit)
         self.menubar.add_cascade(label="File", menu=filemenu)
 
@@ -112,6 +132,18 @@ class BaseTkinterGUI(object):
         self.cpu_menu.add_separator()
         self.cpu_menu.add_command(label="soft reset", command=self.command_cpu_soft_reset)
         self.cpu_menu.add_command(label="hard reset", command=self.command_cpu_hard_reset)
+        self.cpu_menu.add_separator()
+        for seconds in (1, 5, 10, 30):
+            self.cpu_menu.add_command(
+                label="rewind %i sec." % seconds,
+                command=lambda seconds=seconds: self.command_rewind(seconds)
+            )
+        self.cpu_menu.add_separator()
+        self.turbo_var = tk.BooleanVar(value=False)
+        self.cpu_menu.add_checkbutton(
+            label="turbo mode (%s)" % self.TURBO_KEYSYM,
+            variable=self.turbo_var, command=self.command_turbo
+        )
         self.menubar.add_cascade(label="6809", menu=self.cpu_menu)
 
         self.config_window = None
@@ -156,6 +188,26 @@ class BaseTkinterGUI(object):
 
     # -----------------------------------------------------------------------------------------
 
+    STATE_FILETYPES = (("DragonPy state", "*.dpystate"), ("All files", "*"))
+
+    def command_save_state(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".dpystate", filetypes=self.STATE_FILETYPES
+        )
+        if path:
+            self.machine.save_state(path)
+
+    def command_load_state(self):
+        path = filedialog.askopenfilename(filetypes=self.STATE_FILETYPES)
+        if path:
+            try:
+                self.machine.load_state(path)
+            except RuntimeError as err:
+                messagebox.showerror("Load state", "Error: %s" % err)
+            self.init_statistics() # Reset statistics
+
+    # -----------------------------------------------------------------------------------------
+
     def close_config(self):
         self.config_window.root.destroy()
         self.config_window = None
@@ -186,6 +238,7 @@ class BaseTkinterGUI(object):
             self.cpu_menu.entryconfig(index=0, state=tk.NORMAL)
             self.cpu_menu.entryconfig(index=1, state=tk.DISABLED)
             self.init_statistics() # Reset statistics
+            self.auto_tuner.reset()
 
     def command_cpu_soft_reset(self):
         self.machine.cpu.reset()
@@ -195,6 +248,72 @@ class BaseTkinterGUI(object):
         self.machine.hard_reset()
         self.init_statistics() # Reset statistics
 
+    def command_rewind(self, seconds):
+        if self.machine.rewind is None:
+            messagebox.showinfo("Rewind",
+                "Rewind is disabled, see: dragonpy run --rewind-budget"
+            )
+        elif not self.machine.rewind_seconds(seconds):
+            messagebox.showinfo("Rewind", "No snapshot exists, yet.")
+        self.init_statistics() # Reset statistics
+
+    def command_turbo(self):
+        self.set_turbo(self.turbo_var.get())
+
+    def event_turbo_key_pressed(self, event):
+        self.set_turbo(not self.turbo)
+        return "break" # Don't send the key to the machine
+
+    def set_turbo(self, turbo):
+        """
+        In turbo mode the CPU runs uncapped (no speed limit and no idle loop
+        sleeps) and the display output is coalesced to a few updates per
+        second. The turbo mode ends automatically, if the user input queue
+        is not empty, e.g.: a key was pressed.
+        """
+        turbo = bool(turbo)
+        self.turbo_var.set(turbo)
+        if turbo == self.turbo:
+            return
+        self.turbo = turbo
+        log.critical("Turbo mode: %s", "on" if turbo else "off")
+
+        idle_detector = self.machine.idle_detector
+        if idle_detector is not None:
+            # Fast-forward the idle loops without sleeping the skipped time:
+            idle_detector.sleep = not turbo
+
+        if not turbo:
+            # Display all buffered output
+            self.flush_display()
+        self.init_statistics() # Reset statistics
+        self.auto_tuner.reset()
+
+    def check_turbo_input(self):
+        """
+        Back to real time if the machine gets some user input
+        """
+        if self.turbo and not self.user_input_queue.empty():
+            self.set_turbo(False)
+
+    def update_display(self, now):
+        """
+        Called after every CPU run: Flush the display output
+        only every TURBO_DISPLAY_INTERVAL in turbo mode.
+        """
+        if not self.turbo:
+            self.flush_display()
+        elif now >= self.next_display_flush:
+            self.flush_display()
+            self.next_display_flush = now + self.TURBO_DISPLAY_INTERVAL
+
+    def flush_display(self):
+        """
+        Display the buffered output, see: self.update_display()
+        Must be implemented in the child class, if the output is buffered.
+        """
+        pass
+
     # -----------------------------------------------------------------------------------------
 
     def add_user_input(self, txt):
@@ -240,25 +359,58 @@ class BaseTkinterGUI(object):
 
     def cpu_interval(self, interval=None):
         self.cpu_interval_calls += 1
+        self.check_turbo_input()
 
-        if self.runtime_cfg.speedlimit:
+        max_run_time = self.runtime_cfg.max_run_time
+        if self.turbo:
+            # Run CPU as fast as Python can and don't waste time in the Tk event loop
+            target_cycles_per_sec = None
+            max_run_time = max(max_run_time, self.TURBO_MAX_RUN_TIME)
+        elif self.runtime_cfg.speedlimit:
             # Run CPU not faster than speedlimit
             target_cycles_per_sec = self.runtime_cfg.cycles_per_sec
         else:
             # Run CPU as fast as Python can...
             target_cycles_per_sec = None
 
+        cpu = self.machine.cpu
+        idle_detector = self.machine.idle_detector
+        start_cycles = cpu.cycles
+        if idle_detector is not None:
+            start_cycles += idle_detector.skipped_cycles
+        bursts = cpu.outer_burst_op_count
+        cpu.delay = 0
+
         start_time = time.time()
-        self.machine.cpu.run(
-            max_run_time=self.runtime_cfg.max_run_time,
+        cpu.run(
+            max_run_time=max_run_time,
             target_cycles_per_sec=target_cycles_per_sec,
         )
         now = time.time()
-        self.total_burst_duration += (now - start_time)
+        duration = now - start_time
+        self.total_burst_duration += duration
+
+        idle_time = 0
+        if idle_detector is not None:
+            # The burst was stopped after skipping a idle loop:
+            # Sleep the skipped time via the next Tk after() delay
+            # and keep the burst count of a complete run.
+            idle_time = idle_detector.pop_idle_time()
+            if idle_time:
+                cpu.outer_burst_op_count = bursts
+
+        if self.runtime_cfg.auto_tune and not self.turbo and not idle_time:
+            cycles = cpu.cycles - start_cycles
+            if idle_detector is not None:
+                cycles -= idle_detector.skipped_cycles # Count only the executed cycles
+            self.auto_tuner.add_run(duration, cpu.delay, cycles, bursts, now=now)
+
+        self.update_display(now)
 
         if interval is not None:
             if self.machine.cpu.running:
-                self.cpu_after_id = self.root.after(interval, self.cpu_interval, interval)
+                delay = max(interval, int((idle_time - cpu.delay) * 1000))
+                self.cpu_after_id = self.root.after(delay, self.cpu_interval, interval)
             else:
                 log.critical("CPU stopped.")
 
@@ -285,7 +437,9 @@ class BaseTkinterGUI(object):
                   self.cpu_interval_calls,
               )
 
-        if self.runtime_cfg.speedlimit:
+        if self.turbo:
+            msg += " - TURBO (%s: real time)" % self.TURBO_KEYSYM
+        elif self.runtime_cfg.speedlimit:
             msg += (
                 " (Burst delay: %f)\nSpeed target: %s cylces/sec - diff: %s cylces/sec"
             ) % (
@@ -298,6 +452,11 @@ class BaseTkinterGUI(object):
 
         self.status.set(msg)
 
+        if self.runtime_cfg.auto_tune:
+            self.status_bar.set_label("auto_tune", self.auto_tuner.status)
+        else:
+            self.status_bar.set_label("auto_tune", "auto-tune: off")
+
         self.last_cpu_cycles = self.machine.cpu.cycles
         self.cpu_interval_calls = 0
         self.burst_loops = 0
@@ -310,6 +469,9 @@ class BaseTkinterGUI(object):
 
         self.update_status_interval(interval=500)
 
+        if self.cfg.turbo:
+            self.set_turbo(True)
+
         self.cpu_interval(interval=1)
 
         log.critical("Start root.mainloop()")
@@ -332,10 +494,15 @@ class DragonTkinterGUI(BaseTkinterGUI):
         self.root.title(
             "%s - Text Display 32 columns x 16 rows" % machine_name)
 
-        self.display = MC6847_TextModeCanvas(self.root)
+        self.display = DISPLAY_BACKENDS[self.cfg.display_backend](self.root)
         self.display.canvas.grid(row=0, column=0)
 
+        # Used for the graphics/semigraphics modes instead of the text display:
+        self.graphics_display = MC6847_GraphicsCanvas(self.root)
+        self.graphics_mode = False
+
         self._editor_window = None
+        self._basic_profile_window = None
 
         self.menubar.insert_command(index=3, label="BASIC editor", command=self.open_basic_editor)
 
@@ -348,6 +515,30 @@ class DragonTkinterGUI(BaseTkinterGUI):
         self.display.write_byte(cpu_cycles, op_address, address, value)
         return value
 
+    def flush_display(self):
+        periphery = self.machine.periphery
+        mode, css = get_vdg_mode(periphery.pia.get_vdg_control())
+        start = periphery.sam.get_display_address()
+        if mode == SG4 and start == VIDEO_RAM_START:
+            # The normal text screen
+            self.set_graphics_mode(False)
+            self.display.update()
+        else:
+            self.set_graphics_mode(True)
+            data = self.machine.cpu.memory.read_block(start, start + get_video_ram_size(mode))
+            self.graphics_display.update(data, mode, css)
+
+    def set_graphics_mode(self, graphics_mode):
+        if graphics_mode == self.graphics_mode:
+            return
+        self.graphics_mode = graphics_mode
+        if graphics_mode:
+            self.display.canvas.grid_remove()
+            self.graphics_display.canvas.grid(row=0, column=0)
+        else:
+            self.graphics_display.canvas.grid_remove()
+            self.display.canvas.grid()
+
     def close_basic_editor(self):
         if messagebox.askokcancel("Quit", "Do you really wish to close the Editor?"):
             self._editor_window.root.destroy()
@@ -363,6 +554,8 @@ class DragonTkinterGUI(BaseTkinterGUI):
             editmenu.add_command(label="load from DragonPy", command=self.command_load_from_DragonPy)
             editmenu.add_command(label="inject into DragonPy", command=self.command_inject_into_DragonPy)
             editmenu.add_command(label="inject + RUN into DragonPy", command=self.command_inject_and_run_into_DragonPy)
+            editmenu.add_separator()
+            editmenu.add_command(label="BASIC line profile...", command=self.command_basic_profile)
             self._editor_window.menubar.insert_cascade(index=2, label="DragonPy", menu=editmenu)
 
         self._editor_window.focus_text()
@@ -385,6 +578,21 @@ class DragonTkinterGUI(BaseTkinterGUI):
         self.add_user_input_and_wait("\n") # FIXME: Sometimes this input will be "ignored"
         self.add_user_input_and_wait("RUN\n")
 
+    def close_basic_profile(self):
+        self._basic_profile_window.root.destroy()
+        self._basic_profile_window = None
+
+    def command_basic_profile(self):
+        if self._basic_profile_window is None:
+            try:
+                self._basic_profile_window = BasicProfileWindow(self)
+            except RuntimeError as err:
+                messagebox.showerror("BASIC line profile", "Error: %s" % err)
+                return
+            self._basic_profile_window.root.protocol("WM_DELETE_WINDOW", self.close_basic_profile)
+        else:
+            self._basic_profile_window.refresh()
+
     # ##########################################################################
 
     # -------------------------------------------------------------------------------------
@@ -408,6 +616,39 @@ class DragonTkinterGUI(BaseTkinterGUI):
         messagebox.showinfo("TODO", "dump_program:\n%s" % "\n".join(lines))
 
 
+class BasicProfileWindow(object):
+    """
+    Display the CPU cycles per BASIC line, see: dragonpy.core.profiler.BasicLineProfiler
+    The profiler will be started, if it's not active via "dragonpy run --basic-profile"
+    """
+    def __init__(self, gui):
+        self.gui = gui
+        self.profiler = gui.machine.start_basic_profiler()
+
+        self.root = tk.Toplevel(gui.root)
+        self.root.title("%s - BASIC line profile" % gui.cfg.MACHINE_NAME)
+
+        self.text = scrolledtext.ScrolledText(
+            master=self.root, height=30, width=100
+        )
+        self.text.config(font=('courier', 11))
+        self.text.grid(row=0, column=0, columnspan=2, sticky=tk.NSEW)
+
+        tk.Button(self.root, text="refresh", command=self.refresh).grid(row=1, column=0)
+        tk.Button(self.root, text="reset", command=self.reset).grid(row=1, column=1)
+
+        self.refresh()
+
+    def refresh(self):
+        listing = self.gui.machine.get_basic_program()
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, self.profiler.get_report(listing))
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+
 class ScrolledTextGUI(BaseTkinterGUI):
     def __init__(self, *args, **kwargs):
         super(ScrolledTextGUI, self).__init__(*args, **kwargs)
@@ -424,6 +665,9 @@ class ScrolledTextGUI(BaseTkinterGUI):
         )
         self.text.grid(row=0, column=0, sticky=tk.NSEW)
 
+        # Output characters in turbo mode:
+        self.display_buffer = []
+
 #         self._editor_window = None
 #         self.menubar.insert_command(index=3, label="BASIC editor", command=self.open_basic_editor)
 
@@ -456,17 +700,30 @@ class ScrolledTextGUI(BaseTkinterGUI):
 
     def display_callback(self, char):
         log.debug("Add to text: %s", repr(char))
-        if char == "\x08":
-            # Delete last input char
-            self.text.delete(tk.INSERT + "-1c")
+        if self.turbo:
+            self.display_buffer.append(char)
         else:
-            # insert the new character:
-            self.text.insert(tk.END, char)
+            self.display_text(char)
+
+    def display_text(self, text):
+        for char in text:
+            if char == "\x08":
+                # Delete last input char
+                self.text.delete(tk.INSERT + "-1c")
+            else:
+                # insert the new character:
+                self.text.insert(tk.END, char)
+
+                # Set cursor to the END position:
+                self.text.mark_set(tk.INSERT, tk.END)
 
-            # scroll down if needed:
-            self.text.see(tk.END)
+        # scroll down if needed:
+        self.text.see(tk.END)
 
-            # Set cursor to the END position:
-            self.text.mark_set(tk.INSERT, tk.END)
+    def flush_display(self):
+        if self.display_buffer:
+            text = "".join(self.display_buffer)
+            self.display_buffer = []
+            self.display_text(text)
 
 
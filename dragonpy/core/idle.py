@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Idle loop detection: If the ROM only waits (e.g. polls the keyboard at
+    the "OK" prompt) and the user input queue is empty, the CPU cycles
+    are fast-forwarded instead of executing the same loop again and again.
+
+    Two kinds of loops are skipped, both without changing the machine state
+    that the executed loop would produce:
+
+    * wait loops: After one loop pass all CPU registers, the RAM and the
+      periphery state are unchanged. Complete passes are skipped up to
+      the next scheduled event (e.g. the 50Hz IRQ).
+
+    * delay loops: "LEAX -n,X / BNE loop" (or with Y). The index register
+      is decremented, but it will be stopped before the loop ends.
+
+    The CPU burst is stopped early after a skip of IDLE_BURST_STOP seconds.
+    The skipped time is not slept in the burst (that would block the Tk
+    event loop), but collected: The GUI sleeps it via the delay of the next
+    CPU run, see: pop_idle_time(). So an idle machine doesn't burn a host
+    core.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+
+from dragonpy.core.machine_state import MEMORY_SIZE
+from dragonpy.core.scheduler import get_scheduler
+
+
+log = logging.getLogger(__name__)
+
+
+MAX_LOOP_OPS = 64 # max. op count of one wait loop pass
+MAX_SKIP_CYCLES = 17784 # max. skip, if no event is scheduled
+PROBE_BACKOFF = 8 # bursts between two wait loop probes in unknown code
+IDLE_BURST_STOP = 0.01 # stop the CPU burst, if this seconds are skipped
+
+# LEA opcode -> (register attribute name, indexed postbyte register bits)
+# LEAU/LEAS are not used: They don't change the Z flag for the BNE.
+DELAY_LOOP_LEA = {
+    0x30: ("index_x", 0x00), # LEAX n,X
+    0x31: ("index_y", 0x20), # LEAY n,Y
+}
+BNE = 0x26
+DELAY_LOOP_BNE_OFFSET = 0xfc # -4: back to the LEA
+
+
+class IdleLoopDetector(object):
+    def __init__(self, machine, sleep=True):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.memory = machine.cpu.memory
+        self.user_input_queue = machine.user_input_queue
+        self.scheduler = get_scheduler(self.cpu)
+        self.sleep = sleep # sleep the skipped CPU cycles (after the CPU burst)?
+        self.cycles_per_sec = machine.cfg.CYCLES_PER_SEC
+
+        # known wait loop addresses of the machine ROM:
+        self.idle_addresses = frozenset(getattr(machine.cfg, "IDLE_LOOP_ADDRESSES", ()))
+
+        self.skipped_cycles = 0 # statistics
+        self.backoff = 0
+        self.idle_time = 0 # skipped seconds, that are not slept yet
+
+    def install(self):
+        """
+        Check for idle loops after every CPU burst.
+        """
+        self.cpu.call_sync_callbacks = self.call_sync_callbacks
+        self.cpu.burst_run = self.burst_run
+
+    def burst_run(self):
+        """
+        MC6809 CPU.burst_run() that stops if IDLE_BURST_STOP seconds are
+        skipped, so the skipped time can be slept outside of the burst.
+        """
+        cpu = self.cpu
+        get_and_call_next_op = cpu.get_and_call_next_op
+        call_sync_callbacks = cpu.call_sync_callbacks # maybe wrapped, e.g. by the profiler
+        inner_burst_op_count = cpu.inner_burst_op_count
+
+        for __ in range(cpu.outer_burst_op_count):
+            for __ in range(inner_burst_op_count):
+                get_and_call_next_op()
+            call_sync_callbacks()
+            if self.idle_time >= IDLE_BURST_STOP:
+                return
+
+    def pop_idle_time(self):
+        """
+        Returns the skipped seconds since the last call, that should be slept.
+        """
+        idle_time = self.idle_time
+        self.idle_time = 0
+        return idle_time
+
+    def call_sync_callbacks(self):
+        self.scheduler.call_sync_callbacks()
+        if self.user_input_queue.empty():
+            self.check()
+
+    def check(self):
+        pc = self.cpu.program_counter.value
+        if self.skip_delay_loop(pc):
+            return
+        if self.backoff > 0:
+            self.backoff -= 1
+            return
+        if self.skip_wait_loop(pc):
+            self.backoff = 0
+        else:
+            self.backoff = PROBE_BACKOFF
+
+    def _skip(self, loop_cycles, max_loops=None):
+        """
+        Returns how many loop passes can be skipped before the next
+        scheduled event. The CPU cycles are increased.
+        """
+        cycles = self.cpu.cycles
+        limit = min(self.scheduler.next_event_cycles, cycles + MAX_SKIP_CYCLES)
+        loops = (limit - 1 - cycles) // loop_cycles
+        if max_loops is not None:
+            loops = min(loops, max_loops)
+        if loops <= 0:
+            return 0
+        loops = int(loops)
+        skipped = loops * loop_cycles
+        self.cpu.cycles += skipped
+        self.skipped_cycles += skipped
+        if self.sleep:
+            self.idle_time += skipped / self.cycles_per_sec
+        return loops
+
+    def _get_registers(self):
+        cpu = self.cpu
+        return (
+            cpu.index_x.value, cpu.index_y.value,
+            cpu.user_stack_pointer.value, cpu.system_stack_pointer.value,
+            cpu.accu_a.value, cpu.accu_b.value,
+            cpu.direct_page.value, cpu.get_cc_value(),
+        )
+
+    def _get_periphery_state(self):
+        periphery = self.machine.periphery
+        if hasattr(periphery, "get_state"):
+            return periphery.get_state()
+
+    def skip_wait_loop(self, start_pc):
+        """
+        Run one loop pass from start_pc and skip the following passes, if
+        the pass didn't change anything.
+        """
+        cpu = self.cpu
+        memory = self.memory
+        get_and_call_next_op = cpu.get_and_call_next_op
+        program_counter = cpu.program_counter
+        idle_addresses = self.idle_addresses
+
+        registers = self._get_registers()
+        generation = memory.generation
+        memory_data = memory.read_block(0x0000, MEMORY_SIZE).tobytes()
+        periphery_state = self._get_periphery_state()
+        start_cycles = cpu.cycles
+
+        known_loop = False
+        for __ in range(MAX_LOOP_OPS):
+            get_and_call_next_op()
+            pc = program_counter.value
+            if pc in idle_addresses:
+                known_loop = True
+            if pc == start_pc:
+                break
+        else:
+            return False
+
+        loop_cycles = cpu.cycles - start_cycles
+        if loop_cycles <= 0 or self._get_registers() != registers:
+            return False
+        if memory.generation != generation and \
+                memory.read_block(0x0000, MEMORY_SIZE) != memory_data:
+            return False
+        if self._get_periphery_state() != periphery_state:
+            return False
+
+        loops = self._skip(loop_cycles)
+
+        # Probe a known ROM wait loop in every burst:
+        return loops > 0 or known_loop
+
+    def skip_delay_loop(self, pc):
+        """
+        Skip the passes of a "LEAX -n,X / BNE" delay loop, if the CPU
+        is in there.
+        """
+        memory = self.memory
+        code = memory.read_block(pc, pc + 4)
+        if len(code) == 4 and code[0] == BNE and code[1] == DELAY_LOOP_BNE_OFFSET:
+            lea_address = pc - 2
+            code = memory.read_block(lea_address, pc + 2)
+        else:
+            lea_address = pc
+        if len(code) != 4 or code[2] != BNE or code[3] != DELAY_LOOP_BNE_OFFSET:
+            return False
+        try:
+            register_name, register_bits = DELAY_LOOP_LEA[code[0]]
+        except KeyError:
+            return False
+        postbyte = code[1]
+        if postbyte & 0xf0 != register_bits | 0x10:
+            # no 5-bit negative offset or the wrong register
+            return False
+        decrement = 0x20 - (postbyte & 0x1f)
+
+        cpu = self.cpu
+        if pc != lea_address:
+            cpu.get_and_call_next_op() # BNE
+            if cpu.program_counter.value != lea_address:
+                return False # loop end
+
+        # Run one pass to get the CPU cycles:
+        start_cycles = cpu.cycles
+        cpu.get_and_call_next_op() # LEA
+        cpu.get_and_call_next_op() # BNE
+        if cpu.program_counter.value != lea_address:
+            return False # loop end
+        loop_cycles = cpu.cycles - start_cycles
+
+        register = getattr(cpu, register_name)
+        value = register.value
+        loops = self._skip(loop_cycles, max_loops=(value - 1) // decrement)
+        if loops:
+            register.set(value - loops * decrement)
+        return True
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Record the user input together with the CPU cycles at which the
+    machine consumed it and replay it at the same CPU cycles.
+
+    The record file contains JSON lines: The first line is a header,
+    every following line is one input event: [cpu cycles, input]
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import collections
+import json
+import logging
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from dragonpy.core.scheduler import get_scheduler
+
+
+log = logging.getLogger(__name__)
+
+
+INPUT_RECORD_VERSION = 1
+
+
+class InputQueue(queue.Queue):
+    """
+    The user input queue: keyboard input from the GUI to the machine.
+    """
+    def start(self, cpu):
+        """ called if the machine is ready to run """
+        self.cpu = cpu
+
+    def close(self):
+        pass
+
+
+class RecordingInputQueue(InputQueue):
+    """
+    Write every input event with the current CPU cycles into a file,
+    if the machine consumed it.
+    """
+    def __init__(self, cfg, filename):
+        InputQueue.__init__(self) # Python 2 Queue is a old-style class
+        self.cfg = cfg
+        self.filename = filename
+        self.cpu = None
+        self.record_file = None
+
+    def start(self, cpu):
+        self.cpu = cpu
+        self.record_file = open(self.filename, "w")
+        header = {
+            "version": INPUT_RECORD_VERSION,
+            "machine": self.cfg.MACHINE_NAME,
+            "start_cycles": cpu.cycles,
+        }
+        self.record_file.write(json.dumps(header, sort_keys=True) + "\n")
+        log.critical("Record user input into %r", self.filename)
+
+    def get(self, block=True, timeout=None):
+        item = InputQueue.get(self, block, timeout)
+        if self.record_file is not None:
+            self.record_file.write(json.dumps([self.cpu.cycles, item]) + "\n")
+            self.record_file.flush()
+        return item
+
+    def close(self):
+        if self.record_file is not None:
+            self.record_file.close()
+            self.record_file = None
+            log.critical("User input record %r closed.", self.filename)
+
+
+class ReplayInputQueue(InputQueue):
+    """
+    Returns the recorded input events not before the recorded CPU cycles.
+    All other input (e.g. from the keyboard) is ignored.
+
+    An input event is only pending (not empty()) if it's due. The next
+    event is scheduled, so the idle loop detection will not skip over it.
+    """
+    def __init__(self, cfg, filename):
+        InputQueue.__init__(self) # Python 2 Queue is a old-style class
+        self.cfg = cfg
+        self.filename = filename
+        self.cpu = None
+        self.scheduler = None
+        self.next_event = None
+
+        with open(filename, "r") as f:
+            self.header = json.loads(f.readline())
+            if self.header.get("version") != INPUT_RECORD_VERSION:
+                raise RuntimeError("Input record version %r is not supported (current version: %i)" % (
+                    self.header.get("version"), INPUT_RECORD_VERSION
+                ))
+            self.events = collections.deque(
+                tuple(json.loads(line)) for line in f if line.strip()
+            )
+
+        if self.header["machine"] != cfg.MACHINE_NAME:
+            raise RuntimeError("Input record is from %r and can't be used with %r" % (
+                self.header["machine"], cfg.MACHINE_NAME
+            ))
+        log.critical("Replay %i input events from %r", len(self.events), filename)
+
+    def start(self, cpu):
+        self.cpu = cpu
+        if cpu.cycles != self.header["start_cycles"]:
+            log.critical(
+                "Replay starts at CPU cycle %i, but record started at %i: The replay will be not exact!",
+                cpu.cycles, self.header["start_cycles"]
+            )
+        self.scheduler = get_scheduler(cpu)
+        self._schedule_next_event()
+
+    def _schedule_next_event(self):
+        if not self.events:
+            return
+        cycles = self.events[0][0]
+        if self.next_event is None:
+            self.next_event = self.scheduler.add_event(cycles, self._event_due)
+        else:
+            self.scheduler.reschedule_event(self.next_event, cycles)
+
+    def _event_due(self, cycles):
+        """ Nothing to do: The event is consumed via get() """
+        pass
+
+    def _is_due(self):
+        return bool(self.events) and self.cpu is not None and self.cpu.cycles >= self.events[0][0]
+
+    def put(self, item, block=True, timeout=None):
+        log.info("Ignore input %r while replaying", item)
+
+    def get(self, block=True, timeout=None):
+        if self._is_due():
+            cycles, item = self.events.popleft()
+            self._schedule_next_event()
+            return item
+        raise queue.Empty
+
+    def empty(self):
+        return not self._is_due()
+
+    def qsize(self):
+        return len(self.events)
+
+
+def get_user_input_queue(cfg):
+    """
+    Returns the user input queue that is setup via
+    cfg_dict "record_input" or "replay_input"
+    """
+    cfg_dict = cfg.cfg_dict
+    if cfg_dict.get("record_input"):
+        return RecordingInputQueue(cfg, cfg_dict["record_input"])
+    elif cfg_dict.get("replay_input"):
+        return ReplayInputQueue(cfg, cfg_dict["replay_input"])
+    return InputQueue()
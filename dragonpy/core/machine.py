@@ -20,6 +20,15 @@ import logging
 log=logging.getLogger(__name__)
 from MC6809.components.cpu6809 import CPU
 from dragonpy.components.memory import Memory
+from dragonpy.core.machine_state import write_state, read_state
+from dragonpy.core.boot_cache import boot_machine
+from dragonpy.core.coverage import Coverage
+from dragonpy.core.idle import IdleLoopDetector
+from dragonpy.core.input_recorder import get_user_input_queue
+from dragonpy.core.metrics import MachineMetrics
+from dragonpy.core.profiler import Profiler, SamplingProfiler, BasicLineProfiler
+from dragonpy.core.rewind import Rewind
+from dragonpy.core.scheduler import get_scheduler
 from dragonpy.utils.simple_debugger import print_exc_plus
 
 
@@ -51,6 +60,16 @@ class Machine(object):
         self.cpu = CPU(memory, self.cfg)
         memory.cpu = self.cpu  # FIXME
 
+        # Cycle scheduler for the periodic device work, replaces the
+        # MC6809 sync callbacks:
+        self.scheduler = get_scheduler(self.cpu)
+
+        self.metrics = None
+        if self.cfg.metrics or self.cfg.metrics_port:
+            self.metrics = MachineMetrics(self, interval=self.cfg.metrics_interval)
+            # Count the display writes, before the periphery gets the callback:
+            self.display_callback = self.metrics.wrap_display_callback(self.display_callback)
+
         try:
             self.periphery = self.periphery_class(
                 self.cfg, self.cpu, memory, self.display_callback, self.user_input_queue
@@ -67,11 +86,69 @@ class Machine(object):
         self.max_ops = self.cfg.cfg_dict["max_ops"]
         self.op_count = 0
 
+        self.rewind = None
+        if self.cfg.rewind_budget:
+            self.rewind = Rewind(self,
+                interval=self.cfg.rewind_interval,
+                keyframes=self.cfg.rewind_keyframes,
+                budget=self.cfg.rewind_budget * 1024 * 1024,
+            )
+            self.rewind.add_event()
+
+        self.idle_detector = None
+        if self.cfg.idle_skip:
+            self.idle_detector = IdleLoopDetector(self)
+            self.idle_detector.install()
+
+        self.profiler = None
+        if self.cfg.profile:
+            # Must be installed after the periphery registered the memory callbacks
+            self.profiler = Profiler(self)
+            self.profiler.install()
+
+        self.sampling_profiler = None
+        if self.cfg.sample_profile:
+            self.sampling_profiler = SamplingProfiler(self, interval=self.cfg.sample_interval)
+            self.sampling_profiler.install()
+
+        self.basic_profiler = None
+        if self.cfg.basic_profile:
+            self.start_basic_profiler()
+
+        self.coverage = None
+        if self.cfg.coverage:
+            self.coverage = Coverage(self)
+            self.coverage.install()
+
+        if self.metrics is not None:
+            # Must be installed after the periphery registered the memory callbacks
+            self.metrics.install()
+            self.metrics.start(json_path=self.cfg.metrics, port=self.cfg.metrics_port)
+
+    def start_basic_profiler(self):
+        """
+        Returns the BASIC line profiler, it will be started on the first call.
+        """
+        if self.basic_profiler is None:
+            self.basic_profiler = BasicLineProfiler(self, interval=self.cfg.sample_interval)
+            self.basic_profiler.install()
+        return self.basic_profiler
+
+    def _peek_word(self, address):
+        """
+        Read a word without counting CPU cycles or calling memory callbacks.
+        """
+        hi, lo = self.cpu.memory.read_block(address, address + 2)
+        return (hi << 8) + lo # 6809 is Big-Endian
+
+    def _poke_word(self, address, word):
+        self.cpu.memory.write_block(address, bytearray((word >> 8, word & 0xff)))
+
     def get_basic_program(self):
-        program_start = self.cpu.memory.read_word(self.machine_api.PROGRAM_START_ADDR)
-        variables_start = self.cpu.memory.read_word(self.machine_api.VARIABLES_START_ADDR)
-        array_start = self.cpu.memory.read_word(self.machine_api.ARRAY_START_ADDR)
-        free_space_start = self.cpu.memory.read_word(self.machine_api.FREE_SPACE_START_ADDR)
+        program_start = self._peek_word(self.machine_api.PROGRAM_START_ADDR)
+        variables_start = self._peek_word(self.machine_api.VARIABLES_START_ADDR)
+        array_start = self._peek_word(self.machine_api.ARRAY_START_ADDR)
+        free_space_start = self._peek_word(self.machine_api.FREE_SPACE_START_ADDR)
 
         program_end = variables_start - 1
         variables_end = array_start - 1
@@ -81,10 +158,7 @@ class Machine(object):
         log.critical("variables....: $%04x-$%04x", variables_start, variables_end)
         log.critical("array........: $%04x-$%04x", array_start, array_end)
 
-        dump = [
-            value
-            for addr, value in self.cpu.memory.iter_bytes(program_start, program_end)
-        ]
+        dump = list(self.cpu.memory.read_block(program_start, program_end))
         log.critical("Dump: %s", repr(dump))
         log_program_dump(dump)
 
@@ -96,20 +170,45 @@ class Machine(object):
         """
         save the given ASCII BASIC program listing into the emulator RAM.
         """
-        program_start = self.cpu.memory.read_word(
-            self.machine_api.PROGRAM_START_ADDR
-        )
+        program_start = self._peek_word(self.machine_api.PROGRAM_START_ADDR)
         tokens = self.machine_api.ascii_listing2program_dump(ascii_listing)
-        self.cpu.memory.load(program_start, tokens)
+        self.cpu.memory.write_block(program_start, tokens)
         log.critical("BASIC program injected into Memory.")
 
         # Update the BASIC addresses:
         program_end = program_start + len(tokens)
-        self.cpu.memory.write_word(self.machine_api.VARIABLES_START_ADDR, program_end)
-        self.cpu.memory.write_word(self.machine_api.ARRAY_START_ADDR, program_end)
-        self.cpu.memory.write_word(self.machine_api.FREE_SPACE_START_ADDR, program_end)
+        self._poke_word(self.machine_api.VARIABLES_START_ADDR, program_end)
+        self._poke_word(self.machine_api.ARRAY_START_ADDR, program_end)
+        self._poke_word(self.machine_api.FREE_SPACE_START_ADDR, program_end)
         log.critical("BASIC addresses updated.")
 
+    def save_state(self, path, compress=True):
+        """
+        Save the complete machine state (CPU, memory, periphery) into a file.
+        """
+        with open(path, "wb") as f:
+            write_state(self, f, compress=compress)
+        log.critical("Machine state saved to %r", path)
+
+    def load_state(self, path):
+        """
+        Restore the machine state saved with self.save_state()
+        """
+        with open(path, "rb") as f:
+            read_state(self, f)
+        if self.rewind is not None:
+            self.rewind.clear()
+
+    def rewind_seconds(self, seconds):
+        """
+        Go back in time: Restore the rewind snapshot from the given
+        seconds ago. Returns False if rewind is disabled or no snapshot exists.
+        """
+        if self.rewind is None:
+            log.critical("Rewind is disabled.")
+            return False
+        return self.rewind.rewind_seconds(seconds)
+
     def hard_reset(self):
         self.periphery.reset()
 #        from dragonpy.tests.test_base import print_cpu_state_data
@@ -117,9 +216,13 @@ class Machine(object):
         self.cpu.set_state(self.cpu_init_state)
 #        print_cpu_state_data(self.cpu.get_state())
         self.cpu.reset()
+        if self.rewind is not None:
+            self.rewind.clear()
 
     def quit(self):
         self.cpu.running = False
+        if self.metrics is not None:
+            self.metrics.stop()
 
 
 class MachineThread(threading.Thread):
@@ -173,8 +276,9 @@ class MachineGUI(object):
     def __init__(self, cfg):
         self.cfg = cfg
 
-        # Queue to send keyboard inputs from GUI to CPU Thread:
-        self.user_input_queue = queue.Queue()
+        # Queue to send keyboard inputs from GUI to CPU Thread
+        # (maybe with record/replay of the input):
+        self.user_input_queue = get_user_input_queue(cfg)
 
 
     def run(self, PeripheryClass, GUI_Class):
@@ -196,12 +300,33 @@ class MachineGUI(object):
             self.user_input_queue
         )
 
+        state_file = self.cfg.cfg_dict.get("load_state")
+        if state_file:
+            machine.load_state(state_file)
+        elif self.cfg.cfg_dict.get("boot_cache") and hasattr(self.cfg, "STARTUP_END_ADDR"):
+            try:
+                boot_machine(machine)
+            except RuntimeError as err:
+                log.critical("Boot until $%04x failed: %s", self.cfg.STARTUP_END_ADDR, err)
+                machine.hard_reset()
+
+        self.user_input_queue.start(machine.cpu)
         try:
             gui.mainloop(machine)
         except Exception as err:
             log.critical("GUI exception: %s", err)
             print_exc_plus()
         machine.quit()
+        self.user_input_queue.close()
+
+        if machine.profiler is not None:
+            machine.profiler.write_report(self.cfg.profile)
+        if machine.sampling_profiler is not None:
+            machine.sampling_profiler.write_collapsed(self.cfg.sample_profile)
+        if machine.basic_profiler is not None and self.cfg.basic_profile:
+            machine.basic_profiler.write_report(self.cfg.basic_profile)
+        if machine.coverage is not None:
+            machine.coverage.write(self.cfg.coverage)
 
         log.log(99, " --- END ---")
 
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Save/load the complete machine state in a compact binary format:
+
+        header: magic, format version, flags
+        CPU registers and cycles
+        64KB memory image
+        JSON data: machine name, keyboard queue and periphery state
+
+    Everything after the header may be compressed with zlib.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import logging
+import struct
+import zlib
+
+import dragonpy
+from dragonpy.core.scheduler import get_scheduler
+
+
+log = logging.getLogger(__name__)
+
+
+STATE_MAGIC = b"DPYSTATE"
+STATE_VERSION = 2
+
+FLAG_ZLIB = 0x01
+
+HEADER_STRUCT = struct.Struct(">8sHB") # magic, version, flags
+
+# X, Y, U, S, PC, A, B, DP, CC, last op address, IRQ enabled, cycles
+CPU_STRUCT = struct.Struct(">HHHHHBBBBHBQ")
+
+MEMORY_SIZE = 0x10000
+
+JSON_LEN_STRUCT = struct.Struct(">I")
+
+
+def get_cpu_data(cpu):
+    return CPU_STRUCT.pack(
+        cpu.index_x.value,
+        cpu.index_y.value,
+        cpu.user_stack_pointer.value,
+        cpu.system_stack_pointer.value,
+        cpu.program_counter.value,
+        cpu.accu_a.value,
+        cpu.accu_b.value,
+        cpu.direct_page.value,
+        cpu.get_cc_value(),
+        cpu.last_op_address,
+        1 if cpu.irq_enabled else 0,
+        cpu.cycles,
+    )
+
+
+def set_cpu_data(cpu, data):
+    (
+        x, y, u, s, pc, a, b, dp, cc, last_op_address, irq_enabled, cycles
+    ) = CPU_STRUCT.unpack(data)
+    cpu.index_x.set(x)
+    cpu.index_y.set(y)
+    cpu.user_stack_pointer.set(u)
+    cpu.system_stack_pointer.set(s)
+    cpu.program_counter.set(pc)
+    cpu.accu_a.set(a)
+    cpu.accu_b.set(b)
+    cpu.direct_page.set(dp)
+    cpu.set_cc(cc)
+    cpu.last_op_address = last_op_address
+    cpu.irq_enabled = bool(irq_enabled)
+    old_cycles = cpu.cycles
+    cpu.cycles = cycles
+
+    # The scheduled events should be called relative to the new cycles:
+    get_scheduler(cpu).move_cycles(old_cycles, cycles)
+
+
+def get_machine_data(machine):
+    """
+    Returns the state of the machine without CPU and memory as JSON bytes.
+    """
+    periphery = machine.periphery
+    if hasattr(periphery, "get_state"):
+        periphery_state = periphery.get_state()
+    else:
+        periphery_state = {}
+
+    data = {
+        "machine": machine.cfg.MACHINE_NAME,
+        "dragonpy_version": dragonpy.__version__,
+        "input_queue": list(machine.user_input_queue.queue),
+        "periphery": periphery_state,
+    }
+    return json.dumps(data, sort_keys=True).encode("utf-8")
+
+
+def parse_machine_data(machine, data):
+    """
+    Returns the dict from get_machine_data() bytes,
+    if the state is from the same machine.
+    """
+    json_data = json.loads(data.decode("utf-8"))
+    if json_data["machine"] != machine.cfg.MACHINE_NAME:
+        raise RuntimeError("Machine state is from %r and can't be loaded into %r" % (
+            json_data["machine"], machine.cfg.MACHINE_NAME
+        ))
+    return json_data
+
+
+def apply_machine_data(machine, json_data):
+    """
+    Restore the input queue and the periphery from the parse_machine_data() dict.
+    """
+    input_queue = machine.user_input_queue.queue
+    input_queue.clear()
+    input_queue.extend(json_data["input_queue"])
+
+    periphery = machine.periphery
+    if hasattr(periphery, "set_state"):
+        periphery.set_state(json_data["periphery"])
+
+
+def set_machine_data(machine, data):
+    """
+    Restore the input queue and the periphery from get_machine_data() bytes.
+    """
+    json_data = parse_machine_data(machine, data)
+    apply_machine_data(machine, json_data)
+    return json_data
+
+
+def get_json_data(machine):
+    data = get_machine_data(machine)
+    return JSON_LEN_STRUCT.pack(len(data)) + data
+
+
+def write_state(machine, f, compress=True):
+    """
+    Write the machine state into the given binary file object.
+    The memory is written directly from the memory array (no copy).
+    """
+    flags = FLAG_ZLIB if compress else 0
+    f.write(HEADER_STRUCT.pack(STATE_MAGIC, STATE_VERSION, flags))
+
+    chunks = (
+        get_cpu_data(machine.cpu),
+        machine.cpu.memory.read_block(0x0000, MEMORY_SIZE),
+        get_json_data(machine),
+    )
+    if compress:
+        compressor = zlib.compressobj()
+        for chunk in chunks:
+            f.write(compressor.compress(chunk))
+        f.write(compressor.flush())
+    else:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def read_state(machine, f):
+    """
+    Restore the machine state from the given binary file object.
+    """
+    data = memoryview(f.read())
+
+    magic, version, flags = HEADER_STRUCT.unpack(data[:HEADER_STRUCT.size])
+    if magic != STATE_MAGIC:
+        raise RuntimeError("No DragonPy machine state!")
+    if version != STATE_VERSION:
+        raise RuntimeError("Machine state format version %i is not supported (current version: %i)" % (
+            version, STATE_VERSION
+        ))
+
+    data = data[HEADER_STRUCT.size:]
+    if flags & FLAG_ZLIB:
+        data = memoryview(zlib.decompress(data))
+
+    pos = CPU_STRUCT.size
+    cpu_data = data[:pos]
+    memory_data = data[pos:pos + MEMORY_SIZE]
+    pos += MEMORY_SIZE
+    json_len, = JSON_LEN_STRUCT.unpack(data[pos:pos + JSON_LEN_STRUCT.size])
+    pos += JSON_LEN_STRUCT.size
+    json_data = parse_machine_data(machine, data[pos:pos + json_len].tobytes())
+
+    set_cpu_data(machine.cpu, cpu_data.tobytes())
+    machine.cpu.memory.write_block(0x0000, memory_data)
+    apply_machine_data(machine, json_data)
+
+    log.critical("Machine state (DragonPy v%s) loaded, PC: $%04x cycles: %i",
+        json_data["dragonpy_version"], machine.cpu.program_counter.value, machine.cpu.cycles
+    )
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Metrics registry with counters and gauges for the emulator performance,
+    e.g.: CPU cycles, cycles/sec, burst durations, memory callback calls
+    per device, input queue depth and display writes/sec.
+
+    The values can be exported periodically as JSON lines into a file
+    and/or via a local HTTP endpoint in the Prometheus text format:
+
+        dragonpy run --metrics metrics.jsonl --metrics-port 9123
+        curl http://127.0.0.1:9123/metrics
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import collections
+import json
+import logging
+import threading
+import time
+
+from six.moves import BaseHTTPServer
+
+from dragonpy.core.profiler import wrap_memory_callbacks
+
+
+log = logging.getLogger(__name__)
+
+
+COUNTER = "counter"
+GAUGE = "gauge"
+
+METRICS_INTERVAL = 1 # seconds between two updates/exports
+
+
+def format_labels(labels):
+    """
+    >>> format_labels((("device", 'P"IA'), ("access", "read")))
+    '{device="P\\\\"IA",access="read"}'
+    >>> format_labels(())
+    ''
+    """
+    if not labels:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (
+            key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for key, value in labels
+    )
+
+
+class Metric(object):
+    __slots__ = ("name", "metric_type", "help", "labels", "value", "func")
+
+    def __init__(self, name, metric_type, help, labels=(), func=None):
+        self.name = name
+        self.metric_type = metric_type
+        self.help = help
+        self.labels = labels # tuple of (key, value) pairs
+        self.value = 0
+        self.func = func # returns the current value, if given
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+    def get_value(self):
+        if self.func is not None:
+            return self.func()
+        return self.value
+
+    @property
+    def key(self):
+        return self.name + format_labels(self.labels)
+
+
+class MetricsRegistry(object):
+    def __init__(self):
+        self.metrics = collections.OrderedDict() # key -> Metric
+
+    def _add(self, name, metric_type, help, labels, func):
+        if labels:
+            labels = tuple(sorted(labels.items()))
+        else:
+            labels = ()
+        metric = Metric(name, metric_type, help, labels, func)
+        if metric.key in self.metrics:
+            raise RuntimeError("Metric %r is already registered" % metric.key)
+        self.metrics[metric.key] = metric
+        return metric
+
+    def counter(self, name, help, labels=None, func=None):
+        return self._add(name, COUNTER, help, labels, func)
+
+    def gauge(self, name, help, labels=None, func=None):
+        return self._add(name, GAUGE, help, labels, func)
+
+    def get_values(self):
+        """
+        Returns a dict: metric key -> current value
+        """
+        return collections.OrderedDict(
+            (key, metric.get_value()) for key, metric in self.metrics.items()
+        )
+
+    def get_json_line(self, now=None):
+        if now is None:
+            now = time.time()
+        return json.dumps({"time": now, "metrics": self.get_values()})
+
+    def get_prometheus_text(self):
+        # All samples of one metric name must be in one group:
+        groups = collections.OrderedDict()
+        for metric in self.metrics.values():
+            groups.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name, metrics in groups.items():
+            lines.append("# HELP %s %s" % (name, metrics[0].help))
+            lines.append("# TYPE %s %s" % (name, metrics[0].metric_type))
+            for metric in metrics:
+                lines.append("%s %s" % (metric.key, metric.get_value()))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        content = self.server.registry.get_prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        log.debug("metrics HTTP: " + format, *args)
+
+
+class MachineMetrics(object):
+    """
+    The metrics of one Machine instance.
+
+    The counters are updated in the CPU thread. The rates (e.g.: cycles/sec)
+    are calculated every 'interval' seconds in a background thread, that
+    also writes the JSON lines.
+    """
+    def __init__(self, machine, interval=METRICS_INTERVAL):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.interval = interval
+        self.registry = registry = MetricsRegistry()
+
+        cpu = self.cpu
+        user_input_queue = machine.user_input_queue
+
+        registry.counter("dragonpy_cpu_cycles_total", "Emulated CPU cycles",
+            func=lambda: cpu.cycles
+        )
+        self.ops = registry.counter("dragonpy_cpu_ops_total",
+            "Executed CPU instructions (counted per inner burst)"
+        )
+        self.cycles_per_sec = registry.gauge("dragonpy_cpu_cycles_per_second",
+            "Emulated CPU cycles per second"
+        )
+        self.bursts = registry.counter("dragonpy_cpu_bursts_total", "CPU run() calls")
+        self.burst_duration = registry.counter("dragonpy_cpu_burst_duration_seconds_total",
+            "Duration of all CPU run() calls"
+        )
+        self.burst_duration_max = registry.gauge("dragonpy_cpu_burst_duration_max_seconds",
+            "Longest CPU run() call in the last interval"
+        )
+        registry.gauge("dragonpy_input_queue_depth", "Pending user input",
+            func=user_input_queue.qsize
+        )
+        self.display_writes = registry.counter("dragonpy_display_writes_total",
+            "Display callback calls"
+        )
+        self.display_writes_per_sec = registry.gauge("dragonpy_display_writes_per_second",
+            "Display callback calls per second"
+        )
+        self._max_burst = 0
+        self._last_update = None
+        self._last_cycles = 0
+        self._last_display_writes = 0
+
+        self._json_file = None
+        self._http_server = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def wrap_display_callback(self, display_callback):
+        """
+        Must be called before the periphery is created with the display callback.
+        """
+        if not callable(display_callback):
+            return display_callback # e.g.: unittest periphery
+
+        display_writes = self.display_writes
+
+        def counting_display_callback(*args):
+            display_writes.value += 1
+            return display_callback(*args)
+
+        return counting_display_callback
+
+    def install(self):
+        """
+        Must be called after all memory callbacks are registered.
+        """
+        cpu = self.cpu
+
+        # Count the memory callback calls per device:
+        registry = self.registry
+        device_counters = {}
+
+        def get_wrapper(func, device_name, access_type, start_addr, end_addr):
+            try:
+                counter = device_counters[device_name]
+            except KeyError:
+                counter = device_counters[device_name] = registry.counter(
+                    "dragonpy_memory_callback_calls_total", "Memory callback/middleware calls",
+                    labels={"device": device_name}
+                )
+
+            def counting_callback(*args):
+                counter.value += 1
+                return func(*args)
+
+            counting_callback.__name__ = func.__name__
+            return counting_callback
+
+        wrap_memory_callbacks(cpu.memory, get_wrapper)
+
+        idle_detector = self.machine.idle_detector
+        if idle_detector is not None:
+            registry.counter("dragonpy_idle_skipped_cycles_total",
+                "CPU cycles fast-forwarded in ROM idle loops",
+                func=lambda: idle_detector.skipped_cycles
+            )
+
+        # Count the ops after every inner burst:
+        call_sync_callbacks = cpu.call_sync_callbacks
+        ops = self.ops
+
+        def counting_sync_callbacks():
+            ops.value += cpu.inner_burst_op_count
+            call_sync_callbacks()
+
+        cpu.call_sync_callbacks = counting_sync_callbacks
+
+        # Measure the CPU bursts:
+        run = cpu.run
+
+        def timed_run(*args, **kwargs):
+            start_time = time.time()
+            try:
+                return run(*args, **kwargs)
+            finally:
+                self.add_burst(time.time() - start_time)
+
+        cpu.run = timed_run
+
+    def add_burst(self, duration):
+        self.bursts.value += 1
+        self.burst_duration.value += duration
+        if duration > self._max_burst:
+            self._max_burst = duration
+
+    def update(self, now=None):
+        """
+        Calculate the rates since the last call.
+        """
+        if now is None:
+            now = time.time()
+        cycles = self.cpu.cycles
+        display_writes = self.display_writes.value
+        if self._last_update is not None and now > self._last_update:
+            duration = now - self._last_update
+            self.cycles_per_sec.set((cycles - self._last_cycles) / duration)
+            self.display_writes_per_sec.set((display_writes - self._last_display_writes) / duration)
+        self.burst_duration_max.set(self._max_burst)
+        self._max_burst = 0
+        self._last_update = now
+        self._last_cycles = cycles
+        self._last_display_writes = display_writes
+
+    #--------------------------------------------------------------------------
+
+    def start(self, json_path=None, port=None):
+        """
+        Start the background thread and the exports.
+        """
+        if json_path:
+            self._json_file = open(json_path, "a")
+            log.critical("Write metrics every %s sec. into %r", self.interval, json_path)
+        if port:
+            self._http_server = BaseHTTPServer.HTTPServer(("127.0.0.1", port), MetricsRequestHandler)
+            self._http_server.registry = self.registry
+            http_thread = threading.Thread(
+                target=self._http_server.serve_forever, name="metrics-HTTP"
+            )
+            http_thread.daemon = True
+            http_thread.start()
+            log.critical("Metrics at http://127.0.0.1:%i/metrics", self._http_server.server_port)
+
+        self.update()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.update()
+            if self._json_file is not None:
+                self._json_file.write(self.registry.get_json_line() + "\n")
+                self._json_file.flush()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+        if self._json_file is not None:
+            # Write the last values:
+            self.update()
+            self._json_file.write(self.registry.get_json_line() + "\n")
+            self._json_file.close()
+            self._json_file = None
@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Execution histograms: Count the executed instructions per PC address
+    and per opcode and the memory callback/middleware calls per device
+    (e.g.: PIA, SAM, VIA, ACIA).
+
+    All counters are preallocated arrays, so counting is only one
+    index operation. Activate via:
+
+        dragonpy --machine=Dragon32 run --profile profile.txt
+
+    The sampling profiler only records the PC every N CPU cycles. It's
+    cheap enough for long sessions. The samples are aggregated into the
+    address ranges of the machine mem info and written as collapsed
+    stacks, e.g. for flamegraph.pl:
+
+        dragonpy --machine=Dragon32 run --sample-profile stacks.txt
+        flamegraph.pl stacks.txt > flamegraph.svg
+
+    The BASIC line profiler samples the current line number of the BASIC
+    interpreter (CURLIN) in the same way. The CPU cycles per line are
+    joined with the program listing:
+
+        dragonpy --machine=Dragon32 run --basic-profile basic_profile.txt
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import array
+import collections
+import logging
+
+from MC6809.components.MC6809data.MC6809_data_utils import MC6809OP_DATA_DICT
+
+from dragonpy.core.configs import DummyMemInfo
+from dragonpy.core.machine_state import MEMORY_SIZE
+from dragonpy.core.scheduler import get_scheduler
+
+
+log = logging.getLogger(__name__)
+
+
+# Opcode counter index: one byte opcodes, page 2 ($10xx) and page 3 ($11xx)
+OPCODE_PAGES = {
+    0x10: 0x100,
+    0x11: 0x200,
+}
+OPCODE_COUNT = 0x300
+
+# The memory callback/middleware maps to count:
+CALLBACK_MAPS = (
+    ("_read_byte_callbacks", "read byte"),
+    ("_read_word_callbacks", "read word"),
+    ("_write_byte_callbacks", "write byte"),
+    ("_write_word_callbacks", "write word"),
+    ("_read_byte_middleware", "read byte middleware"),
+    ("_read_word_middleware", "read word middleware"),
+    ("_write_byte_middleware", "write byte middleware"),
+    ("_write_word_middleware", "write word middleware"),
+)
+
+REPORT_TOP_ADDRESSES = 100
+REPORT_TOP_BASIC_LINES = 20
+
+BASIC_DIRECT_MODE = 0xffff # CURLIN value, if no program runs
+
+
+def opcode_from_index(index):
+    """
+    >>> "$%x" % opcode_from_index(0x12)
+    '$12'
+    >>> "$%x" % opcode_from_index(0x10e)
+    '$100e'
+    >>> "$%x" % opcode_from_index(0x23f)
+    '$113f'
+    """
+    page, opcode = divmod(index, 0x100)
+    if page:
+        return ((0x10 + page - 1) << 8) + opcode
+    return opcode
+
+
+def get_device_name(func):
+    """
+    The device is the class of a bound method, e.g.: "PIA"
+    A wrapped callback carries the name of the original device.
+    """
+    try:
+        return func.device_name
+    except AttributeError:
+        pass
+    try:
+        return func.__self__.__class__.__name__
+    except AttributeError:
+        return func.__module__
+
+
+def _wrap_callback(get_wrapper, func, access_type, start_addr, end_addr):
+    device_name = get_device_name(func)
+    wrapper = get_wrapper(func, device_name, access_type, start_addr, end_addr)
+    wrapper.device_name = device_name # for the next wrap_memory_callbacks() call
+    return wrapper
+
+
+def wrap_memory_callbacks(memory, get_wrapper):
+    """
+    Replace all registered memory callbacks/middlewares by the function
+    get_wrapper(func, device_name, access_type, start_addr, end_addr) returns.
+    """
+    for attr_name, access_type in CALLBACK_MAPS:
+        address_range_map = getattr(memory, attr_name)
+        address_range_map.ranges = [
+            (start_addr, end_addr, _wrap_callback(
+                get_wrapper, func, access_type, start_addr, end_addr
+            ))
+            for start_addr, end_addr, func in address_range_map.ranges
+        ]
+        address_range_map._update() # The pages are the same, only the cached lookups are cleared
+
+
+class Profiler(object):
+    def __init__(self, machine):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.memory = machine.cpu.memory
+
+        self.pc_counts = array.array("L", [0]) * MEMORY_SIZE
+        self.opcode_counts = array.array("L", [0]) * OPCODE_COUNT
+
+        # Filled in self.install():
+        self.callback_info = [] # (device name, access type, function name, start, end)
+        self.callback_counts = array.array("L")
+
+    def install(self):
+        """
+        Must be called after all memory callbacks are registered.
+        """
+        self._wrap_callbacks()
+        self._wrap_get_and_call_next_op()
+
+    def _wrap_get_and_call_next_op(self):
+        cpu = self.cpu
+        get_and_call_next_op = cpu.get_and_call_next_op
+        program_counter = cpu.program_counter
+        mem = self.memory._mem # read the opcode without a memory access
+        pc_counts = self.pc_counts
+        opcode_counts = self.opcode_counts
+        opcode_pages = OPCODE_PAGES
+
+        def profile_next_op():
+            pc = program_counter.value
+            pc_counts[pc] += 1
+            opcode = mem[pc]
+            if opcode in opcode_pages:
+                opcode = opcode_pages[opcode] + mem[(pc + 1) & 0xffff]
+            opcode_counts[opcode] += 1
+            get_and_call_next_op()
+
+        cpu.get_and_call_next_op = profile_next_op
+
+    def _get_counting_callback(self, func, device_name, access_type, start_addr, end_addr):
+        index = len(self.callback_info)
+        self.callback_info.append(
+            (device_name, access_type, func.__name__, start_addr, end_addr)
+        )
+        self.callback_counts.append(0)
+        counts = self.callback_counts
+
+        def counting_callback(*args):
+            counts[index] += 1
+            return func(*args)
+
+        counting_callback.__name__ = func.__name__
+        return counting_callback
+
+    def _wrap_callbacks(self):
+        wrap_memory_callbacks(self.memory, self._get_counting_callback)
+
+    def reset(self):
+        for counts in (self.pc_counts, self.opcode_counts, self.callback_counts):
+            for index in range(len(counts)):
+                counts[index] = 0
+
+    #--------------------------------------------------------------------------
+
+    def _mem_info(self, address):
+        mem_info = self.machine.cfg.mem_info
+        if isinstance(mem_info, DummyMemInfo):
+            return "$%04x" % address
+        return mem_info.get_shortest(address)
+
+    def get_opcode_stats(self):
+        """
+        Returns a list of (count, opcode, mnemonic) sorted by count
+        """
+        stats = []
+        for index, count in enumerate(self.opcode_counts):
+            if count:
+                opcode = opcode_from_index(index)
+                try:
+                    mnemonic = MC6809OP_DATA_DICT[opcode]["mnemonic"]
+                except KeyError:
+                    mnemonic = "???"
+                stats.append((count, opcode, mnemonic))
+        stats.sort(key=lambda item: (-item[0], item[1]))
+        return stats
+
+    def get_address_stats(self, limit=None):
+        """
+        Returns a list of (count, address) sorted by count
+        """
+        stats = [(count, address) for address, count in enumerate(self.pc_counts) if count]
+        stats.sort(key=lambda item: (-item[0], item[1]))
+        if limit is not None:
+            stats = stats[:limit]
+        return stats
+
+    def get_device_stats(self):
+        """
+        Returns a sorted list of (total count, device name, callback stats)
+        """
+        devices = collections.defaultdict(list)
+        for info, count in zip(self.callback_info, self.callback_counts):
+            device_name = info[0]
+            devices[device_name].append((count,) + info[1:])
+
+        stats = []
+        for device_name, callback_stats in devices.items():
+            callback_stats.sort(key=lambda item: (-item[0], item[3]))
+            total = sum(item[0] for item in callback_stats)
+            stats.append((total, device_name, callback_stats))
+        stats.sort(key=lambda item: (-item[0], item[1]))
+        return stats
+
+    def get_report(self, top_addresses=REPORT_TOP_ADDRESSES):
+        op_count = sum(self.opcode_counts)
+        total = max(op_count, 1)
+        lines = [
+            "DragonPy profile of %s" % self.machine.cfg.MACHINE_NAME,
+            "%i executed instructions in %i CPU cycles" % (op_count, self.cpu.cycles),
+            "",
+            "Instructions per opcode:",
+            "     count       %  opcode  mnemonic",
+        ]
+        for count, opcode, mnemonic in self.get_opcode_stats():
+            lines.append("%10i %6.2f%%  $%04x   %s" % (
+                count, count / total * 100, opcode, mnemonic
+            ))
+
+        lines += [
+            "",
+            "Instructions per address (top %i):" % top_addresses,
+            "     count       %  mem info",
+        ]
+        for count, address in self.get_address_stats(limit=top_addresses):
+            lines.append("%10i %6.2f%%  %s" % (
+                count, count / total * 100, self._mem_info(address)
+            ))
+
+        lines += [
+            "",
+            "Memory callback calls per device:",
+        ]
+        for total, device_name, callback_stats in self.get_device_stats():
+            lines.append("%10i  %s" % (total, device_name))
+            for count, access_type, func_name, start_addr, end_addr in callback_stats:
+                lines.append("%10i    $%04x-$%04x %s: %s" % (
+                    count, start_addr, end_addr, access_type, func_name
+                ))
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            f.write(self.get_report())
+        log.critical("Profile report written to %r", path)
+
+
+def get_stack_frames(mem_info_table, address):
+    """
+    Returns the names of all mem info ranges that contains the address,
+    the outermost (biggest) range first.
+
+    >>> table = (
+    ...     (0x8000, 0xbfff, "BASIC ROM"),
+    ...     (0xa1b1, 0xa1cb, "POLCAT; keyboard"),
+    ...     (0xa1c1, 0xa1c1, "scan"),
+    ... )
+    >>> get_stack_frames(table, 0xa1c1)
+    ['$8000-$bfff BASIC ROM', '$a1b1-$a1cb POLCAT, keyboard', '$a1c1 scan']
+    >>> get_stack_frames(table, 0x1234)
+    ['$1200-$12ff unknown']
+    """
+    ranges = [
+        (end - start, start, end, txt)
+        for start, end, txt in mem_info_table
+        if start <= address <= end
+    ]
+    if not ranges:
+        page = address & 0xff00
+        return ["$%04x-$%04x unknown" % (page, page + 0xff)]
+
+    ranges.sort(key=lambda item: (-item[0], item[1]))
+    frames = []
+    for size, start, end, txt in ranges:
+        if start == end:
+            frame = "$%04x %s" % (start, txt)
+        else:
+            frame = "$%04x-$%04x %s" % (start, end, txt)
+        frames.append(frame.replace(";", ",")) # ";" is the frame separator
+    return frames
+
+
+class SamplingProfiler(object):
+    """
+    Sample the PC via the cycle scheduler every 'interval' CPU cycles.
+    """
+    def __init__(self, machine, interval=1000):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.interval = interval
+        self.samples = array.array("L", [0]) * MEMORY_SIZE
+        self.event = None
+
+    def install(self):
+        self.event = get_scheduler(self.cpu).add_periodic_event(self.interval, self.sample)
+
+    def uninstall(self):
+        get_scheduler(self.cpu).remove_event(self.event)
+        self.event = None
+
+    def sample(self, cycles):
+        self.samples[self.cpu.program_counter.value] += 1
+
+    def reset(self):
+        samples = self.samples
+        for address in range(MEMORY_SIZE):
+            samples[address] = 0
+
+    def _get_mem_info_table(self):
+        mem_info = self.machine.cfg.mem_info
+        if isinstance(mem_info, DummyMemInfo):
+            return ()
+        return mem_info.MEM_INFO
+
+    def get_collapsed_stacks(self):
+        """
+        Returns a dict: "machine;range;sub range" -> sample count
+        """
+        mem_info_table = self._get_mem_info_table()
+        root = self.machine.cfg.MACHINE_NAME.replace(";", ",")
+        stacks = collections.Counter()
+        for address, count in enumerate(self.samples):
+            if count:
+                frames = [root] + get_stack_frames(mem_info_table, address)
+                stacks[";".join(frames)] += count
+        return stacks
+
+    def get_collapsed_text(self):
+        stacks = self.get_collapsed_stacks()
+        lines = [
+            "%s %i" % (stack, count)
+            for stack, count in sorted(stacks.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            f.write(self.get_collapsed_text())
+        log.critical("%i PC samples written to %r", sum(self.samples), path)
+
+
+def get_line_number(ascii_line):
+    """
+    >>> get_line_number('10 PRINT "HELLO"')
+    10
+    >>> get_line_number('') is None
+    True
+    """
+    number = ascii_line.split(" ", 1)[0]
+    if number.isdigit():
+        return int(number)
+
+
+class BasicLineProfiler(object):
+    """
+    Sample the current BASIC line number every 'interval' CPU cycles.
+    Each sample accounts 'interval' CPU cycles to the line.
+    """
+    def __init__(self, machine, interval=1000, curlin_addr=None):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.interval = interval
+        if curlin_addr is None:
+            try:
+                curlin_addr = machine.cfg.CURLIN_ADDR
+            except AttributeError:
+                raise RuntimeError(
+                    "BASIC line profiler is not supported by %s (No CURLIN_ADDR)" % machine.cfg.MACHINE_NAME
+                )
+        self.curlin_addr = curlin_addr
+        self.samples = array.array("L", [0]) * 0x10000 # per line number
+        self.event = None
+
+    def install(self):
+        self.event = get_scheduler(self.cpu).add_periodic_event(self.interval, self.sample)
+
+    def uninstall(self):
+        get_scheduler(self.cpu).remove_event(self.event)
+        self.event = None
+
+    def sample(self, cycles):
+        hi, lo = self.cpu.memory.read_block(self.curlin_addr, self.curlin_addr + 2)
+        self.samples[(hi << 8) + lo] += 1
+
+    def reset(self):
+        samples = self.samples
+        for line_number in range(len(samples)):
+            samples[line_number] = 0
+
+    def get_line_cycles(self):
+        """
+        Returns a dict: BASIC line number -> CPU cycles
+        (without the direct mode)
+        """
+        interval = self.interval
+        return dict(
+            (line_number, count * interval)
+            for line_number, count in enumerate(self.samples)
+            if count and line_number != BASIC_DIRECT_MODE
+        )
+
+    def get_report(self, listing, top_lines=REPORT_TOP_BASIC_LINES):
+        """
+        Returns the CPU cycles per line joined with the given ASCII
+        listing, e.g.: from machine.get_basic_program()
+        """
+        line_cycles = self.get_line_cycles()
+        program_cycles = sum(line_cycles.values())
+        total = max(program_cycles, 1)
+        direct_cycles = self.samples[BASIC_DIRECT_MODE] * self.interval
+
+        code = {}
+        for ascii_line in listing:
+            line_number = get_line_number(ascii_line)
+            if line_number is not None:
+                code[line_number] = ascii_line
+
+        lines = [
+            "BASIC line profile: %i CPU cycles in program lines, %i in direct mode" % (
+                program_cycles, direct_cycles
+            ),
+            "(sampled every %i CPU cycles)" % self.interval,
+            "",
+            "Top %i lines:" % top_lines,
+        ]
+        stats = sorted(line_cycles.items(), key=lambda item: (-item[1], item[0]))
+        for line_number, cycles in stats[:top_lines]:
+            lines.append("%10i %6.2f%%  %s" % (
+                cycles, cycles / total * 100,
+                code.get(line_number, "%i (not in listing)" % line_number)
+            ))
+
+        lines += ["", "Listing:"]
+        for line_number in sorted(code):
+            cycles = line_cycles.get(line_number, 0)
+            lines.append("%10i %6.2f%%  %s" % (
+                cycles, cycles / total * 100, code[line_number]
+            ))
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        listing = self.machine.get_basic_program()
+        with open(path, "w") as f:
+            f.write(self.get_report(listing))
+        log.critical("BASIC line profile written to %r", path)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Rewind the machine: A snapshot is taken every N CPU cycles into a
+    ring buffer with a limited memory budget.
+
+    Every K-th snapshot is a keyframe with the complete memory image.
+    All other snapshots store only the 256 Bytes memory pages that are
+    changed since the previous snapshot: XORed with the previous page
+    content (mostly zeros) and compressed with zlib.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import binascii
+import collections
+import logging
+import zlib
+
+from dragonpy.components.memory import PAGE_SHIFT
+from dragonpy.core.machine_state import get_cpu_data, set_cpu_data, \
+    get_machine_data, set_machine_data, MEMORY_SIZE
+from dragonpy.core.scheduler import get_scheduler
+
+
+log = logging.getLogger(__name__)
+
+
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+# Default values, can be changed via cfg_dict:
+REWIND_INTERVAL = 17784 # CPU cycles: one 50Hz frame, see SAM.IRQ_CYCLES
+REWIND_KEYFRAMES = 50 # Store the complete memory every 50 snapshots
+REWIND_BUDGET = 8 * 1024 * 1024 # Bytes
+
+
+def xor_bytes(data1, data2):
+    """
+    >>> xor_bytes(b"\\x00\\xff\\x0f", b"\\x01\\xff\\xf0") == b"\\x01\\x00\\xff"
+    True
+    """
+    value = int(binascii.hexlify(data1), 16) ^ int(binascii.hexlify(data2), 16)
+    return binascii.unhexlify("%0*x" % (len(data1) * 2, value))
+
+
+class RewindSnapshot(object):
+    __slots__ = ("cycles", "cpu_data", "machine_data", "pages", "memory_data")
+
+    def __init__(self, cycles, cpu_data, machine_data, pages, memory_data):
+        self.cycles = cycles
+        self.cpu_data = cpu_data
+        self.machine_data = machine_data
+        self.pages = pages # None for a keyframe
+        self.memory_data = memory_data # zlib compressed
+
+    @property
+    def is_keyframe(self):
+        return self.pages is None
+
+    @property
+    def size(self):
+        size = len(self.cpu_data) + len(self.machine_data) + len(self.memory_data)
+        if self.pages is not None:
+            size += len(self.pages)
+        return size
+
+
+class Rewind(object):
+    """
+    Snapshot ring buffer to rewind the machine, e.g.:
+
+        machine.rewind.rewind_seconds(5)
+    """
+    def __init__(self, machine, interval=REWIND_INTERVAL, keyframes=REWIND_KEYFRAMES, budget=REWIND_BUDGET):
+        self.machine = machine
+        self.cpu = machine.cpu
+        self.memory = machine.cpu.memory
+        self.interval = interval
+        self.keyframes = keyframes
+        self.budget = budget
+
+        self.snapshots = collections.deque()
+        self.total_size = 0
+        self.keyframe_count = 0
+
+        # The memory at the last snapshot, to build the XOR delta:
+        self._last_memory = bytearray(MEMORY_SIZE)
+        self._last_generation = None
+        self._since_keyframe = 0
+
+    def add_event(self):
+        get_scheduler(self.cpu).add_periodic_event(self.interval, self.snapshot_event)
+
+    def snapshot_event(self, cycles):
+        self.take_snapshot()
+
+    def _get_keyframe(self):
+        memory_data = self.memory.read_block(0x0000, MEMORY_SIZE)
+        self._last_memory[:] = memory_data
+        return None, zlib.compress(memory_data, 1)
+
+    def _get_delta(self):
+        pages = self.memory.get_changed_pages(self._last_generation)
+        if not pages:
+            return bytearray(), b""
+
+        read_block = self.memory.read_block
+        last_memory = self._last_memory
+        new_data = []
+        old_data = []
+        for page in pages:
+            start = page << PAGE_SHIFT
+            end = start + PAGE_SIZE
+            data = read_block(start, end).tobytes()
+            new_data.append(data)
+            old_data.append(bytes(last_memory[start:end]))
+            last_memory[start:end] = data
+
+        delta = xor_bytes(b"".join(new_data), b"".join(old_data))
+        return bytearray(pages), zlib.compress(delta, 1)
+
+    def take_snapshot(self):
+        generation = self.memory.generation
+        if self._last_generation is None or self._since_keyframe >= self.keyframes:
+            pages, memory_data = self._get_keyframe()
+            self._since_keyframe = 1
+        else:
+            pages, memory_data = self._get_delta()
+            self._since_keyframe += 1
+        self._last_generation = generation
+
+        snapshot = RewindSnapshot(
+            cycles=self.cpu.cycles,
+            cpu_data=get_cpu_data(self.cpu),
+            machine_data=get_machine_data(self.machine),
+            pages=pages,
+            memory_data=memory_data,
+        )
+        self._append(snapshot)
+        self._limit_size()
+        return snapshot
+
+    def _append(self, snapshot):
+        self.snapshots.append(snapshot)
+        self.total_size += snapshot.size
+        if snapshot.is_keyframe:
+            self.keyframe_count += 1
+
+    def _remove(self, snapshot):
+        self.total_size -= snapshot.size
+        if snapshot.is_keyframe:
+            self.keyframe_count -= 1
+
+    def _limit_size(self):
+        """
+        Remove the oldest snapshots, keyframe by keyframe, until the budget
+        is satisfied. The newest keyframe is always kept.
+        """
+        snapshots = self.snapshots
+        while self.total_size > self.budget and self.keyframe_count > 1:
+            self._remove(snapshots.popleft())
+            while not snapshots[0].is_keyframe:
+                self._remove(snapshots.popleft())
+
+    def clear(self):
+        """
+        Remove all snapshots, e.g. after a reset or loading a machine state.
+        """
+        self.snapshots.clear()
+        self.total_size = 0
+        self.keyframe_count = 0
+        self._last_generation = None
+
+    def get_memory(self, index):
+        """
+        Returns the memory image of the snapshot with the given index.
+        """
+        snapshots = self.snapshots
+        keyframe_index = index
+        while not snapshots[keyframe_index].is_keyframe:
+            keyframe_index -= 1
+
+        memory = bytearray(zlib.decompress(snapshots[keyframe_index].memory_data))
+        for snapshot_index in range(keyframe_index + 1, index + 1):
+            snapshot = snapshots[snapshot_index]
+            if not snapshot.pages:
+                continue
+            delta = zlib.decompress(snapshot.memory_data)
+            for no, page in enumerate(snapshot.pages):
+                start = page << PAGE_SHIFT
+                end = start + PAGE_SIZE
+                memory[start:end] = xor_bytes(
+                    bytes(memory[start:end]), delta[no * PAGE_SIZE:(no + 1) * PAGE_SIZE]
+                )
+        return memory
+
+    def restore(self, index):
+        """
+        Restore the machine to the snapshot with the given index and
+        remove all newer snapshots.
+        """
+        snapshot = self.snapshots[index]
+        memory = self.get_memory(index)
+
+        set_cpu_data(self.cpu, snapshot.cpu_data)
+        self.memory.write_block(0x0000, memory)
+        set_machine_data(self.machine, snapshot.machine_data)
+
+        while len(self.snapshots) > index + 1:
+            self._remove(self.snapshots.pop())
+
+        # The next delta will be build against the restored snapshot:
+        self._last_memory[:] = memory
+        self._last_generation = self.memory.generation
+        self._since_keyframe = 0
+        for snapshot in reversed(self.snapshots):
+            self._since_keyframe += 1
+            if snapshot.is_keyframe:
+                break
+
+        log.critical("Machine rewound to cycle %i, PC: $%04x",
+            self.cpu.cycles, self.cpu.program_counter.value
+        )
+
+    def rewind_cycles(self, cycles):
+        """
+        Restore the newest snapshot that is at least the given CPU cycles old
+        (or the oldest one). Returns False if there is no snapshot.
+        """
+        if not self.snapshots:
+            log.critical("No rewind snapshot exists.")
+            return False
+
+        target_cycles = self.cpu.cycles - cycles
+        index = 0
+        for no, snapshot in enumerate(self.snapshots):
+            if snapshot.cycles > target_cycles:
+                break
+            index = no
+        self.restore(index)
+        return True
+
+    def rewind_seconds(self, seconds):
+        return self.rewind_cycles(int(seconds * self.machine.cfg.CYCLES_PER_SEC))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# encoding:utf8
+
+"""
+    DragonPy - Dragon 32 emulator in Python
+    =======================================
+
+    Cycle scheduler: Devices register one-shot or periodic events at
+    absolute CPU cycle counts. The events are stored in a heap, so the CPU
+    burst loop only compares the current cycles with the cycles of the
+    next event.
+
+    The scheduler replaces the MC6809 sync callbacks of a CPU instance:
+    cpu.call_sync_callbacks() is called after every inner burst and
+    cpu.add_sync_callback() registers a periodic event.
+
+    :created: 2015 by the DragonPy team
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import heapq
+import itertools
+import logging
+
+
+log = logging.getLogger(__name__)
+
+
+NO_EVENT = float("inf") # next_event_cycles if no event is scheduled
+
+
+class Event(object):
+    __slots__ = ("cycles", "period", "callback", "active", "seq")
+
+    def __init__(self, cycles, period, callback):
+        self.cycles = cycles # CPU cycles of the next call
+        self.period = period # None for a one-shot event
+        self.callback = callback
+        self.active = True
+        self.seq = None # sequence number of the valid heap entry
+
+    def __repr__(self):
+        return "<Event %s at %i period: %r>" % (self.callback.__name__, self.cycles, self.period)
+
+
+class Scheduler(object):
+    """
+    The event callbacks will be called with the CPU cycles at which the
+    event was due. The calls may be a few cycles late, because the
+    events are checked after every CPU burst.
+    """
+    def __init__(self, cpu):
+        self.cpu = cpu
+        self._heap = []
+        self._counter = itertools.count() # keep the insert order for events with the same cycles
+        self.next_event_cycles = NO_EVENT
+
+    def install(self):
+        """
+        Replace the MC6809 sync callback handling of the CPU instance.
+        """
+        self.cpu.scheduler = self
+        self.cpu.call_sync_callbacks = self.call_sync_callbacks
+        self.cpu.add_sync_callback = self.add_sync_callback
+
+    def _push(self, event):
+        event.seq = next(self._counter)
+        heapq.heappush(self._heap, (event.cycles, event.seq, event))
+        if event.cycles < self.next_event_cycles:
+            self.next_event_cycles = event.cycles
+
+    def add_event(self, cycles, callback, period=None):
+        """
+        Call callback(cycles) at the given absolute CPU cycles and
+        every period cycles after that (if period is given).
+        Returns the Event instance, needed for remove_event()
+        """
+        if period is not None and period <= 0:
+            raise RuntimeError("Event period must be greater than 0, not %r" % period)
+        event = Event(cycles, period, callback)
+        self._push(event)
+        return event
+
+    def add_event_in(self, delay, callback, period=None):
+        """
+        Call callback(cycles) in delay CPU cycles from now.
+        """
+        return self.add_event(self.cpu.cycles + delay, callback, period)
+
+    def add_periodic_event(self, period, callback):
+        """
+        Call callback(cycles) every period CPU cycles, beginning period cycles from now.
+        """
+        return self.add_event(self.cpu.cycles + period, callback, period)
+
+    def add_sync_callback(self, callback_cycles, callback):
+        """
+        MC6809 CPU.add_sync_callback() compatible:
+        The callback gets the CPU cycles since the last call.
+        """
+        def sync_callback(cycles):
+            callback(self.cpu.cycles - cycles + callback_cycles)
+        sync_callback.__name__ = getattr(callback, "__name__", "sync_callback")
+        return self.add_periodic_event(callback_cycles, sync_callback)
+
+    def reschedule_event(self, event, cycles):
+        """
+        Move a (maybe removed or already called) event to the given CPU cycles.
+        """
+        event.cycles = cycles
+        event.active = True
+        self._push(event)
+
+    def remove_event(self, event):
+        """
+        The event is only marked as inactive and skipped if it's due.
+        """
+        event.active = False
+
+    def get_remaining_cycles(self, event):
+        return event.cycles - self.cpu.cycles
+
+    def _is_valid(self, entry):
+        cycles, seq, event = entry
+        return event.active and event.seq == seq
+
+    def _update_next_event_cycles(self):
+        heap = self._heap
+        while heap and not self._is_valid(heap[0]):
+            heapq.heappop(heap)
+        if heap:
+            self.next_event_cycles = heap[0][0]
+        else:
+            self.next_event_cycles = NO_EVENT
+
+    def call_sync_callbacks(self):
+        """ called from the CPU burst loop """
+        if self.cpu.cycles >= self.next_event_cycles:
+            self.call_due_events()
+
+    def call_due_events(self):
+        heap = self._heap
+        current_cycles = self.cpu.cycles
+        while heap and heap[0][0] <= current_cycles:
+            cycles, seq, event = heapq.heappop(heap)
+            if not event.active or event.seq != seq:
+                continue # removed or rescheduled event
+            if event.period is None:
+                event.active = False
+            else:
+                event.cycles = cycles + event.period
+                self._push(event)
+            event.callback(cycles)
+        self._update_next_event_cycles()
+
+    def move_cycles(self, old_cycles, new_cycles):
+        """
+        The CPU cycles are changed, e.g.: machine state loaded.
+        Periodic events start a new period and one-shot
+        events keep their remaining cycles.
+        """
+        events = [entry[2] for entry in sorted(self._heap) if self._is_valid(entry)]
+        self._heap = []
+        self.next_event_cycles = NO_EVENT
+        for event in events:
+            if event.period is None:
+                event.cycles = new_cycles + (event.cycles - old_cycles)
+            else:
+                event.cycles = new_cycles + event.period
+            self._push(event)
+
+
+def get_scheduler(cpu):
+    """
+    Returns the scheduler of the given CPU instance.
+    It will be created and installed on the first call.
+    """
+    try:
+        return cpu.scheduler
+    except AttributeError:
+        scheduler = Scheduler(cpu)
+        scheduler.install()
+        return scheduler
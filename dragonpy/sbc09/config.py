@@ -51,6 +51,11 @@ class SBC09Cfg(BaseConfig):
     # Used in unittest for init the machine:
     STARTUP_END_ADDR = 0xe45a # == O.S. routine to read a character into B register.
 
+    # ROM wait loops, see: dragonpy/core/idle.py
+    IDLE_LOOP_ADDRESSES = (
+        0xe45a, # O.S. routine to read a character
+    )
+
     def __init__(self, cmd_args):
         super(SBC09Cfg, self).__init__(cmd_args)
 
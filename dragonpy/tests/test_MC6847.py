@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - MC6847 text mode display unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonpy.Dragon32 import dragon_charmap
+from dragonpy.Dragon32.MC6847 import (
+    MC6847_FrameBufferCanvas, MC6847_TextModeCanvas, get_glyph_rows
+)
+from dragonpy.Dragon32.dragon_charmap import get_charmap_dict
+
+
+log = logging.getLogger("DragonPy")
+
+
+class RecordingTextModeCanvas(MC6847_TextModeCanvas):
+    """
+    Records the rendered characters instead of updating a Tk canvas.
+    """
+    def __init__(self):
+        self.rendered = []
+        self.init_buffers()
+
+    def render_char(self, position, value):
+        self.rendered.append((position, value))
+
+
+class RecordingFrameBufferCanvas(MC6847_FrameBufferCanvas):
+    """
+    Records the put() and zoom() calls instead of updating Tk images.
+    """
+    def __init__(self):
+        self.rows = 32
+        self.columns = 16
+        self.char_width = 8
+        self.char_height = 13
+        self.charmap = get_charmap_dict()
+        self.glyph_cache = {}
+        self.init_glyph = get_glyph_rows("?", dragon_charmap.INVERTED)
+        self.puts = []
+        self.zooms = []
+        self.init_buffers()
+
+    def put_chars(self, column, row, glyphs):
+        self.puts.append((column, row, glyphs))
+
+    def zoom(self, start_column, end_column):
+        self.zooms.append((start_column, end_column))
+
+
+class TestMC6847_TextModeCanvas(unittest.TestCase):
+    def setUp(self):
+        self.display = RecordingTextModeCanvas()
+
+    def test_coalesce_writes(self):
+        # The ROM clears a position and writes the char afterwards:
+        self.display.write_byte(0, 0, 0x0400, 0x60)
+        self.display.write_byte(0, 0, 0x0400, 0x41)
+        self.display.write_byte(0, 0, 0x0401, 0x42)
+        self.assertEqual(self.display.rendered, [])
+
+        self.assertEqual(self.display.update(), 2)
+        self.assertEqual(sorted(self.display.rendered), [(0, 0x41), (1, 0x42)])
+
+    def test_unchanged_values(self):
+        self.display.write_byte(0, 0, 0x0400, 0x41)
+        self.display.update()
+        self.display.rendered = []
+
+        self.display.write_byte(0, 0, 0x0400, 0x60)
+        self.display.write_byte(0, 0, 0x0400, 0x41)
+        self.assertEqual(self.display.update(), 0)
+        self.assertEqual(self.display.rendered, [])
+        self.assertEqual(self.display.update(), 0) # nothing dirty
+
+    def test_scroll(self):
+        for address in range(0x0400, 0x0600):
+            self.display.write_byte(0, 0, address, 0x60)
+        self.assertEqual(self.display.update(), 512)
+
+        # Scroll one line up: Only the changed positions are rendered
+        self.display.write_byte(0, 0, 0x05ff, 0x41)
+        self.display.update()
+        self.display.rendered = []
+        for address in range(0x0400, 0x05e0):
+            self.display.write_byte(0, 0, address, self.display.video_ram[address - 0x0400 + 32])
+        for address in range(0x05e0, 0x0600):
+            self.display.write_byte(0, 0, address, 0x60)
+        self.assertEqual(self.display.update(), 2)
+        self.assertEqual(sorted(self.display.rendered), [(0x1df, 0x41), (0x1ff, 0x60)])
+
+    def test_outside_video_ram(self):
+        self.display.write_byte(0, 0, 0x0600, 0x41)
+        self.assertEqual(self.display.update(), 0)
+
+
+class TestMC6847_FrameBufferCanvas(unittest.TestCase):
+    def setUp(self):
+        self.display = RecordingFrameBufferCanvas()
+
+    def test_one_put_per_line(self):
+        for address in range(0x0400, 0x0600):
+            self.display.write_byte(0, 0, address, 0x60)
+        self.assertEqual(self.display.update(), 512)
+        self.assertEqual(
+            sorted((column, row, len(glyphs)) for column, row, glyphs in self.display.puts),
+            [(column, 0, 32) for column in range(16)]
+        )
+        self.assertEqual(self.display.zooms, [(0, 16)])
+
+    def test_changed_range(self):
+        self.display.write_byte(0, 0, 0x0400 + 32 * 3 + 5, 0x41)
+        self.display.write_byte(0, 0, 0x0400 + 32 * 3 + 9, 0x42)
+        self.display.write_byte(0, 0, 0x0400 + 32 * 7, 0x43)
+        self.assertEqual(self.display.update(), 3)
+        puts = sorted(self.display.puts)
+        self.assertEqual(
+            [(column, row, len(glyphs)) for column, row, glyphs in puts],
+            [(3, 5, 5), (7, 0, 1)]
+        )
+        self.assertEqual(self.display.zooms, [(3, 8)])
+
+        # Positions between the changed characters are blitted with the init glyph:
+        glyphs = puts[0][2]
+        self.assertEqual(glyphs[0], get_glyph_rows("A", dragon_charmap.NORMAL))
+        self.assertEqual(glyphs[1:4], [self.display.init_glyph] * 3)
+        self.assertEqual(glyphs[4], get_glyph_rows("B", dragon_charmap.NORMAL))
+
+    def test_nothing_changed(self):
+        self.display.update()
+        self.assertEqual(self.display.puts, [])
+        self.assertEqual(self.display.zooms, [])
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
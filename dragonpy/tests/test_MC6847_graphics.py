@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - MC6847 graphics modes unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.benchmark import BenchmarkDragon32Cfg, get_memory
+from dragonpy.Dragon32.MC6821_PIA import PIA
+from dragonpy.Dragon32.MC6847_graphics import (
+    BLACK, HEIGHT, PALETTE, SG4, SG6, WIDTH, NumpyGraphicsRenderer, PythonGraphicsRenderer,
+    get_ppm, get_vdg_mode, numpy
+)
+from dragonpy.Dragon32.MC6883_SAM import SAM
+
+
+log = logging.getLogger("DragonPy")
+
+
+def get_pixel(rgb, x, y):
+    offset = (y * WIDTH + x) * 3
+    return tuple(bytearray(rgb[offset:offset + 3]))
+
+
+class TestVDGMode(unittest.TestCase):
+    def setUp(self):
+        self.memory = get_memory(Memory, BenchmarkDragon32Cfg)
+        self.sam = SAM(self.memory.cfg, self.memory.cpu, self.memory)
+        self.pia = PIA(self.memory.cfg, self.memory.cpu, self.memory, queue.Queue())
+
+    def test_display_offset(self):
+        self.assertEqual(self.sam.get_display_address(), 0x0400)
+
+        # PMODE 4 on page 1 at $0600: F0 and F1 set, F2-F6 cleared
+        for address in (0xffc7, 0xffc9, 0xffca, 0xffcc, 0xffce, 0xffd0, 0xffd2):
+            self.memory.write_byte(address, 0x00)
+        self.assertEqual(self.sam.get_display_address(), 0x0600)
+
+        self.memory.write_byte(0xffc6, 0x00) # clear F0
+        self.memory.write_byte(0xffd3, 0x00) # set F6
+        self.assertEqual(self.sam.get_display_address(), 0x8400)
+
+    def test_vdg_mode_register(self):
+        self.memory.write_byte(0xffc1, 0x00) # set V0
+        self.memory.write_byte(0xffc5, 0x00) # set V2
+        self.assertEqual(self.sam.vdg_mode, 5)
+        self.memory.write_byte(0xffc0, 0x00) # clear V0
+        self.assertEqual(self.sam.vdg_mode, 4)
+
+    def test_state(self):
+        self.memory.write_byte(0xffc5, 0x00)
+        self.memory.write_byte(0xffc9, 0x00)
+        state = self.sam.get_state()
+        self.sam.reset()
+        self.assertEqual(self.sam.get_display_address(), 0x0400)
+        self.sam.set_state(state)
+        self.assertEqual(self.sam.vdg_mode, 4)
+        self.assertEqual(self.sam.get_display_address(), 0x0400 | 0x0400)
+
+    def test_pia_vdg_control(self):
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), (SG4, 0))
+        self.memory.write_byte(0xff23, 0x04) # $ff22 is the data register
+        self.memory.write_byte(0xff22, 0xf8) # PMODE 4 : SCREEN 1,1
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), ("RG6", 1))
+
+    def test_pia_ddr_write(self):
+        # The ROM init: $ff22 is the data direction register after reset
+        self.memory.write_byte(0xff22, 0xf8)
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), (SG4, 0))
+        self.assertEqual(self.pia.pia_1_B_register.direction_register, 0xf8)
+
+        self.memory.write_byte(0xff23, 0x34) # select the data register
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), (SG4, 0))
+        self.memory.write_byte(0xff22, 0x80)
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), ("CG1", 0))
+
+        self.memory.write_byte(0xff23, 0x30) # DDR again
+        self.memory.write_byte(0xff22, 0xf8)
+        self.assertEqual(get_vdg_mode(self.pia.get_vdg_control()), ("CG1", 0))
+
+
+class GraphicsRendererTestMixin(object):
+    def test_rg6(self):
+        data = bytearray(6144)
+        data[0] = 0x80 # first pixel set
+        data[32 * 191 + 31] = 0x01 # last pixel set
+        rgb = self.renderer.render(data, "RG6", 0)
+        self.assertEqual(len(rgb), WIDTH * HEIGHT * 3)
+        self.assertEqual(get_pixel(rgb, 0, 0), PALETTE[0]) # green
+        self.assertEqual(get_pixel(rgb, 1, 0), PALETTE[BLACK])
+        self.assertEqual(get_pixel(rgb, 255, 191), PALETTE[0])
+        self.assertEqual(get_pixel(rgb, 255, 190), PALETTE[BLACK])
+
+    def test_cg1_scaled(self):
+        data = bytearray(1024)
+        data[0] = 0x1b # 4 pixels: 00 01 10 11
+        rgb = self.renderer.render(data, "CG1", 1)
+        # 64x64 pixels: every pixel is 4x3 on the screen
+        for x, color in ((0, 4), (3, 4), (4, 5), (8, 6), (12, 7), (16, 4)):
+            self.assertEqual(get_pixel(rgb, x, 0), PALETTE[color])
+            self.assertEqual(get_pixel(rgb, x, 2), PALETTE[color])
+        self.assertEqual(get_pixel(rgb, 4, 3), PALETTE[4]) # next line
+
+    def test_sg4(self):
+        data = bytearray([0x80] * 512)
+        data[33] = 0x80 | 0x30 | 0x09 # red, upper left and lower right block
+        rgb = self.renderer.render(data, SG4, 0)
+        x, y = 8, 12 # second row, second column
+        self.assertEqual(get_pixel(rgb, x, y), PALETTE[3])
+        self.assertEqual(get_pixel(rgb, x + 4, y), PALETTE[BLACK])
+        self.assertEqual(get_pixel(rgb, x, y + 6), PALETTE[BLACK])
+        self.assertEqual(get_pixel(rgb, x + 7, y + 11), PALETTE[3])
+        self.assertEqual(get_pixel(rgb, 0, 0), PALETTE[BLACK])
+
+    def test_sg6(self):
+        data = bytearray([0x80] * 512)
+        data[0] = 0xc0 | 0x0c # color 3, middle line blocks
+        rgb = self.renderer.render(data, SG6, 1)
+        self.assertEqual(get_pixel(rgb, 0, 3), PALETTE[BLACK])
+        self.assertEqual(get_pixel(rgb, 0, 4), PALETTE[7])
+        self.assertEqual(get_pixel(rgb, 7, 7), PALETTE[7])
+        self.assertEqual(get_pixel(rgb, 0, 8), PALETTE[BLACK])
+
+    def test_short_data(self):
+        rgb = self.renderer.render(bytearray(10), "RG6", 0)
+        self.assertEqual(len(rgb), WIDTH * HEIGHT * 3)
+
+    def test_ppm(self):
+        rgb = self.renderer.render(bytearray(512), SG4, 0)
+        self.assertEqual(get_ppm(rgb)[:15], b"P6\n256 192\n255\n")
+
+
+class TestPythonGraphicsRenderer(GraphicsRendererTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.renderer = PythonGraphicsRenderer()
+
+    def test_text(self):
+        data = bytearray([0x60] * 512) # spaces
+        data[0] = 0x41 # "A"
+        rgb = self.renderer.render(data, SG4, 0)
+        background = (0, 255, 0)
+        foreground = (0, 65, 0)
+        self.assertEqual(get_pixel(rgb, 0, 0), background)
+        # Line 5 of "A" is "..X...X."
+        self.assertEqual(
+            [get_pixel(rgb, x, 5) for x in range(8)],
+            [background] * 2 + [foreground] + [background] * 3 + [foreground, background]
+        )
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestNumpyGraphicsRenderer(GraphicsRendererTestMixin, unittest.TestCase):
+    def setUp(self):
+        self.renderer = NumpyGraphicsRenderer()
+
+    def test_same_as_python(self):
+        python_renderer = PythonGraphicsRenderer()
+        data = bytearray(range(256)) * 24
+        for mode in (SG4, SG6, "CG1", "RG1", "CG2", "RG2", "CG3", "RG3", "CG6", "RG6"):
+            for css in (0, 1):
+                self.assertEqual(
+                    self.renderer.render(data, mode, css),
+                    python_renderer.render(data, mode, css),
+                    "%s css:%i" % (mode, css)
+                )
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - headless MC6847 display unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.benchmark import BenchmarkDragon32Cfg, get_memory
+from dragonpy.Dragon32.MC6847_graphics import PALETTE
+from dragonpy.Dragon32.MC6847_headless import VIDEO_RAM_START, get_png
+from dragonpy.Dragon32.periphery_dragon import Dragon32PeripheryHeadless
+
+
+log = logging.getLogger("DragonPy")
+
+
+def ascii2video_ram(text):
+    """ normal colors: "@A-Z[\\]" at $40-$5f and " !"#...0-9:;<=>?" at $60-$7f """
+    return bytearray(ord(char) if char >= "@" else ord(char) + 0x40 for char in text)
+
+
+def read_png(png):
+    """
+    Returns width, height and the RGB data of a PNG written by get_png()
+    """
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", png[16:24])
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    assert png[37:41] == b"IDAT"
+    raw = zlib.decompress(png[41:41 + idat_length])
+    line_size = width * 3 + 1
+    rgb = b"".join(raw[start + 1:start + line_size] for start in range(0, len(raw), line_size))
+    return width, height, rgb
+
+
+class TestHeadlessDisplay(unittest.TestCase):
+    def setUp(self):
+        self.memory = get_memory(Memory, BenchmarkDragon32Cfg)
+        self.periphery = Dragon32PeripheryHeadless(
+            self.memory.cfg, self.memory.cpu, self.memory,
+            display_callback=None, user_input_queue=queue.Queue()
+        )
+        self.display = self.periphery.display
+        self.memory.write_block(VIDEO_RAM_START, bytearray([0x60] * 512)) # clear screen
+        self.temp_path = tempfile.mkdtemp(prefix="dragonpy_headless_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_no_write_middleware(self):
+        self.assertEqual(self.memory._write_byte_middleware.ranges, [])
+
+    def test_lines(self):
+        self.memory.write_block(VIDEO_RAM_START, ascii2video_ram("OK"))
+        self.memory.write_block(VIDEO_RAM_START + 32 * 15 + 31, ascii2video_ram("X"))
+        lines = self.periphery.get_screen_lines()
+        self.assertEqual(len(lines), 16)
+        self.assertEqual(lines[0], "OK" + " " * 30)
+        self.assertEqual(lines[15], " " * 31 + "X")
+
+    def test_striped_output(self):
+        self.memory.write_block(VIDEO_RAM_START, ascii2video_ram("10 PRINT"))
+        self.memory.write_block(VIDEO_RAM_START + 32 * 2, ascii2video_ram("  OK  "))
+        self.assertEqual(self.periphery.striped_output(), ["10 PRINT", "", "OK"])
+
+    def test_write_byte(self):
+        # Plain CPU writes are visible without any display callback:
+        for address, value in enumerate(ascii2video_ram("HI"), VIDEO_RAM_START):
+            self.memory.write_byte(address, value)
+        self.assertEqual(self.display.striped_output(), ["HI"])
+
+    def test_png_export(self):
+        # PMODE 4 graphics at $0600 with the first pixel set
+        self.memory.write_byte(0xff23, 0x04) # $ff22 is the data register
+        self.memory.write_byte(0xff22, 0xf0)
+        self.memory.write_byte(0xffc7, 0x00) # set SAM display offset bit F0
+        self.memory.write_block(0x0600, bytearray([0x80]))
+
+        path = os.path.join(self.temp_path, "screen.png")
+        self.display.save_png(path, scale_factor=2)
+        with open(path, "rb") as f:
+            width, height, rgb = read_png(f.read())
+        self.assertEqual((width, height), (512, 384))
+        self.assertEqual(len(rgb), width * height * 3)
+        self.assertEqual(bytearray(rgb[:6]), bytearray(PALETTE[0] * 2))
+        self.assertEqual(bytearray(rgb[width * 3:width * 3 + 6]), bytearray(PALETTE[0] * 2))
+        self.assertEqual(bytearray(rgb[6:9]), bytearray((0, 0, 0)))
+
+    def test_get_png(self):
+        png = get_png(2, 1, b"\x01\x02\x03\x04\x05\x06")
+        self.assertEqual(read_png(png), (2, 1, b"\x01\x02\x03\x04\x05\x06"))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - burst auto-tuner unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonpy.core.autotune import BurstAutoTuner
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TuneCfg(object):
+    """ Like RuntimeCfg, but without changing the CPU class """
+    max_run_time = 0.01
+    min_burst_count = 10
+    max_burst_count = 10000
+    max_delay = 0.01
+    inner_burst_op_count = 100
+
+    def set_tuned_value(self, attr, value):
+        setattr(self, attr, value)
+
+
+class TestBurstAutoTuner(unittest.TestCase):
+    def setUp(self):
+        self.cfg = TuneCfg()
+        self.tuner = BurstAutoTuner(self.cfg, target_latency=0.016, interval=0.5)
+        self.now = 0
+
+    def run_window(self, duration, cycles_per_sec, bursts=100, delay=0):
+        """ Add CPU runs for one tune interval """
+        for __ in range(int(0.5 / duration) + 1):
+            self.now += duration
+            busy = duration - delay
+            self.tuner.add_run(duration, delay, int(busy * cycles_per_sec), bursts, now=self.now)
+
+    def test_slow_host(self):
+        # The CPU runs block the event loop for 50ms:
+        self.cfg.max_run_time = 0.05
+        for __ in range(10):
+            self.run_window(duration=0.05, cycles_per_sec=100000)
+        self.assertLessEqual(self.cfg.max_run_time, 0.012)
+        self.assertLessEqual(self.cfg.max_delay + self.cfg.max_run_time, 0.016)
+
+        # One run with max_burst_count will not exceed the target:
+        burst_duration = 0.05 / 100 / 100 # per inner op count
+        self.assertLessEqual(
+            self.cfg.max_burst_count * self.cfg.inner_burst_op_count * burst_duration,
+            0.012
+        )
+        self.assertEqual(self.tuner.decisions, 10)
+        self.assertIn("auto-tune: run", self.tuner.status)
+
+    def test_inner_burst_hill_climbing(self):
+        self.run_window(duration=0.005, cycles_per_sec=500000)
+        self.assertEqual(self.cfg.inner_burst_op_count, 125)
+
+        # faster -> go on:
+        self.run_window(duration=0.005, cycles_per_sec=600000)
+        self.assertEqual(self.cfg.inner_burst_op_count, 156)
+
+        # slower -> go back:
+        self.run_window(duration=0.005, cycles_per_sec=500000)
+        self.assertEqual(self.cfg.inner_burst_op_count, 124)
+
+    def test_hold(self):
+        self.run_window(duration=0.005, cycles_per_sec=500000)
+        self.run_window(duration=0.005, cycles_per_sec=500000)
+        self.assertEqual(self.cfg.inner_burst_op_count, 125)
+        self.assertEqual(self.tuner.hold, 1)
+
+    def test_reset(self):
+        self.tuner.add_run(0.1, 0, 1000, 10, now=1)
+        self.tuner.reset()
+        self.assertEqual(self.tuner.run_count, 0)
+        self.assertEqual(self.tuner.max_latency, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
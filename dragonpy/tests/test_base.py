@@ -15,11 +15,10 @@ import six
 xrange = six.moves.xrange
 
 import hashlib
+import io
 import logging
 import os
-import pickle as pickle
 import sys
-import tempfile
 import time
 import unittest
 
@@ -36,7 +35,9 @@ from dragonpy.Simple6809.config import Simple6809Cfg
 from dragonpy.Simple6809.periphery_simple6809 import Simple6809PeripheryUnittest
 from MC6809.components.cpu6809 import CPU
 from dragonpy.components.memory import Memory
+from dragonpy.core.boot_cache import boot_machine
 from dragonpy.core.machine import Machine
+from dragonpy.core.machine_state import write_state, read_state
 from MC6809.components.cpu_utils.MC6809_registers import ValueStorage8Bit
 from dragonpy.sbc09.config import SBC09Cfg
 from dragonpy.sbc09.periphery import SBC09PeripheryUnittest
@@ -46,6 +47,19 @@ from dragonpy.tests.test_config import TestCfg
 log = logging.getLogger(__name__)
 
 
+def get_machine_state(machine):
+    """
+    Returns the complete machine state as bytes, see: dragonpy.core.machine_state
+    """
+    f = io.BytesIO()
+    write_state(machine, f, compress=False)
+    return f.getvalue()
+
+
+def set_machine_state(machine, state):
+    read_state(machine, io.BytesIO(state))
+
+
 class BaseCPUTestCase(BaseTestCase):
     UNITTEST_CFG_DICT = {
         "verbosity":None,
@@ -57,6 +71,8 @@ class BaseCPUTestCase(BaseTestCase):
         "rom":None,
         "max_ops":None,
         "use_bus":False,
+        "memory_debug":True,
+        "idle_skip":False, # execute every op, see: dragonpy/core/idle.py
     }
     def setUp(self):
         cfg = TestCfg(self.UNITTEST_CFG_DICT)
@@ -133,22 +149,14 @@ class Test6809_BASIC_simple6809_Base(BaseCPUTestCase):
     """
     Run tests with the BASIC Interpreter from simple6809 ROM.
     """
-    TEMP_FILE = os.path.join(
-        tempfile.gettempdir(),
-        "DragonPy_simple6809_unittests_Py%i.dat" % sys.version_info[0]
-    )
-
     @classmethod
     def setUpClass(cls, cmd_args=None):
         """
         prerun ROM to complete initiate and ready for user input.
-        save the CPU state to speedup unittest
+        The state after the boot is cached, see: dragonpy.core.boot_cache
         """
         super(Test6809_BASIC_simple6809_Base, cls).setUpClass()
 
-        log.info("CPU state pickle file: %r" % cls.TEMP_FILE)
-#         if os.path.isfile(cls.TEMP_FILE):os.remove(cls.TEMP_FILE);print "Delete CPU data file!"
-
         cfg = Simple6809Cfg(cls.UNITTEST_CFG_DICT)
 
         cls.user_input_queue = queue.Queue()
@@ -163,23 +171,7 @@ class Test6809_BASIC_simple6809_Base(BaseCPUTestCase):
         cls.periphery = cls.machine.periphery
         cls.periphery.setUp()
 
-        if os.path.isfile(cls.TEMP_FILE):
-            log.info("Load CPU init state from: %r" % cls.TEMP_FILE)
-            with open(cls.TEMP_FILE, "rb") as temp_file:
-                cls.__init_state = pickle.load(temp_file)
-        else:
-            log.info("init machine...")
-            init_start = time.time()
-            cls.cpu.test_run(
-                start=cls.cpu.program_counter.value,
-                end=cfg.STARTUP_END_ADDR,
-                max_ops=500000,
-            )
-            duration = time.time() - init_start
-            log.info("done in %iSec. it's %.2f cycles/sec. (current cycle: %i)" % (
-                duration, float(cls.cpu.cycles / duration), cls.cpu.cycles
-            ))
-
+        if not boot_machine(cls.machine, max_ops=500000):
             # Check if machine is ready
             assert cls.periphery.output == (
                 '6809 EXTENDED BASIC\r\n'
@@ -187,20 +179,13 @@ class Test6809_BASIC_simple6809_Base(BaseCPUTestCase):
                 '\r\n'
                 'OK\r\n'
             ), "Outlines are: %s" % repr(cls.periphery.output_lines)
-            # Save CPU state
-            init_state = cls.cpu.get_state()
-            with open(cls.TEMP_FILE, "wb") as f:
-                pickle.dump(init_state, f)
-                log.info("Save CPU init state to: %r" % cls.TEMP_FILE)
-            cls.__init_state = init_state
 
-#        print_cpu_state_data(cls.__init_state)
+        cls.__init_state = get_machine_state(cls.machine)
 
     def setUp(self):
         """ restore CPU/Periphery state to a fresh startup. """
+        set_machine_state(self.machine, self.__init_state)
         self.periphery.setUp()
-        self.cpu.set_state(self.__init_state)
-#         print_cpu_state_data(self.cpu.get_state())
 
     def _run_until_OK(self, OK_count=1, max_ops=5000):
         old_cycles = self.cpu.cycles
@@ -234,24 +219,14 @@ class Test6809_sbc09_Base(BaseCPUTestCase):
     """
     Run tests with the sbc09 ROM.
     """
-    TEMP_FILE = os.path.join(
-        tempfile.gettempdir(),
-        "DragonPy_sbc09_unittests_Py%i.dat" % sys.version_info[0]
-    )
-
     @classmethod
     def setUpClass(cls, cmd_args=None):
         """
         prerun ROM to complete initiate and ready for user input.
-        save the CPU state to speedup unittest
+        The state after the boot is cached, see: dragonpy.core.boot_cache
         """
         super(Test6809_sbc09_Base, cls).setUpClass()
 
-        log.info("CPU state pickle file: %r" % cls.TEMP_FILE)
-#        if os.path.isfile(cls.TEMP_FILE):
-#            print("Delete CPU date file!")
-#            os.remove(cls.TEMP_FILE)
-
         cfg = SBC09Cfg(cls.UNITTEST_CFG_DICT)
 
         cls.user_input_queue = queue.Queue()
@@ -267,42 +242,18 @@ class Test6809_sbc09_Base(BaseCPUTestCase):
         cls.periphery = cls.machine.periphery
         cls.periphery.setUp()
 
-        try:
-            temp_file = open(cls.TEMP_FILE, "rb")
-        except IOError:
-            log.info("init machine...")
-            init_start = time.time()
-            cls.cpu.test_run(
-                start=cls.cpu.program_counter.value,
-                end=cfg.STARTUP_END_ADDR,
-            )
-            duration = time.time() - init_start
-            log.info("done in %iSec. it's %.2f cycles/sec. (current cycle: %i)" % (
-                duration, float(cls.cpu.cycles / duration), cls.cpu.cycles
-            ))
-
+        if not boot_machine(cls.machine):
             # Check if machine is ready
             assert cls.periphery.output == (
                 'Welcome to BUGGY version 1.0\r\n'
             ), "Outlines are: %s" % repr(cls.periphery.output)
-            # Save CPU state
-            init_state = cls.cpu.get_state()
-            with open(cls.TEMP_FILE, "wb") as f:
-                pickle.dump(init_state, f)
-                log.info("Save CPU init state to: %r" % cls.TEMP_FILE)
-            cls.__init_state = init_state
-        else:
-            log.info("Load CPU init state from: %r" % cls.TEMP_FILE)
-            cls.__init_state = pickle.load(temp_file)
-            temp_file.close()
-
-#         print_cpu_state_data(cls.__init_state)
+
+        cls.__init_state = get_machine_state(cls.machine)
 
     def setUp(self):
         """ restore CPU/Periphery state to a fresh startup. """
+        set_machine_state(self.machine, self.__init_state)
         self.periphery.setUp()
-        self.cpu.set_state(self.__init_state)
-#         print_cpu_state_data(self.cpu.get_state())
 
     def _run_until(self, terminator, count, max_ops):
         old_cycles = self.cpu.cycles
@@ -344,22 +295,14 @@ class Test6809_Dragon32_Base(BaseCPUTestCase):
     """
     Run tests with the Dragon32 ROM.
     """
-    TEMP_FILE = os.path.join(
-        tempfile.gettempdir(),
-        "DragonPy_Dragon32_unittests_Py%i.dat" % sys.version_info[0]
-    )
-
     @classmethod
     def setUpClass(cls, cmd_args=None):
         """
         prerun ROM to complete initiate and ready for user input.
-        save the CPU state to speedup unittest
+        The state after the boot is cached, see: dragonpy.core.boot_cache
         """
         super(Test6809_Dragon32_Base, cls).setUpClass()
 
-        log.info("CPU state pickle file: %r" % cls.TEMP_FILE)
-#         os.remove(cls.TEMP_FILE);print "Delete CPU date file!"
-
         cfg = Dragon32Cfg(cls.UNITTEST_CFG_DICT)
 
         cls.user_input_queue = queue.Queue()
@@ -374,21 +317,7 @@ class Test6809_Dragon32_Base(BaseCPUTestCase):
         cls.periphery = cls.machine.periphery
         cls.periphery.setUp()
 
-#        os.remove(cls.TEMP_FILE)
-        try:
-            temp_file = open(cls.TEMP_FILE, "rb")
-        except IOError:
-            log.info("init machine...")
-            init_start = time.time()
-            cls.cpu.test_run(
-                start=cls.cpu.program_counter.value,
-                end=cfg.STARTUP_END_ADDR,
-            )
-            duration = time.time() - init_start
-            log.info("done in %iSec. it's %.2f cycles/sec. (current cycle: %i)" % (
-                duration, float(cls.cpu.cycles / duration), cls.cpu.cycles
-            ))
-
+        if not boot_machine(cls.machine):
             # Check if machine is ready
             output = cls.periphery.striped_output()[:5]
             assert output == [
@@ -397,25 +326,13 @@ class Test6809_Dragon32_Base(BaseCPUTestCase):
                 '(C) 1982 BY MICROSOFT',
                 '', 'OK'
             ]
-            # Save CPU state
-            init_state = cls.cpu.get_state()
-            with open(cls.TEMP_FILE, "wb") as f:
-                pickle.dump(init_state, f)
-                log.info("Save CPU init state to: %r" % cls.TEMP_FILE)
-            cls.__init_state = init_state
-        else:
-            log.info("Load CPU init state from: %r" % cls.TEMP_FILE)
-            cls.__init_state = pickle.load(temp_file)
-            temp_file.close()
-
-#        print "cls.__init_state:", ;print_cpu_state_data(cls.__init_state)
+
+        cls.__init_state = get_machine_state(cls.machine)
 
     def setUp(self):
         """ restore CPU/Periphery state to a fresh startup. """
+        set_machine_state(self.machine, self.__init_state)
         self.periphery.setUp()
-#        print "self.__init_state:", ;print_cpu_state_data(self.__init_state)
-        self.cpu.set_state(self.__init_state)
-#        print "self.cpu.get_state():", ;print_cpu_state_data(self.cpu.get_state())
 
     def _run_until_OK(self, OK_count=1, max_ops=5000):
         old_cycles = self.cpu.cycles
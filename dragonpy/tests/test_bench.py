@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - whole-machine benchmark unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from dragonpy.core import configs
+from dragonpy.core.bench import (
+    MachineBenchmark, compare_results, format_comparison, load_results, save_results
+)
+from dragonpy.sbc09.config import SBC09Cfg
+from dragonpy.vectrex.config import VectrexCfg
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestMachineBenchmark(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.benchmark = MachineBenchmark(configs.SBC09, SBC09Cfg)
+
+    def test_workloads(self):
+        names = [workload.name for workload in self.benchmark.workloads]
+        self.assertEqual(names, ["boot", "monitor hex calc", "monitor disassemble"])
+        self.assertRaises(RuntimeError, self.benchmark.get_workloads, ["foobar"])
+
+    def test_same_cycles(self):
+        workload = self.benchmark.get_workloads(["monitor hex calc"])[0]
+        duration1, cycles1, ops1 = self.benchmark.run_once(workload)
+        duration2, cycles2, ops2 = self.benchmark.run_once(workload)
+        self.assertEqual(cycles1, cycles2)
+        self.assertEqual(ops1, ops2)
+        self.assertEqual(self.benchmark.machine.periphery.output.count("\n"), 40)
+
+    def test_boot(self):
+        workload = self.benchmark.get_workloads(["boot"])[0]
+        duration, cycles, ops = self.benchmark.run_once(workload)
+        self.assertGreater(ops, 0)
+        self.assertGreater(cycles, ops)
+        self.assertEqual(
+            self.benchmark.machine.periphery.output, 'Welcome to BUGGY version 1.0\r\n'
+        )
+
+    def test_run(self):
+        results = self.benchmark.run(["boot"], warmup=0, repetitions=2, verbose=False)
+        self.assertEqual(results["machine"], configs.SBC09)
+        self.assertEqual(results["repetitions"], 2)
+        result = results["workloads"]["boot"]
+        self.assertEqual(len(result["times"]), 2)
+        self.assertEqual(result["best_time"], min(result["times"]))
+        self.assertEqual(result["cycles_per_sec"], result["cycles"] / result["best_time"])
+
+    def test_not_supported(self):
+        self.assertRaises(RuntimeError, MachineBenchmark, configs.VECTREX, VectrexCfg)
+
+
+class TestCompareResults(unittest.TestCase):
+    def _get_results(self, machine=configs.SBC09, **cycles_per_sec):
+        return {
+            "machine": machine,
+            "workloads": dict(
+                (name, {"cycles_per_sec": value}) for name, value in cycles_per_sec.items()
+            ),
+        }
+
+    def test_compare(self):
+        baseline = self._get_results(boot=1000, calc=1000, old=1000)
+        results = self._get_results(boot=960, calc=900, new=1000)
+        comparison = compare_results(results, baseline, threshold=5)
+        self.assertEqual(comparison, [
+            ("boot", 1000, 960, -4.0, False),
+            ("calc", 1000, 900, -10.0, True),
+        ])
+        text = format_comparison(comparison, threshold=5)
+        self.assertIn("-10.0% REGRESSION", text)
+        self.assertIn("1 of 2 workloads slower than 5.0%", text)
+
+    def test_other_machine(self):
+        self.assertRaises(RuntimeError, compare_results,
+            self._get_results(boot=1000), self._get_results(configs.DRAGON32, boot=1000)
+        )
+
+    def test_save_load(self):
+        temp_path = tempfile.mkdtemp(prefix="dragonpy_bench_")
+        try:
+            path = os.path.join(temp_path, "bench.json")
+            results = self._get_results(boot=1000.5)
+            save_results(path, results)
+            self.assertEqual(load_results(path), results)
+        finally:
+            shutil.rmtree(temp_path)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
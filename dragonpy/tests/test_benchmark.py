@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - micro benchmark unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Call every benchmark function once, so that a changed device API
+    breaks the tests and not only the next benchmark run.
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.benchmark import (
+    MemoryWithoutDirtyPages, device_benchmarks, get_memory, measure, memory_benchmarks
+)
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestBenchmarkSmoke(unittest.TestCase):
+    def assert_callable(self, benchmarks):
+        self.assertTrue(benchmarks)
+        names = [name for name, func, args in benchmarks]
+        self.assertEqual(len(names), len(set(names)), names)
+        for name, func, args in benchmarks:
+            try:
+                func(*args)
+            except Exception as err:
+                self.fail("Benchmark %r failed: %s" % (name, err))
+
+    def test_device_benchmarks(self):
+        self.assert_callable(device_benchmarks())
+
+    def test_memory_benchmarks(self):
+        self.assert_callable(memory_benchmarks(get_memory(Memory)))
+
+    def test_memory_without_dirty_pages(self):
+        self.assert_callable(memory_benchmarks(get_memory(MemoryWithoutDirtyPages)))
+
+    def test_measure(self):
+        name, func, args = memory_benchmarks(get_memory())[0]
+        self.assertGreater(measure(func, args, number=10, repeat=1), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
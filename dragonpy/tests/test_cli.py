@@ -11,7 +11,10 @@
 from __future__ import absolute_import, division, print_function
 
 
+import os
+import shutil
 import subprocess
+import tempfile
 import unittest
 
 from click.testing import CliRunner
@@ -20,6 +23,7 @@ import MC6809
 
 import dragonpy
 from dragonpy.core.cli import cli
+from dragonpy.core.coverage import BITMAP_SIZE
 from dragonpy.utils.starter import run_dragonpy, run_mc6809
 
 
@@ -188,6 +192,31 @@ class CLITestCase(CliTestCase):
         errors = ["Error", "Traceback"]
         self.assert_not_contains_members(errors, result.output)
 
+    def test_coverage_help(self):
+        result = self._invoke("coverage", "--help")
+        self.assert_contains_members([
+            "Usage: cli coverage [OPTIONS] COMMAND [ARGS]...",
+            "merge ",
+            "report ",
+        ], result.output)
+
+        errors = ["Error", "Traceback"]
+        self.assert_not_contains_members(errors, result.output)
+
+    def test_coverage_report(self):
+        temp_path = tempfile.mkdtemp(prefix="dragonpy_cli_")
+        try:
+            path = os.path.join(temp_path, "empty.cov")
+            with open(path, "wb") as f:
+                f.write(bytearray(BITMAP_SIZE))
+            result = self._invoke("--machine", "Dragon32", "coverage", "report", path)
+        finally:
+            shutil.rmtree(temp_path)
+        self.assert_contains_members([
+            "0 executed instruction addresses in $8000-$bfff",
+            "Never executed (", # The mem info is loaded
+        ], result.output)
+
     def test_editor_help(self):
         result = self._invoke("editor", "--help")
         #        print(result.output)
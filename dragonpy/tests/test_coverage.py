@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - code coverage unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from dragonpy.core.coverage import Coverage, BITMAP_SIZE, merge_files, \
+    read_bitmap, write_bitmap, pack_bits, unpack_bits, get_report
+from dragonpy.tests.test_base import Test6809_sbc09_Base
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestCoverage(Test6809_sbc09_Base):
+    @classmethod
+    def setUpClass(cls):
+        super(TestCoverage, cls).setUpClass()
+        cls.coverage = Coverage(cls.machine)
+        cls.coverage.install()
+
+    def setUp(self):
+        super(TestCoverage, self).setUp()
+        self.coverage.reset()
+        self.temp_path = tempfile.mkdtemp(prefix="DragonPy_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def _get_bitmap(self, txt):
+        self.coverage.reset()
+        self.periphery.setUp()
+        self.periphery.add_to_input_queue(txt)
+        self._run_until_newlines(newline_count=2)
+        return self.coverage.get_bitmap()
+
+    def test_bitmap(self):
+        bitmap = self._get_bitmap('H1+2\r\n')
+        self.assertEqual(len(bitmap), BITMAP_SIZE)
+        flags = unpack_bits(bitmap)
+        self.assertEqual(flags, self.coverage.executed)
+        self.assertEqual(flags[0xe45a], 1) # O.S. routine to read a character
+        self.assertEqual(flags[0x8000], 0) # PROM for user programs
+
+    def test_merge(self):
+        path1 = os.path.join(self.temp_path, "1.cov")
+        path2 = os.path.join(self.temp_path, "2.cov")
+        write_bitmap(path1, self._get_bitmap('H1+2\r\n'))
+        write_bitmap(path2, self._get_bitmap('H3-1\r\n'))
+
+        merged_path = os.path.join(self.temp_path, "merged.cov")
+        merged = merge_files(merged_path, [path1, path2])
+        self.assertEqual(read_bitmap(merged_path), merged)
+
+        flags1 = unpack_bits(read_bitmap(path1))
+        flags2 = unpack_bits(read_bitmap(path2))
+        merged_flags = unpack_bits(merged)
+        self.assertEqual(
+            merged_flags,
+            bytearray(a | b for a, b in zip(flags1, flags2))
+        )
+        self.assertGreaterEqual(sum(merged_flags), sum(flags1))
+
+    def test_invalid_file(self):
+        path = os.path.join(self.temp_path, "invalid.cov")
+        with open(path, "wb") as f:
+            f.write(b"foo")
+        self.assertRaises(RuntimeError, read_bitmap, path)
+
+    def test_report(self):
+        flags = bytearray(0x10000)
+        flags[0xe400] = 1
+        report = get_report(pack_bits(flags), self.machine.cfg.mem_info, 0xe000, 0xffff)
+        self.assertIn("1 executed instruction addresses in $e000-$ffff", report)
+        never, executed = report.split("Executed (")
+        self.assertIn("$e400            1  Disable interrupts.", executed)
+        self.assertIn("$e403            0  Set direct page register to 0.", never)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - glyph atlas unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from dragonpy.Dragon32 import dragon_charmap
+from dragonpy.Dragon32.dragon_charmap import get_charmap_dict, get_rgb_color
+from dragonpy.Dragon32.dragon_font import (
+    ATLAS_COLUMNS, CHARS_DICT, get_atlas_key, get_atlas_path, render_atlas_ppm
+)
+
+
+log = logging.getLogger("DragonPy")
+
+
+def parse_ppm(data):
+    magic, size, maxval, pixels = data.split(b"\n", 3)
+    width, height = [int(i) for i in size.split()]
+    return magic, width, height, bytearray(pixels)
+
+
+class TestGlyphAtlas(unittest.TestCase):
+    def setUp(self):
+        self.charmap = get_charmap_dict()
+        self.temp_path = tempfile.mkdtemp(prefix="dragonpy_atlas_")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_render(self):
+        magic, width, height, pixels = parse_ppm(render_atlas_ppm(self.charmap, CHARS_DICT, 2))
+        self.assertEqual(magic, b"P6")
+        self.assertEqual(width, 8 * 2 * ATLAS_COLUMNS)
+        self.assertEqual(height, 13 * 2 * 256 // ATLAS_COLUMNS)
+        self.assertEqual(len(pixels), width * height * 3)
+
+        def get_pixel(x, y):
+            offset = (y * width + x) * 3
+            return tuple(pixels[offset:offset + 3])
+
+        # 0x41 is a normal "A": line 5 is "..X...X." in the font data
+        self.assertEqual(self.charmap[0x41], ("A", dragon_charmap.NORMAL))
+        foreground, background = get_rgb_color(dragon_charmap.NORMAL)
+        x = (0x41 % ATLAS_COLUMNS) * 16
+        y = (0x41 // ATLAS_COLUMNS) * 26 + 5 * 2
+        self.assertEqual(CHARS_DICT["A"][5], "..X...X.")
+        self.assertEqual(
+            [get_pixel(x + i, y + 1) for i in range(8)],
+            [background] * 4 + [foreground] * 2 + [background] * 2
+        )
+
+    def test_key(self):
+        key = get_atlas_key(self.charmap, CHARS_DICT, 2)
+        self.assertEqual(key, get_atlas_key(self.charmap, CHARS_DICT, 2))
+        self.assertNotEqual(key, get_atlas_key(self.charmap, CHARS_DICT, 3))
+
+        chars_dict = dict(CHARS_DICT)
+        chars_dict["A"] = chars_dict["B"]
+        self.assertNotEqual(key, get_atlas_key(self.charmap, chars_dict, 2))
+
+    def test_disk_cache(self):
+        path = get_atlas_path(self.charmap, CHARS_DICT, 1, cache_dir=self.temp_path)
+        self.assertEqual(os.listdir(self.temp_path), [os.path.basename(path)])
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), render_atlas_ppm(self.charmap, CHARS_DICT, 1))
+
+        # The cached file will be used:
+        with open(path, "wb") as f:
+            f.write(b"cached")
+        self.assertEqual(get_atlas_path(self.charmap, CHARS_DICT, 1, cache_dir=self.temp_path), path)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"cached")
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
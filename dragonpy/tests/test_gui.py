@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - GUI turbo mode unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    The GUI classes are used without a Tk window:
+    The display widgets are replaced by recording stubs.
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.autotune import BurstAutoTuner
+from dragonpy.core.benchmark import BenchmarkDragon32Cfg, get_memory
+from dragonpy.core.gui import DragonTkinterGUI, ScrolledTextGUI
+from dragonpy.Dragon32.MC6821_PIA import PIA
+from dragonpy.Dragon32.MC6847 import MC6847_GraphicsCanvas
+from dragonpy.Dragon32.MC6847_graphics import get_graphics_renderer
+from dragonpy.Dragon32.MC6883_SAM import SAM
+from dragonpy.tests.test_MC6847 import RecordingTextModeCanvas
+
+
+log = logging.getLogger("DragonPy")
+
+
+class StubVar(object):
+    """ Like tkinter.BooleanVar() """
+    def __init__(self, value=False):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class StubMachine(object):
+    def __init__(self, memory, periphery=None):
+        self.cpu = memory.cpu
+        self.periphery = periphery
+        self.idle_detector = None
+
+
+class StubPeriphery(object):
+    def __init__(self, pia, sam):
+        self.pia = pia
+        self.sam = sam
+
+
+class StubText(object):
+    """ Like scrolledtext.ScrolledText(): Insert only at the end """
+    def __init__(self):
+        self.content = ""
+
+    def insert(self, index, chars):
+        self.content += chars
+
+    def delete(self, index):
+        self.content = self.content[:-1]
+
+    def mark_set(self, mark, index):
+        pass
+
+    def see(self, index):
+        pass
+
+
+class RecordingGraphicsCanvas(MC6847_GraphicsCanvas):
+    """ Records the frames instead of updating Tk images """
+    def __init__(self):
+        self.renderer = get_graphics_renderer()
+        self.last_frame = None
+        self.frames = []
+
+    def put_frame(self, rgb):
+        self.frames.append(rgb)
+
+
+def init_gui_stub(gui, machine):
+    """ The BaseTkinterGUI.__init__() parts, that are used by the turbo mode """
+    gui.machine = machine
+    gui.user_input_queue = queue.Queue()
+    gui.auto_tuner = BurstAutoTuner(runtime_cfg=None)
+    gui.turbo = False
+    gui.turbo_var = StubVar()
+    gui.next_display_flush = 0
+    gui.init_statistics()
+
+
+class DragonGUIStub(DragonTkinterGUI):
+    def __init__(self):
+        memory = get_memory(Memory, BenchmarkDragon32Cfg)
+        periphery = StubPeriphery(
+            pia=PIA(memory.cfg, memory.cpu, memory, queue.Queue()),
+            sam=SAM(memory.cfg, memory.cpu, memory),
+        )
+        init_gui_stub(self, StubMachine(memory, periphery))
+        self.display = RecordingTextModeCanvas()
+        self.graphics_display = RecordingGraphicsCanvas()
+        self.graphics_mode = False
+
+    def set_graphics_mode(self, graphics_mode):
+        self.graphics_mode = graphics_mode # without the Tk grid changes
+
+
+class ScrolledTextGUIStub(ScrolledTextGUI):
+    def __init__(self):
+        init_gui_stub(self, StubMachine(get_memory(Memory, BenchmarkDragon32Cfg)))
+        self.text = StubText()
+        self.display_buffer = []
+
+
+class TestDragonTkinterGUI(unittest.TestCase):
+    def setUp(self):
+        self.gui = DragonGUIStub()
+        self.display = self.gui.display
+
+    def write(self, address, value):
+        self.gui.display_callback(0, 0, address, value)
+
+    def test_realtime(self):
+        self.write(0x0400, 0x41)
+        self.gui.update_display(now=0)
+        self.assertEqual(self.display.rendered, [(0, 0x41)])
+
+        self.write(0x0400, 0x42)
+        self.gui.update_display(now=0.01)
+        self.assertEqual(self.display.rendered, [(0, 0x41), (0, 0x42)])
+
+    def test_turbo_coalesce_writes(self):
+        self.gui.set_turbo(True)
+        self.assertTrue(self.gui.turbo_var.get())
+        self.gui.update_display(now=10)
+        self.assertEqual(self.gui.next_display_flush, 10 + self.gui.TURBO_DISPLAY_INTERVAL)
+
+        for value in (0x41, 0x42, 0x43):
+            self.write(0x0400, value)
+            self.gui.update_display(now=10.1)
+        self.write(0x0401, 0x44)
+        self.assertEqual(self.display.rendered, [])
+
+        # Only the last written values are displayed:
+        self.gui.update_display(now=10.3)
+        self.assertEqual(sorted(self.display.rendered), [(0, 0x43), (1, 0x44)])
+
+    def test_turbo_off_flush(self):
+        self.gui.set_turbo(True)
+        self.gui.update_display(now=10)
+        self.write(0x0400, 0x41)
+        self.gui.update_display(now=10.1)
+        self.assertEqual(self.display.rendered, [])
+
+        self.gui.set_turbo(False)
+        self.assertFalse(self.gui.turbo_var.get())
+        self.assertEqual(self.display.rendered, [(0, 0x41)])
+
+    def test_input_ends_turbo(self):
+        self.gui.set_turbo(True)
+        self.gui.update_display(now=10)
+        self.write(0x0400, 0x41)
+
+        self.gui.check_turbo_input()
+        self.assertTrue(self.gui.turbo)
+
+        self.gui.user_input_queue.put("A")
+        self.gui.check_turbo_input()
+        self.assertFalse(self.gui.turbo)
+        self.assertFalse(self.gui.turbo_var.get())
+        self.assertEqual(self.display.rendered, [(0, 0x41)])
+
+    def test_graphics_mode(self):
+        memory = self.gui.machine.cpu.memory
+        memory.write_byte(0xff23, 0x04) # $ff22 is the data register
+        memory.write_byte(0xff22, 0xf8) # PMODE 4 : SCREEN 1,1
+        self.gui.flush_display()
+        self.assertTrue(self.gui.graphics_mode)
+        self.assertEqual(len(self.gui.graphics_display.frames), 1)
+
+        self.gui.flush_display() # unchanged frame
+        self.assertEqual(len(self.gui.graphics_display.frames), 1)
+
+        memory.write_byte(0xff22, 0x00) # back to the text screen
+        self.gui.flush_display()
+        self.assertFalse(self.gui.graphics_mode)
+
+
+class TestScrolledTextGUI(unittest.TestCase):
+    def setUp(self):
+        self.gui = ScrolledTextGUIStub()
+        self.text = self.gui.text
+
+    def test_display_text(self):
+        self.gui.display_text("10 PRX")
+        self.gui.display_text("\x08INT")
+        self.assertEqual(self.text.content, "10 PRINT")
+
+    def test_realtime(self):
+        self.gui.display_callback("H")
+        self.assertEqual(self.text.content, "H")
+        self.gui.update_display(now=0)
+        self.assertEqual(self.text.content, "H")
+
+    def test_turbo_buffer(self):
+        self.gui.set_turbo(True)
+        self.gui.update_display(now=10)
+        for char in "0003\r\n\x08":
+            self.gui.display_callback(char)
+        self.gui.update_display(now=10.1)
+        self.assertEqual(self.text.content, "")
+        self.assertEqual(self.gui.display_buffer, list("0003\r\n\x08"))
+
+        self.gui.update_display(now=10.3)
+        self.assertEqual(self.text.content, "0003\r")
+        self.assertEqual(self.gui.display_buffer, [])
+
+    def test_turbo_off_flush(self):
+        self.gui.set_turbo(True)
+        self.gui.display_callback("OK")
+        self.assertEqual(self.text.content, "")
+        self.gui.set_turbo(False)
+        self.assertEqual(self.text.content, "OK")
+
+    def test_input_ends_turbo(self):
+        self.gui.set_turbo(True)
+        self.gui.display_callback("OK")
+        self.gui.user_input_queue.put("A")
+        self.gui.check_turbo_input()
+        self.assertFalse(self.gui.turbo)
+        self.assertEqual(self.text.content, "OK")
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
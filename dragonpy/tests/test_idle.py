@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - idle loop detection unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonpy.core.idle import IDLE_BURST_STOP, IdleLoopDetector
+from dragonpy.tests.test_base import Test6809_sbc09_Base
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestIdleLoopDetector(Test6809_sbc09_Base):
+    def setUp(self):
+        super(TestIdleLoopDetector, self).setUp()
+        self.detector = IdleLoopDetector(self.machine, sleep=False)
+
+    def _run_bursts(self, burst_count, end=None):
+        get_and_call_next_op = self.cpu.get_and_call_next_op
+        for __ in range(burst_count):
+            for __ in range(10):
+                if self.cpu.program_counter.value == end:
+                    return
+                get_and_call_next_op()
+            self.detector.call_sync_callbacks()
+
+    def test_delay_loop(self):
+        self.cpu.memory.write_block(0x1000, bytearray([
+            0x8e, 0x12, 0x34, # LDX #$1234
+            0x30, 0x1f, #       LEAX -1,X
+            0x26, 0xfc, #       BNE $1003
+            0x12, #             NOP
+        ]))
+        start_cycles = self.cpu.cycles
+        self.cpu.test_run(start=0x1000, end=0x1007)
+        cycles = self.cpu.cycles
+
+        self.cpu.program_counter.set(0x1000)
+        self._run_bursts(1000, end=0x1007)
+        self.assertEqualHex(self.cpu.program_counter.value, 0x1007)
+        self.assertEqualHex(self.cpu.index_x.value, 0x0000)
+        self.assertEqual(self.cpu.cycles - cycles, cycles - start_cycles)
+        self.assertGreater(self.detector.skipped_cycles, 0)
+
+    def test_wait_loop(self):
+        # The sbc09 waits in the ROM for a character:
+        self._run_bursts(20)
+        self.assertGreater(self.detector.skipped_cycles, 0)
+
+        # The input will be processed as usual:
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        op_call_count, cycles, output = self._run_until_newlines(newline_count=2)
+        self.assertEqual(output, ['H1+2\r\n', '0003\r\n'])
+
+    def test_burst_stop(self):
+        # The skipped time is not slept in the CPU burst:
+        detector = IdleLoopDetector(self.machine, sleep=True)
+        detector.install()
+        call_counter = []
+        def call_sync_callbacks():
+            call_counter.append(1)
+            detector.call_sync_callbacks()
+        self.cpu.call_sync_callbacks = call_sync_callbacks
+
+        self.cpu.outer_burst_op_count = 1000
+        self.cpu.burst_run()
+        self.assertLess(len(call_counter), 1000) # stopped early
+        idle_time = detector.pop_idle_time()
+        self.assertGreaterEqual(idle_time, IDLE_BURST_STOP)
+        self.assertAlmostEqual(idle_time, detector.skipped_cycles / detector.cycles_per_sec)
+        self.assertEqual(detector.pop_idle_time(), 0)
+
+    def test_no_skip_with_input(self):
+        self.periphery.add_to_input_queue('H')
+        self.detector.call_sync_callbacks()
+        self.assertEqual(self.detector.skipped_cycles, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
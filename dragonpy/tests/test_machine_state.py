@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - machine save-state unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import io
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from MC6809.components.cpu6809 import CPU
+
+try:
+    import queue # Python 3
+except ImportError:
+    import Queue as queue # Python 2
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.boot_cache import boot_machine, get_boot_cache_path
+from dragonpy.core.idle import IdleLoopDetector
+from dragonpy.core.input_recorder import RecordingInputQueue, ReplayInputQueue
+from dragonpy.core.machine import Machine
+from dragonpy.core.machine_state import write_state, read_state
+from dragonpy.core.rewind import Rewind
+from dragonpy.Dragon32.MC6821_PIA import PIA
+from dragonpy.sbc09.config import SBC09Cfg
+from dragonpy.sbc09.periphery import SBC09PeripheryUnittest
+from dragonpy.tests.test_base import Test6809_sbc09_Base, BaseCPUTestCase, \
+    get_machine_state
+from dragonpy.tests.test_config import TestCfg
+
+
+log = logging.getLogger("DragonPy")
+
+
+class Test_sbc09_MachineState(Test6809_sbc09_Base):
+
+    def _roundtrip(self, compress):
+        self.cpu.index_x.set(0x1234)
+        self.cpu.memory.write_block(0x1000, b"DragonPy")
+        self.user_input_queue.put("r")
+        cycles = self.cpu.cycles
+
+        f = io.BytesIO()
+        write_state(self.machine, f, compress=compress)
+
+        self.cpu.index_x.set(0x0000)
+        self.cpu.cycles = 0
+        self.cpu.memory.fill(0x0000, 0x8000, 0x00)
+        self.user_input_queue.queue.clear()
+
+        f.seek(0)
+        read_state(self.machine, f)
+
+        self.assertEqualHex(self.cpu.index_x.value, 0x1234)
+        self.assertEqual(self.cpu.cycles, cycles)
+        self.assertEqual(self.cpu.memory.read_block(0x1000, 0x1008).tobytes(), b"DragonPy")
+        self.assertEqual(list(self.user_input_queue.queue), ["r"])
+        return f.getvalue()
+
+    def test_roundtrip(self):
+        data = self._roundtrip(compress=False)
+        self.assertGreater(len(data), 0x10000)
+
+    def test_roundtrip_compressed(self):
+        data = self._roundtrip(compress=True)
+        self.assertLess(len(data), 0x10000)
+
+    def test_run_after_load(self):
+        f = io.BytesIO()
+        write_state(self.machine, f)
+
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        op_call_count, cycles, output = self._run_until_newlines(newline_count=2)
+        self.assertEqual(output, ['H1+2\r\n', '0003\r\n'])
+
+        f.seek(0)
+        read_state(self.machine, f)
+        self.periphery.setUp()
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        op_call_count2, cycles2, output = self._run_until_newlines(newline_count=2)
+        self.assertEqual(output, ['H1+2\r\n', '0003\r\n'])
+        self.assertEqual(cycles2, cycles)
+
+    def test_save_and_load_file(self):
+        path = os.path.join(tempfile.gettempdir(), "DragonPy_unittest.dpystate")
+        try:
+            self.machine.save_state(path)
+            self.machine.load_state(path)
+        finally:
+            os.remove(path)
+
+    def test_wrong_data(self):
+        f = io.BytesIO(b"This is no machine state")
+        self.assertRaises(RuntimeError, read_state, self.machine, f)
+
+
+class TestPIAState(unittest.TestCase):
+    def test_roundtrip(self):
+        cfg = TestCfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+        memory = Memory(cfg)
+        cpu = CPU(memory, cfg)
+        pia = PIA(cfg, cpu, memory, queue.Queue())
+
+        pia.pia_0_B_data.set(0xfe)
+        pia.pia_0_A_register.select_pdr()
+        pia.current_input_char = "A"
+        state = pia.get_state()
+
+        pia.reset()
+        pia.internal_reset()
+        pia.pia_0_B_data.set(0x00)
+
+        pia.set_state(state)
+        self.assertEqual(pia.pia_0_B_data.value, 0xfe)
+        self.assertTrue(pia.pia_0_A_register.is_pdr_selected())
+        self.assertEqual(pia.current_input_char, "A")
+
+
+class BaseCacheDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="DragonPy_")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _get_machine(self, user_input_queue=None):
+        if user_input_queue is None:
+            user_input_queue = queue.Queue()
+        cfg = SBC09Cfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+        machine = Machine(
+            cfg,
+            periphery_class=SBC09PeripheryUnittest,
+            display_callback=queue.Queue(),
+            user_input_queue=user_input_queue,
+        )
+        machine.periphery.setUp()
+        return machine
+
+
+class TestBootCache(BaseCacheDirTestCase):
+    def test_boot_cache(self):
+        machine1 = self._get_machine()
+        self.assertFalse(boot_machine(machine1, cache_dir=self.cache_dir))
+        path = get_boot_cache_path(machine1.cfg, self.cache_dir)
+        self.assertTrue(os.path.isfile(path))
+
+        machine2 = self._get_machine()
+        self.assertTrue(boot_machine(machine2, cache_dir=self.cache_dir))
+        self.assertEqual(machine2.cpu.program_counter.value, machine1.cfg.STARTUP_END_ADDR)
+        self.assertEqual(get_machine_state(machine2), get_machine_state(machine1))
+
+    def test_outdated_cache_removed(self):
+        machine = self._get_machine()
+        path = get_boot_cache_path(machine.cfg, self.cache_dir)
+        old_path = path.replace(".dpystate", "0.dpystate") # e.g.: other ROM
+        with open(old_path, "wb") as f:
+            f.write(b"old")
+
+        boot_machine(machine, cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(path)])
+
+    def test_corrupt_cache(self):
+        machine1 = self._get_machine()
+        boot_machine(machine1, cache_dir=self.cache_dir)
+        path = get_boot_cache_path(machine1.cfg, self.cache_dir)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        f = io.BytesIO()
+        write_state(machine1, f, compress=False)
+        uncompressed = f.getvalue()
+        json_start = uncompressed.index(b'{"dragonpy_version"')
+
+        for corrupt_data in (
+            data[:-20], # zlib.error
+            uncompressed[:json_start - 2], # struct.error
+            uncompressed[:json_start] + b"x" + uncompressed[json_start + 1:], # ValueError
+            uncompressed.replace(b'"machine"', b'"xxxxxxx"'), # KeyError
+        ):
+            with open(path, "wb") as f:
+                f.write(corrupt_data)
+
+            machine2 = self._get_machine()
+            self.assertFalse(boot_machine(machine2, cache_dir=self.cache_dir))
+            self.assertEqual(get_machine_state(machine2), get_machine_state(machine1))
+
+            # The cache is written again:
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), data)
+
+
+class TestInputRecordReplay(BaseCacheDirTestCase):
+    def _run(self, user_input_queue, txt="", ops=20000):
+        machine = self._get_machine(user_input_queue)
+        boot_machine(machine, cache_dir=self.cache_dir)
+        machine.periphery.setUp()
+        user_input_queue.start(machine.cpu)
+        for char in txt:
+            user_input_queue.put(char)
+        for __ in range(ops):
+            machine.cpu.get_and_call_next_op()
+        user_input_queue.close()
+        return machine
+
+    def test_record_and_replay(self):
+        filename = os.path.join(self.cache_dir, "input.txt")
+        cfg = SBC09Cfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+
+        record_queue = RecordingInputQueue(cfg, filename)
+        machine1 = self._run(record_queue, txt='H1+2\r\n')
+        self.assertEqual(machine1.periphery.output, 'H1+2\r\n0003\r\n')
+
+        replay_queue = ReplayInputQueue(cfg, filename)
+        self.assertEqual(replay_queue.qsize(), 6)
+        machine2 = self._run(replay_queue, txt="X") # keyboard input will be ignored
+        self.assertTrue(replay_queue.empty())
+        self.assertEqual(machine2.periphery.output, machine1.periphery.output)
+        self.assertEqual(get_machine_state(machine2), get_machine_state(machine1))
+
+    def _run_idle(self, user_input_queue, txt, bursts=2000):
+        """
+        Run with idle loop detection: The input is send after the
+        machine waits some time at the prompt.
+        """
+        machine = self._get_machine(user_input_queue)
+        boot_machine(machine, cache_dir=self.cache_dir)
+        machine.periphery.setUp()
+        detector = IdleLoopDetector(machine, sleep=False)
+        user_input_queue.start(machine.cpu)
+        get_and_call_next_op = machine.cpu.get_and_call_next_op
+        for burst in range(bursts):
+            if burst == 100:
+                for char in txt:
+                    user_input_queue.put(char)
+            for __ in range(10):
+                get_and_call_next_op()
+            detector.call_sync_callbacks()
+        user_input_queue.close()
+        return machine, detector
+
+    def test_replay_with_idle_detector(self):
+        filename = os.path.join(self.cache_dir, "input.txt")
+        cfg = SBC09Cfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+
+        record_queue = RecordingInputQueue(cfg, filename)
+        machine1, detector1 = self._run_idle(record_queue, txt='H1+2\r\n')
+        self.assertEqual(machine1.periphery.output, 'H1+2\r\n0003\r\n')
+
+        replay_queue = ReplayInputQueue(cfg, filename)
+        recorded_events = list(replay_queue.events)
+        self.assertTrue(replay_queue.empty()) # the first event is not due
+
+        replayed_events = []
+        def get(*args, **kwargs):
+            item = ReplayInputQueue.get(replay_queue, *args, **kwargs)
+            replayed_events.append((replay_queue.cpu.cycles, item))
+            return item
+        replay_queue.get = get
+
+        machine2, detector2 = self._run_idle(replay_queue, txt="X")
+        # The waiting for the first event is skipped, too:
+        self.assertGreater(detector2.skipped_cycles, 0)
+        # ...but every event is consumed at the recorded CPU cycles:
+        self.assertEqual(replayed_events, recorded_events)
+        self.assertEqual(machine2.periphery.output, machine1.periphery.output)
+
+
+class TestRewind(BaseCacheDirTestCase):
+    def setUp(self):
+        super(TestRewind, self).setUp()
+        self.machine = self._get_machine()
+        boot_machine(self.machine, cache_dir=self.cache_dir)
+        self.machine.periphery.setUp()
+
+    def _run(self, txt="", ops=5000):
+        self.machine.user_input_queue.queue.extend(txt)
+        for __ in range(ops):
+            self.machine.cpu.get_and_call_next_op()
+
+    def test_rewind(self):
+        rewind = Rewind(self.machine, keyframes=3)
+        states = []
+        for txt in ("H1+2\r\n", "r\r\n", "", "H3+4\r\n", "H5+6\r\n"):
+            rewind.take_snapshot()
+            states.append(get_machine_state(self.machine))
+            self._run(txt)
+        self.assertEqual(len(rewind.snapshots), 5)
+        self.assertEqual(rewind.keyframe_count, 2)
+        self.assertEqual(
+            [snapshot.is_keyframe for snapshot in rewind.snapshots],
+            [True, False, False, True, False]
+        )
+
+        for index in (3, 1):
+            rewind.restore(index)
+            self.assertEqual(get_machine_state(self.machine), states[index])
+            self.assertEqual(len(rewind.snapshots), index + 1)
+
+        # The delta of the next snapshot is based on the restored one:
+        self._run("H7+8\r\n")
+        rewind.take_snapshot()
+        state = get_machine_state(self.machine)
+        self._run("H9+9\r\n")
+        rewind.restore(2)
+        self.assertEqual(get_machine_state(self.machine), state)
+
+    def test_rewind_cycles(self):
+        rewind = Rewind(self.machine)
+        self.assertFalse(rewind.rewind_cycles(1))
+        rewind.take_snapshot()
+        cycles = self.machine.cpu.cycles
+        self._run("H1+2\r\n")
+        rewind.take_snapshot()
+        self._run(ops=100)
+
+        self.assertTrue(rewind.rewind_cycles(1000000))
+        self.assertEqual(self.machine.cpu.cycles, cycles)
+
+    def test_budget(self):
+        rewind = Rewind(self.machine, keyframes=2, budget=0)
+        for no in range(5):
+            self.machine.cpu.memory.write_byte(0x1000, no)
+            rewind.take_snapshot()
+            self.assertEqual(rewind.keyframe_count, 1)
+            self.assertTrue(rewind.snapshots[0].is_keyframe)
+            self.assertEqual(rewind.total_size, sum(snapshot.size for snapshot in rewind.snapshots))
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - memory unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonlib.tests.test_base import BaseTestCase
+from MC6809.components.cpu6809 import CPU
+
+from dragonpy.components.memory import Memory, RAM_PAGE, ROM_PAGE, IO_PAGE
+from dragonpy.tests.test_base import BaseCPUTestCase
+from dragonpy.tests.test_config import TestCfg
+
+
+log = logging.getLogger("DragonPy")
+
+
+class BaseMemoryTestCase(BaseTestCase):
+    """
+    The TestCfg has RAM in $0000-$7fff and ROM in $8000-$ffff
+    """
+    def setUp(self):
+        cfg = TestCfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+        self.memory = Memory(cfg)
+        self.cpu = CPU(self.memory, cfg)
+
+
+class TestMemoryPageTable(BaseMemoryTestCase):
+
+    def test_initial_page_tables(self):
+        self.assertEqual(self.memory._write_byte_pages[0x00], RAM_PAGE)
+        self.assertEqual(self.memory._write_byte_pages[0x7f], RAM_PAGE)
+        self.assertEqual(self.memory._write_byte_pages[0x80], ROM_PAGE)
+        self.assertEqual(self.memory._write_byte_pages[0xff], ROM_PAGE)
+        self.assertEqual(self.memory._read_byte_pages[0x80], RAM_PAGE)
+
+    def test_ram_read_write(self):
+        cycles = self.cpu.cycles
+        self.memory.write_byte(0x1234, 0xab)
+        self.assertEqualHexByte(self.memory.read_byte(0x1234), 0xab)
+        self.assertEqual(self.cpu.cycles, cycles + 2)
+
+    def test_rom_write_ignored(self):
+        self.memory.load(0x8000, [0x12])
+        self.memory.write_byte(0x8000, 0xff)
+        self.assertEqualHexByte(self.memory.read_byte(0x8000), 0x12)
+
+    def test_word_access(self):
+        self.memory.write_word(0x0100, 0x1234)
+        self.assertEqualHexWord(self.memory.read_word(0x0100), 0x1234)
+        self.assertEqualHexByte(self.memory.read_byte(0x0100), 0x12)
+        self.assertEqualHexByte(self.memory.read_byte(0x0101), 0x34)
+
+    def test_add_callback_marks_io_page(self):
+        calls = []
+
+        def read_callback(cpu_cycles, op_address, address):
+            calls.append(("read", address))
+            return 0x42
+
+        def write_callback(cpu_cycles, op_address, address, value):
+            calls.append(("write", address, value))
+
+        self.memory.write_byte(0x2010, 0x01)
+        self.memory.add_read_byte_callback(read_callback, 0x2000, 0x2001)
+        self.memory.add_write_byte_callback(write_callback, 0x2000)
+
+        self.assertEqual(self.memory._read_byte_pages[0x20], IO_PAGE)
+        self.assertEqual(self.memory._write_byte_pages[0x20], IO_PAGE)
+        self.assertEqual(self.memory._read_byte_pages[0x21], RAM_PAGE)
+
+        self.assertEqualHexByte(self.memory.read_byte(0x2001), 0x42)
+        self.memory.write_byte(0x2000, 0x99)
+        self.assertEqual(calls, [("read", 0x2001), ("write", 0x2000, 0x99)])
+
+        # Other addresses on the same page are normal RAM:
+        self.assertEqualHexByte(self.memory.read_byte(0x2010), 0x01)
+        self.memory.write_byte(0x2010, 0x02)
+        self.assertEqualHexByte(self.memory.read_byte(0x2010), 0x02)
+
+    def test_write_middleware(self):
+        def middleware(cpu_cycles, op_address, address, value):
+            return value + 1
+
+        self.memory.add_write_byte_middleware(middleware, 0x0400, 0x05ff)
+        self.memory.write_byte(0x0400, 0x10)
+        self.memory.write_byte(0x05ff, 0x20)
+        self.assertEqualHexByte(self.memory.read_byte(0x0400), 0x11)
+        self.assertEqualHexByte(self.memory.read_byte(0x05ff), 0x21)
+
+
+class TestMemoryObservers(BaseMemoryTestCase):
+
+    def test_big_range_stores_only_the_range(self):
+        def callback(cpu_cycles, op_address, address):
+            return address & 0xff
+
+        self.memory.add_read_byte_callback(callback, 0x5000, 0x5fff)
+        self.assertEqual(len(self.memory._read_byte_callbacks), 0)
+        self.assertEqualHexByte(self.memory.read_byte(0x5123), 0x23)
+        self.assertEqual(len(self.memory._read_byte_callbacks), 1) # cached lookup
+
+    def test_many_middlewares(self):
+        calls = []
+
+        def display_middleware(cpu_cycles, op_address, address, value):
+            calls.append("display")
+            return value
+
+        def watch_middleware(cpu_cycles, op_address, address, value):
+            calls.append("watch $%04x: $%02x" % (address, value))
+            return value + 1
+
+        self.memory.add_write_byte_middleware(display_middleware, 0x0400, 0x05ff)
+        self.memory.add_write_byte_middleware(watch_middleware, 0x0500)
+
+        self.memory.write_byte(0x0400, 0x10)
+        self.memory.write_byte(0x0500, 0x20)
+        self.assertEqual(calls, ["display", "display", "watch $0500: $20"])
+        self.assertEqualHexByte(self.memory.read_byte(0x0400), 0x10)
+        self.assertEqualHexByte(self.memory.read_byte(0x0500), 0x21)
+
+        self.memory.remove_write_byte_middleware(watch_middleware)
+        self.memory.write_byte(0x0500, 0x30)
+        self.assertEqualHexByte(self.memory.read_byte(0x0500), 0x30)
+        self.assertEqual(calls, ["display", "display", "watch $0500: $20", "display"])
+
+    def test_remove_callback(self):
+        def callback(cpu_cycles, op_address, address):
+            return 0x42
+
+        self.memory.add_read_byte_callback(callback, 0x2000, 0x20ff)
+        self.assertEqual(self.memory._read_byte_pages[0x20], IO_PAGE)
+        self.assertEqualHexByte(self.memory.read_byte(0x2010), 0x42)
+
+        # Remove a part of the range:
+        self.memory.remove_read_byte_callback(callback, 0x2010)
+        self.assertEqualHexByte(self.memory.read_byte(0x2010), 0x00)
+        self.assertEqualHexByte(self.memory.read_byte(0x200f), 0x42)
+        self.assertEqualHexByte(self.memory.read_byte(0x2011), 0x42)
+
+        self.memory.remove_read_byte_callback(callback)
+        self.assertEqual(self.memory._read_byte_pages[0x20], RAM_PAGE)
+        self.assertEqualHexByte(self.memory.read_byte(0x2011), 0x00)
+
+        self.assertRaises(KeyError, self.memory.remove_read_byte_callback, callback)
+
+
+class TestMemoryBlockTransfer(BaseMemoryTestCase):
+
+    def test_write_and_read_block(self):
+        cycles = self.cpu.cycles
+        self.memory.write_block(0x1000, b"\x01\x02\x03")
+        self.assertEqual(self.memory.read_block(0x1000, 0x1003).tobytes(), b"\x01\x02\x03")
+        self.assertEqual(self.memory.get(0x0fff, 0x1004), [0x00, 0x01, 0x02, 0x03, 0x00])
+        self.assertEqual(self.cpu.cycles, cycles)
+
+    def test_block_bypass_callbacks(self):
+        def callback(*args):
+            self.fail("Callback called!")
+
+        self.memory.add_read_byte_callback(callback, 0x2000)
+        self.memory.add_write_byte_callback(callback, 0x2000)
+        self.memory.write_block(0x2000, [0x12, 0x34])
+        self.assertEqual(list(self.memory.iter_bytes(0x2000, 0x2002)), [(0x2000, 0x12), (0x2001, 0x34)])
+
+    def test_write_block_outside_memory(self):
+        self.assertRaises(ValueError, self.memory.write_block, 0xffff, [0x01, 0x02])
+
+    def test_load_overflow(self):
+        self.assertRaises(OverflowError, self.memory.load, 0x1000, [0x01, 0x100])
+
+    def test_find(self):
+        self.memory.load(0x3000, "HELLO")
+        self.assertEqual(self.memory.find(b"LLO"), 0x3002)
+        self.assertEqual(self.memory.find([0x48, 0x45], 0x2000, 0x4000), 0x3000)
+        self.assertEqual(self.memory.find(b"HELLO", 0x3001), -1)
+        self.assertEqual(self.memory.find(b"HELLO", 0x0000, 0x3004), -1)
+
+    def test_fill(self):
+        self.memory.fill(0x0400, 0x0600, 0x60)
+        self.assertEqual(self.memory.get(0x03ff, 0x0401), [0x00, 0x60])
+        self.assertEqual(self.memory.get(0x05ff, 0x0601), [0x60, 0x00])
+
+
+class TestMemoryDirtyPages(BaseMemoryTestCase):
+
+    def test_ram_writes(self):
+        self.memory.get_dirty_pages() # reset
+        self.memory.write_byte(0x0100, 0x01)
+        self.memory.write_word(0x02ff, 0x1234)
+        self.memory.write_byte(0x9000, 0x01) # ROM
+        self.assertEqual(self.memory.get_dirty_pages(reset=False), [0x01, 0x02, 0x03])
+        self.assertEqual(self.memory.get_dirty_pages(), [0x01, 0x02, 0x03])
+        self.assertEqual(self.memory.get_dirty_pages(), [])
+
+    def test_block_writes(self):
+        self.memory.get_dirty_pages() # reset
+        self.memory.fill(0x0400, 0x0600, 0x60)
+        self.assertEqual(self.memory.get_dirty_pages(), [0x04, 0x05])
+
+    def test_region_generation(self):
+        video_generation = self.memory.get_region_generation(0x0400, 0x0600)
+        generation = self.memory.generation
+        self.memory.write_byte(0x1000, 0x01)
+        self.assertEqual(self.memory.get_region_generation(0x0400, 0x0600), video_generation)
+        self.assertEqual(self.memory.get_changed_pages(generation), [0x10])
+
+        self.memory.write_byte(0x05ff, 0x01)
+        self.assertGreater(self.memory.get_region_generation(0x0400, 0x0600), video_generation)
+        self.assertEqual(self.memory.get_changed_pages(generation), [0x05, 0x10])
+
+    def test_empty_region_generation(self):
+        self.memory.write_byte(0x0400, 0x01)
+        self.assertEqual(self.memory.get_region_generation(0x0400, 0x0400), 0)
+        self.assertEqual(self.memory.get_region_generation(0x0600, 0x0400), 0)
+
+
+class TestMemoryAccessors(TestMemoryPageTable, TestMemoryObservers, TestMemoryDirtyPages):
+    """
+    Run the same tests with the specialized read/write functions
+    """
+    def setUp(self):
+        cfg_dict = BaseCPUTestCase.UNITTEST_CFG_DICT.copy()
+        cfg_dict["memory_debug"] = False
+        cfg = TestCfg(cfg_dict)
+        self.memory = Memory(cfg)
+        self.cpu = CPU(self.memory, cfg)
+
+    def test_accessors_used(self):
+        self.assertIn("read_byte", self.memory.__dict__)
+        self.assertIn("write_word", self.memory.__dict__)
+
+    def test_debug_mode_uses_methods(self):
+        cfg = TestCfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+        memory = Memory(cfg)
+        CPU(memory, cfg)
+        self.assertNotIn("read_byte", memory.__dict__)
+
+    def test_callbacks_added_later(self):
+        calls = []
+
+        def read_word_callback(cpu_cycles, op_address, address):
+            calls.append(address)
+            return 0x1234
+
+        self.assertEqualHexWord(self.memory.read_word(0x3000), 0x0000)
+        self.memory.add_read_word_callback(read_word_callback, 0x3000)
+        self.assertEqualHexWord(self.memory.read_word(0x3000), 0x1234)
+        self.assertEqual(calls, [0x3000])
+
+    def test_read_word_across_io_page(self):
+        def read_callback(cpu_cycles, op_address, address):
+            return 0xab
+
+        self.memory.add_read_byte_callback(read_callback, 0x2100)
+        self.memory.write_byte(0x20ff, 0x12)
+        self.assertEqualHexWord(self.memory.read_word(0x20ff), 0x12ab)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
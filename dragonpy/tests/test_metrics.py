@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - metrics registry unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+from six.moves.urllib.request import urlopen
+
+from dragonpy.core.metrics import MachineMetrics, MetricsRegistry
+from dragonpy.core.profiler import Profiler
+from dragonpy.tests.test_base import Test6809_sbc09_Base
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.counter = self.registry.counter("test_calls_total", "Test calls",
+            labels={"device": "PIA"}
+        )
+        self.registry.gauge("test_depth", "Test depth", func=lambda: 5)
+
+    def test_values(self):
+        self.counter.inc()
+        self.counter.inc(2)
+        self.assertEqual(self.registry.get_values(), {
+            'test_calls_total{device="PIA"}': 3,
+            "test_depth": 5,
+        })
+
+    def test_json_line(self):
+        self.counter.inc()
+        data = json.loads(self.registry.get_json_line(now=123.5))
+        self.assertEqual(data, {
+            "time": 123.5,
+            "metrics": {'test_calls_total{device="PIA"}': 1, "test_depth": 5},
+        })
+
+    def test_prometheus_text(self):
+        self.registry.counter("test_calls_total", "Test calls", labels={"device": "SAM"}).inc(7)
+        self.assertEqual(self.registry.get_prometheus_text(), (
+            "# HELP test_calls_total Test calls\n"
+            "# TYPE test_calls_total counter\n"
+            'test_calls_total{device="PIA"} 0\n'
+            'test_calls_total{device="SAM"} 7\n'
+            "# HELP test_depth Test depth\n"
+            "# TYPE test_depth gauge\n"
+            "test_depth 5\n"
+        ))
+
+    def test_duplicate(self):
+        self.assertRaises(RuntimeError,
+            self.registry.counter, "test_calls_total", "Test calls", labels={"device": "PIA"}
+        )
+
+
+class TestMachineMetrics(Test6809_sbc09_Base):
+    @classmethod
+    def setUpClass(cls):
+        super(TestMachineMetrics, cls).setUpClass()
+        cls.metrics = MachineMetrics(cls.machine)
+        cls.metrics.install()
+
+    def setUp(self):
+        super(TestMachineMetrics, self).setUp()
+        self.temp_path = tempfile.mkdtemp(prefix="dragonpy_metrics_")
+
+    def tearDown(self):
+        self.metrics.stop()
+        shutil.rmtree(self.temp_path)
+
+    def test_counters(self):
+        values = self.metrics.registry.get_values()
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        self._run_until_newlines(newline_count=2)
+        self.cpu.run(max_run_time=0.01)
+        new_values = self.metrics.registry.get_values()
+
+        key = 'dragonpy_memory_callback_calls_total{device="SBC09PeripheryUnittest"}'
+        self.assertGreater(new_values[key], values[key])
+        self.assertEqual(new_values["dragonpy_cpu_cycles_total"], self.cpu.cycles)
+        self.assertGreater(new_values["dragonpy_cpu_ops_total"], values["dragonpy_cpu_ops_total"])
+        self.assertEqual(new_values["dragonpy_cpu_bursts_total"], values["dragonpy_cpu_bursts_total"] + 1)
+        self.assertGreater(new_values["dragonpy_cpu_burst_duration_seconds_total"], 0)
+        self.assertEqual(new_values["dragonpy_input_queue_depth"], 0)
+
+    def test_rates(self):
+        self.metrics.update(now=100)
+        cycles = self.cpu.cycles
+        self.cpu.run(max_run_time=0.01)
+        self.metrics.update(now=102)
+        self.assertEqual(
+            self.metrics.cycles_per_sec.get_value(), (self.cpu.cycles - cycles) / 2
+        )
+        self.assertGreater(self.metrics.burst_duration_max.get_value(), 0)
+
+        self.metrics.update(now=103)
+        self.assertEqual(self.metrics.burst_duration_max.get_value(), 0)
+
+    def test_display_callback(self):
+        lines = []
+        display_callback = self.metrics.wrap_display_callback(lines.append)
+        count = self.metrics.display_writes.value
+        display_callback("X")
+        self.assertEqual(lines, ["X"])
+        self.assertEqual(self.metrics.display_writes.value, count + 1)
+
+    def test_json_export(self):
+        json_path = os.path.join(self.temp_path, "metrics.jsonl")
+        self.metrics.start(json_path=json_path)
+        self.metrics.stop()
+        with open(json_path, "r") as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1) # written at the stop
+        data = json.loads(lines[0])
+        self.assertEqual(data["metrics"]["dragonpy_cpu_cycles_total"], self.cpu.cycles)
+
+    def test_http_export(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        self.metrics.start(port=port)
+        response = urlopen("http://127.0.0.1:%i/metrics" % port)
+        try:
+            text = response.read().decode("utf-8")
+        finally:
+            response.close()
+        self.assertIn("# TYPE dragonpy_cpu_cycles_total counter\n", text)
+        self.assertIn("dragonpy_cpu_cycles_total %i\n" % self.cpu.cycles, text)
+
+
+class TestMetricsWithProfiler(Test6809_sbc09_Base):
+    """
+    The metrics are installed after the profiler wrapped the memory callbacks.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestMetricsWithProfiler, cls).setUpClass()
+        cls.profiler = Profiler(cls.machine)
+        cls.profiler.install()
+        cls.metrics = MachineMetrics(cls.machine)
+        cls.metrics.install()
+
+    def tearDown(self):
+        self.metrics.stop()
+
+    def test_device_names(self):
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        self._run_until_newlines(newline_count=2)
+
+        values = self.metrics.registry.get_values()
+        key = 'dragonpy_memory_callback_calls_total{device="SBC09PeripheryUnittest"}'
+        self.assertGreater(values[key], 0)
+        self.assertNotIn('dragonpy_memory_callback_calls_total{device="dragonpy.core.profiler"}', values)
+
+        device_names = set(info[0] for info in self.profiler.callback_info)
+        self.assertIn("SBC09PeripheryUnittest", device_names)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
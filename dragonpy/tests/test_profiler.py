@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - execution histogram unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from dragonpy.core.profiler import Profiler, SamplingProfiler, BasicLineProfiler
+from dragonpy.tests.test_base import Test6809_sbc09_Base
+
+
+log = logging.getLogger("DragonPy")
+
+
+class TestProfiler(Test6809_sbc09_Base):
+    @classmethod
+    def setUpClass(cls):
+        super(TestProfiler, cls).setUpClass()
+        cls.profiler = Profiler(cls.machine)
+        cls.profiler.install()
+
+    def setUp(self):
+        super(TestProfiler, self).setUp()
+        self.profiler.reset()
+
+    def test_histograms(self):
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        op_call_count, cycles, output = self._run_until_newlines(newline_count=2)
+        self.assertEqual(output, ['H1+2\r\n', '0003\r\n'])
+
+        self.assertEqual(sum(self.profiler.opcode_counts), op_call_count + 1)
+        self.assertEqual(sum(self.profiler.pc_counts), op_call_count + 1)
+
+        opcode_stats = self.profiler.get_opcode_stats()
+        counts = [count for count, opcode, mnemonic in opcode_stats]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        mnemonics = [mnemonic for count, opcode, mnemonic in opcode_stats]
+        self.assertIn("JSR", mnemonics)
+
+        # The O.S. routine to read a character:
+        addresses = [address for count, address in self.profiler.get_address_stats()]
+        self.assertIn(0xe45a, addresses)
+
+    def test_device_stats(self):
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        self._run_until_newlines(newline_count=2)
+
+        device_stats = self.profiler.get_device_stats()
+        total, device_name, callback_stats = device_stats[0]
+        self.assertEqual(device_name, "SBC09PeripheryUnittest")
+        self.assertGreater(total, 0)
+        callbacks = dict(
+            (func_name, count)
+            for count, access_type, func_name, start_addr, end_addr in callback_stats
+            if access_type == "write byte" and start_addr == 0xe001
+        )
+        self.assertEqual(callbacks["write_acia_data"], len('H1+2\r\n0003\r\n'))
+
+    def test_report(self):
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        self._run_until_newlines(newline_count=2)
+        report = self.profiler.get_report(top_addresses=5)
+        self.assertIn("DragonPy profile of %s" % self.machine.cfg.MACHINE_NAME, report)
+        self.assertIn("Instructions per address (top 5):", report)
+        self.assertIn("SBC09PeripheryUnittest", report)
+        self.assertIn("O.S. routine to write the character", report) # from mem_info
+
+
+class TestSamplingProfiler(Test6809_sbc09_Base):
+    @classmethod
+    def setUpClass(cls):
+        super(TestSamplingProfiler, cls).setUpClass()
+        cls.profiler = SamplingProfiler(cls.machine, interval=100)
+        cls.profiler.install()
+
+    def setUp(self):
+        super(TestSamplingProfiler, self).setUp()
+        self.profiler.reset()
+
+    def _run_bursts(self, burst_count):
+        get_and_call_next_op = self.cpu.get_and_call_next_op
+        for __ in range(burst_count):
+            for __ in range(10):
+                get_and_call_next_op()
+            self.cpu.call_sync_callbacks()
+
+    def test_samples(self):
+        start_cycles = self.cpu.cycles
+        self._run_bursts(100)
+        sample_count = sum(self.profiler.samples)
+        self.assertAlmostEqual(sample_count, (self.cpu.cycles - start_cycles) / 100, delta=2)
+
+    def test_collapsed_stacks(self):
+        self.periphery.add_to_input_queue('H1+2\r\n')
+        self._run_bursts(200)
+        self.assertIn('0003\r\n', self.periphery.output)
+
+        lines = self.profiler.get_collapsed_text().splitlines()
+        stacks = {}
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            stacks[stack] = int(count)
+        self.assertEqual(sum(stacks.values()), sum(self.profiler.samples))
+
+        for stack in stacks:
+            frames = stack.split(";")
+            self.assertEqual(frames[0], self.machine.cfg.MACHINE_NAME)
+        self.assertTrue(
+            any("$e400-$ffff Monitor ROM" in stack for stack in stacks),
+            lines
+        )
+
+
+class TestBasicLineProfiler(Test6809_sbc09_Base):
+    CURLIN_ADDR = 0x0100 # The sbc09 has no BASIC: Use a free RAM address
+
+    def setUp(self):
+        super(TestBasicLineProfiler, self).setUp()
+        self.profiler = BasicLineProfiler(self.machine, interval=100, curlin_addr=self.CURLIN_ADDR)
+
+    def set_line_number(self, line_number):
+        self.cpu.memory.write_block(self.CURLIN_ADDR,
+            bytearray((line_number >> 8, line_number & 0xff))
+        )
+
+    def test_not_supported(self):
+        self.assertRaises(RuntimeError, BasicLineProfiler, self.machine)
+
+    def test_line_cycles(self):
+        for line_number, count in ((10, 3), (20, 5), (0xffff, 2), (10, 1)):
+            self.set_line_number(line_number)
+            for __ in range(count):
+                self.profiler.sample(self.cpu.cycles)
+        self.assertEqual(self.profiler.get_line_cycles(), {10: 400, 20: 500})
+
+        report = self.profiler.get_report([
+            '10 FOR I=1 TO 100', '20 NEXT I', '30 END',
+        ])
+        self.assertIn("900 CPU cycles in program lines, 200 in direct mode", report)
+        top_lines, listing = report.split("Listing:")
+        self.assertIn(
+            "       500  55.56%  20 NEXT I\n"
+            "       400  44.44%  10 FOR I=1 TO 100\n",
+            top_lines
+        )
+        self.assertIn(
+            "       400  44.44%  10 FOR I=1 TO 100\n"
+            "       500  55.56%  20 NEXT I\n"
+            "         0   0.00%  30 END\n",
+            listing
+        )
+
+    def test_scheduler(self):
+        self.profiler.install()
+        try:
+            self.set_line_number(100)
+            start_cycles = self.cpu.cycles
+            for __ in range(50):
+                for __ in range(10):
+                    self.cpu.get_and_call_next_op()
+                self.cpu.call_sync_callbacks()
+            cycles = self.cpu.cycles - start_cycles
+        finally:
+            self.profiler.uninstall()
+        self.assertAlmostEqual(self.profiler.get_line_cycles()[100], cycles, delta=200)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# encoding:utf-8
+
+"""
+    DragonPy - cycle scheduler unittests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import logging
+import unittest
+
+from MC6809.components.cpu6809 import CPU
+
+from dragonpy.components.memory import Memory
+from dragonpy.core.scheduler import get_scheduler, NO_EVENT
+from dragonpy.tests.test_base import BaseCPUTestCase
+from dragonpy.tests.test_config import TestCfg
+from dragonpy.vectrex.MOS6522 import MOS6522VIA
+
+
+log = logging.getLogger("DragonPy")
+
+
+class BaseSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cfg = TestCfg(BaseCPUTestCase.UNITTEST_CFG_DICT.copy())
+        self.memory = Memory(self.cfg)
+        self.cpu = CPU(self.memory, self.cfg)
+        self.scheduler = get_scheduler(self.cpu)
+        self.calls = []
+
+    def callback(self, cycles):
+        self.calls.append((cycles, self.cpu.cycles))
+
+    def run_cycles(self, cycles):
+        """ Simulate a CPU burst """
+        self.cpu.cycles += cycles
+        self.cpu.call_sync_callbacks()
+
+
+class TestScheduler(BaseSchedulerTestCase):
+    def test_installed(self):
+        self.assertIs(get_scheduler(self.cpu), self.scheduler)
+        self.assertEqual(self.cpu.call_sync_callbacks, self.scheduler.call_sync_callbacks)
+        self.assertEqual(self.scheduler.next_event_cycles, NO_EVENT)
+
+    def test_one_shot(self):
+        event = self.scheduler.add_event_in(100, self.callback)
+        self.assertEqual(self.scheduler.next_event_cycles, 100)
+        self.run_cycles(99)
+        self.assertEqual(self.calls, [])
+        self.run_cycles(5)
+        self.assertEqual(self.calls, [(100, 104)])
+        self.assertFalse(event.active)
+        self.assertEqual(self.scheduler.next_event_cycles, NO_EVENT)
+
+    def test_periodic_without_drift(self):
+        self.scheduler.add_periodic_event(100, self.callback)
+        for __ in range(3):
+            self.run_cycles(110)
+        self.assertEqual(self.calls, [(100, 110), (200, 220), (300, 330)])
+
+        # All missed periods are called:
+        self.run_cycles(250)
+        self.assertEqual(self.calls[3:], [(400, 580), (500, 580)])
+
+    def test_order(self):
+        self.scheduler.add_event(30, lambda cycles: self.calls.append("c"))
+        self.scheduler.add_event(10, lambda cycles: self.calls.append("a"))
+        self.scheduler.add_event(10, lambda cycles: self.calls.append("b"))
+        self.run_cycles(50)
+        self.assertEqual(self.calls, ["a", "b", "c"])
+
+    def test_remove_and_reschedule(self):
+        event = self.scheduler.add_event(10, self.callback)
+        self.scheduler.remove_event(event)
+        self.run_cycles(20)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.scheduler.next_event_cycles, NO_EVENT)
+
+        self.scheduler.reschedule_event(event, 40)
+        self.scheduler.reschedule_event(event, 30) # the old entry must be skipped
+        self.run_cycles(20)
+        self.assertEqual(self.calls, [(30, 40)])
+
+    def test_move_cycles(self):
+        periodic = self.scheduler.add_periodic_event(100, self.callback)
+        one_shot = self.scheduler.add_event(50, self.callback)
+        self.scheduler.move_cycles(old_cycles=0, new_cycles=1000)
+        self.assertEqual(periodic.cycles, 1100)
+        self.assertEqual(one_shot.cycles, 1050)
+        self.assertEqual(self.scheduler.next_event_cycles, 1050)
+
+    def test_sync_callback_compatible(self):
+        self.cpu.add_sync_callback(callback_cycles=100, callback=self.calls.append)
+        self.run_cycles(110)
+        self.assertEqual(self.calls, [110])
+
+
+class TestVIATimer(BaseSchedulerTestCase):
+    def setUp(self):
+        super(TestVIATimer, self).setUp()
+        self.via = MOS6522VIA(self.cfg, self.memory)
+
+    def test_t1_one_shot(self):
+        self.via.write8(0xd004, 0x20) # T1 low latch
+        self.via.write8(0xd005, 0x00) # T1 high counter -> start
+        self.run_cycles(0x10)
+        self.assertEqual(self.via.read8(0xd005), 0x00)
+        self.assertEqual(self.via.via_ifr & 0x40, 0)
+
+        self.run_cycles(0x20)
+        self.assertEqual(self.via.via_ifr & 0x40, 0x40)
+        self.assertEqual(self.via.via_t1on, 0)
+
+    def test_t1_counter(self):
+        self.via.write8(0xd004, 0x00)
+        self.via.write8(0xd005, 0x10) # $1000 cycles
+        self.run_cycles(0x100)
+        self.assertEqual(self.via.read8(0xd005), 0x0f)
+
+    def test_t2_one_shot(self):
+        self.via.write8(0xd008, 0x40)
+        self.via.write8(0xd009, 0x00)
+        self.run_cycles(0x50)
+        self.assertEqual(self.via.via_ifr & 0x20, 0x20)
+
+
+if __name__ == '__main__':
+    unittest.main(
+        verbosity=2,
+        # failfast=True,
+    )
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+    DragonPy - Cache directory
+    ==========================
+
+    The user cache directory for files that can be recreated at any time,
+    e.g.: the boot state cache and the rendered glyph atlas.
+
+    :copyleft: 2015 by the DragonPy team, see AUTHORS for more details.
+    :license: GNU GPL v3 or above, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+
+CACHE_DIR_ENV = "DRAGONPY_CACHE_DIR"
+
+
+def get_cache_dir():
+    """
+    e.g.: ~/.cache/DragonPy
+    Can be changed via the environment variable DRAGONPY_CACHE_DIR
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        return cache_dir
+
+    base_dir = os.environ.get("XDG_CACHE_HOME")
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "DragonPy")
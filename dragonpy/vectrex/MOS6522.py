@@ -22,6 +22,8 @@ xrange = six.moves.xrange
 
 import logging
 
+from dragonpy.core.scheduler import get_scheduler
+
 log=logging.getLogger(__name__)
 
 
@@ -52,6 +54,10 @@ class MOS6522VIA(object):
         self.cfg = cfg
         self.memory = memory
 
+        # Scheduler events for the timer timeouts:
+        self.t1_event = None
+        self.t2_event = None
+
         self.memory.add_read_byte_callback(
             callback_func=self.read_byte,
             start_addr=0xd000,
@@ -122,6 +128,71 @@ class MOS6522VIA(object):
         self.fcycles = FCYCLES_INIT
         self.t2shift = 0
 
+        for event in (self.t1_event, self.t2_event):
+            if event is not None:
+                self.scheduler.remove_event(event)
+
+    #--------------------------------------------------------------------------
+    # Timers: The timeouts are scheduled as events, the counter values
+    # are calculated from the remaining CPU cycles if they are read.
+
+    @property
+    def scheduler(self):
+        return get_scheduler(self.memory.cpu)
+
+    def _update_irq_flag(self):
+        if ((self.via_ifr & 0x7f) & (self.via_ier & 0x7f)):
+            self.via_ifr |= 0x80
+        else:
+            self.via_ifr &= 0x7f
+
+    def _schedule(self, event, delay, callback):
+        scheduler = self.scheduler
+        cycles = self.memory.cpu.cycles + delay
+        if event is None:
+            return scheduler.add_event(cycles, callback)
+        scheduler.reschedule_event(event, cycles)
+        return event
+
+    def _update_counters(self):
+        scheduler = self.scheduler
+        if self.via_t1on and self.t1_event is not None and self.t1_event.active:
+            self.via_t1c = max(scheduler.get_remaining_cycles(self.t1_event), 0) & 0xffff
+        if self.via_t2on and self.t2_event is not None and self.t2_event.active:
+            self.via_t2c = max(scheduler.get_remaining_cycles(self.t2_event), 0) & 0xffff
+
+    def _stop_timer(self, event):
+        if event is not None:
+            self.scheduler.remove_event(event)
+
+    def t1_timeout(self, cycles):
+        if self.via_t1int:
+            self.via_ifr |= 0x40
+            self._update_irq_flag()
+        if self.via_acr & 0x40:
+            # free-running mode: reload from the latches
+            self.via_t1pb7 ^= 0x80
+            self.via_t1c = (self.via_t1lh << 8) | self.via_t1ll
+            self.scheduler.reschedule_event(self.t1_event, cycles + self.via_t1c + 2)
+        else:
+            # one-shot mode
+            self.via_t1pb7 = 0x80
+            self.via_t1int = 0
+            self.via_t1on = 0
+            self.via_t1c = 0
+        if self.via_ifr & 0x80:
+            self.memory.cpu.irq()
+
+    def t2_timeout(self, cycles):
+        if self.via_t2int:
+            self.via_ifr |= 0x20
+            self._update_irq_flag()
+        self.via_t2int = 0
+        self.via_t2on = 0
+        self.via_t2c = 0
+        if self.via_ifr & 0x80:
+            self.memory.cpu.irq()
+
     def read_byte(self, cpu_cycles, op_address, address):
         result = self.read8(address)
         log.error("%04x| TODO: 6522 read byte from $%04x - Send $%02x back", op_address, address, result)
@@ -191,33 +262,39 @@ class MOS6522VIA(object):
         elif switch_addr == 0x3:
             return self.via_ddra & 0xff
         elif switch_addr == 0x4:
+            self._update_counters()
             data = self.via_t1c
             self.via_ifr &= 0xbf
             self.via_t1on = 0
             self.via_t1int = 0
             self.via_t1pb7 = 0x80
+            self._stop_timer(self.t1_event)
             if ((self.via_ifr & 0x7f) & (self.via_ier & 0x7f)):
                 self.via_ifr |= 0x80
             else:
                 self.via_ifr &= 0x7f
             return data & 0xff
         elif switch_addr == 0x5:
+            self._update_counters()
             return (self.via_t1c >> 8) & 0xff
         elif switch_addr == 0x6:
             return self.via_t1ll & 0xff
         elif switch_addr == 0x7:
             return self.via_t1lh & 0xff
         elif switch_addr == 0x8:
+            self._update_counters()
             data = self.via_t2c
             self.via_ifr &= 0xdf
             self.via_t2on = 0
             self.via_t2int = 0
+            self._stop_timer(self.t2_event)
             if ((self.via_ifr & 0x7f) & (self.via_ier & 0x7f)):
                 self.via_ifr |= 0x80
             else:
                 self.via_ifr &= 0x7f
             return data & 0xff
         elif switch_addr == 0x9:
+            self._update_counters()
             return (self.via_t2c >> 8)
         elif switch_addr == 0xa:
             data = self.via_sr
@@ -273,6 +350,7 @@ class MOS6522VIA(object):
                 self.via_ifr |= 0x80
             else:
                 self.via_ifr &= 0x7f
+            self.t1_event = self._schedule(self.t1_event, self.via_t1c, self.t1_timeout)
         elif switch_addr == 0x6:
             self.via_t1ll = data
         elif switch_addr == 0x7:
@@ -288,6 +366,7 @@ class MOS6522VIA(object):
                 self.via_ifr |= 0x80
             else:
                 self.via_ifr &= 0x7f
+            self.t2_event = self._schedule(self.t2_event, self.via_t2c, self.t2_timeout)
         elif switch_addr == 0xa:
             self.via_sr = data
             self.via_ifr &= 0xfb
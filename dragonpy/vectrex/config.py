@@ -67,7 +67,7 @@ class VectrexCfg(BaseConfig):
 
         # TODO:
         # http://www.playvectrex.com/designit/chrissalo/appendixa.htm#Other
-        if self.verbosity <= logging.ERROR:
+        if self.verbosity <= logging.ERROR or self.mem_info_required:
             self.mem_info = VectrexMemInfo(log.debug)
 
 
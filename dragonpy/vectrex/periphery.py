@@ -42,13 +42,6 @@ class VectrexPeripheryBase(PeripheryBase):
         log.error("%04x| TODO: $0000 - $7FFF Cartridge ROM. Send 0x00 back", op_address)
         return 0x00
 
-#     def update(self, cpu_cycles):
-#         #        log.critical("update pygame")
-#         if not self.running:
-#             return
-#         if self.speaker:
-#             self.speaker.update(cpu_cycles)
-
 
 class VectrexPeriphery(VectrexPeripheryBase):
     def __init__(self, cfg, memory, display_queue, user_input_queue):